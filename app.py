@@ -1,14 +1,13 @@
-from flask import Flask, render_template, send_file, request, Response
+from flask import Flask, render_template, send_file, request, Response, jsonify, url_for, abort
 import os
-import time
 from werkzeug.utils import secure_filename
-from cv_generator import CVGenerator
-from job_description_processor import process_job_description
+from jobs import JobManager, JobQueueFull
+from metrics import get_registry
 
 app = Flask(__name__)
 
-# Assuming you have a function to load info from info.yml
-from utils import load_yaml
+# Each request gets a job id and its own workspace under output/jobs; a bounded pool runs the generations
+job_manager = JobManager('info.yml')
 
 @app.route('/')
 def index():
@@ -24,49 +23,86 @@ def index():
 @app.route('/generate_cv', methods=['POST'])
 def generate_cv():
     job_description = request.form['job_description']
-    info = load_yaml('info.yml')  # Load your info.yml file
-    processed_job_info = process_job_description(job_description)
-    
-    output_dir = 'output'
-    os.makedirs(output_dir, exist_ok=True)
-    
-    cv_generator = CVGenerator(info, processed_job_info, output_dir, max_pages=1)
-    
+    try:
+        job = job_manager.submit(job_description)
+    except JobQueueFull as e:
+        return jsonify({'error': str(e)}), 503
+    return jsonify({
+        'job_id': job.id,
+        'events_url': url_for('job_events', job_id=job.id),
+        'pdf_url': url_for('view_job_pdf', job_id=job.id),
+        'download_url': url_for('download_job_pdf', job_id=job.id),
+    }), 202
+
+@app.route('/jobs/<job_id>/events')
+def job_events(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    # EventSource resends the id of the last event it saw when it reconnects
+    last_event_id = request.headers.get('Last-Event-ID', '')
+    start = int(last_event_id) + 1 if last_event_id.isdigit() else 0
+
     def generate():
-        yield "data: Analyzing job description\n\n"
-        time.sleep(1)  # Simulate processing time
-        
-        for section in ['education', 'work_experience', 'projects', 'technical_skills']:
-            yield f"data: section:{section}\n\n"
-            cv_generator.generate_single_section(section)
-            cv_generator.compile_cv()  # Compile after each section
-            time.sleep(1)  # Simulate processing time
-        
-        yield "data: Optimizing CV content\n\n"
-        cv_generator.optimize_content()
-        time.sleep(1)  # Simulate processing time
-        
-        yield "data: Compiling final LaTeX document\n\n"
-        cv_generator.compile_cv()
-        time.sleep(1)  # Simulate processing time
-        
-        yield "data: complete\n\n"
-    
-    return Response(generate(), mimetype='text/event-stream')
+        index = start
+        for event in job.stream(start):
+            if event is None:
+                yield ": keep-alive\n\n"
+                continue
+            # Streamed text carries no id, so a reconnect resumes from the last status event
+            if event.startswith("token:"):
+                yield f"data: {event}\n\n"
+                continue
+            yield f"id: {index}\ndata: {event}\n\n"
+            index += 1
+
+    return Response(generate(), mimetype='text/event-stream', headers={'Cache-Control': 'no-cache'})
+
+@app.route('/jobs/<job_id>/cancel', methods=['POST'])
+def cancel_job(job_id):
+    if not job_manager.cancel(job_id):
+        abort(404)
+    return jsonify({'job_id': job_id, 'status': 'cancelling'}), 202
+
+@app.route('/jobs/<job_id>/metrics')
+def job_metrics(job_id):
+    if job_manager.get(job_id) is None:
+        abort(404)
+    return jsonify(get_registry().summary(job_id))
+
+@app.route('/metrics')
+def metrics():
+    return Response(get_registry().to_prometheus(), mimetype='text/plain; version=0.0.4')
+
+def get_job_pdf(job_id):
+    job = job_manager.get(job_id)
+    if job is None:
+        abort(404)
+    if not os.path.exists(job.pdf_path):
+        return 'static/example.pdf'
+    return job.pdf_path
+
+@app.route('/jobs/<job_id>/pdf')
+def view_job_pdf(job_id):
+    return send_file(get_job_pdf(job_id), mimetype='application/pdf', max_age=0)
+
+@app.route('/jobs/<job_id>/pdf/download')
+def download_job_pdf(job_id):
+    return send_file(get_job_pdf(job_id), as_attachment=True, download_name='generated_cv.pdf')
 
 @app.route('/view_pdf')
 def view_pdf():
-    pdf_path = 'output/main.pdf'  # Adjust this path to your actual PDF location
+    pdf_path = 'output/main.pdf'  # Generated from the command line
     if not os.path.exists(pdf_path):
         pdf_path = 'static/example.pdf'  # Path to your example PDF
     return send_file(pdf_path, mimetype='application/pdf')
 
 @app.route('/download_pdf')
 def download_pdf():
-    pdf_path = 'output/main.pdf'  # Adjust this path to your actual PDF location
+    pdf_path = 'output/main.pdf'  # Generated from the command line
     if not os.path.exists(pdf_path):
         pdf_path = 'static/example.pdf'  # Path to your example PDF
     return send_file(pdf_path, as_attachment=True, download_name='generated_cv.pdf')
 
 if __name__ == '__main__':
-    app.run(debug=True)
\ No newline at end of file
+    app.run(debug=True, threaded=True)
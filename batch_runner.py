@@ -0,0 +1,173 @@
+import os
+import re
+import json
+import time
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, asdict, field
+from typing import Dict, List, Optional
+from loguru import logger
+from dotenv import load_dotenv
+from cv_generator import CVGenerator
+from compile_report import load_compile_report
+from job_description_processor import process_job_description
+from metrics import job_context, get_registry
+from utils import load_yaml
+
+load_dotenv()
+
+JOB_DESCRIPTION_EXTENSIONS = ('.txt', '.md')
+# JSONL records may name their fields any of these ways
+JSONL_NAME_KEYS = ('name', 'id', 'title')
+JSONL_TEXT_KEYS = ('job_description', 'description', 'text')
+
+
+@dataclass
+class BatchJob:
+    name: str
+    job_description: str
+    source: str
+
+
+@dataclass
+class BatchResult:
+    name: str
+    source: str
+    status: str
+    pdf: Optional[str] = None
+    pages: Optional[int] = None
+    elapsed: float = 0.0
+    timings: Dict[str, float] = field(default_factory=dict)
+    metrics: Dict = field(default_factory=dict)
+    error: Optional[str] = None
+
+
+def slugify(name: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_-]+', '_', name).strip('_') or 'job'
+
+
+def load_batch_jobs(path: str) -> List[BatchJob]:
+    """Read job descriptions from a directory of .txt/.md files or from a JSONL file, one job per line."""
+    jobs = []
+    if os.path.isdir(path):
+        for filename in sorted(os.listdir(path)):
+            if filename.endswith(JOB_DESCRIPTION_EXTENSIONS):
+                file_path = os.path.join(path, filename)
+                with open(file_path, 'r') as file:
+                    jobs.append(BatchJob(os.path.splitext(filename)[0], file.read(), file_path))
+    else:
+        with open(path, 'r') as file:
+            for line_number, line in enumerate(file, 1):
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                text = next((record[key] for key in JSONL_TEXT_KEYS if record.get(key)), None)
+                if text is None:
+                    logger.warning(f"{path}:{line_number} has no job description, skipping")
+                    continue
+                name = next((str(record[key]) for key in JSONL_NAME_KEYS if record.get(key)), f"job_{line_number}")
+                jobs.append(BatchJob(name, text, f"{path}:{line_number}"))
+
+    # Every job gets its own directory, so names must be unique once slugified
+    seen: Dict[str, int] = {}
+    for job in jobs:
+        slug = slugify(job.name)
+        seen[slug] = seen.get(slug, 0) + 1
+        job.name = slug if seen[slug] == 1 else f"{slug}_{seen[slug]}"
+    return jobs
+
+
+def run_batch_job(job: BatchJob, info_path: str, batch_dir: str, max_pages: int) -> BatchResult:
+    """Generate one CV in batch_dir/<name>, working in batch_dir/<name>/work. Runs in a worker process."""
+    job_dir = os.path.join(batch_dir, job.name)
+    output_dir = os.path.join(job_dir, 'work')
+    os.makedirs(output_dir, exist_ok=True)
+    result = BatchResult(job.name, job.source, "failed")
+    start = time.perf_counter()
+    with job_context(job.name):
+        try:
+            stage_start = time.perf_counter()
+            processed_job_info = process_job_description(job.job_description)
+            result.timings['process_job_description'] = time.perf_counter() - stage_start
+
+            stage_start = time.perf_counter()
+            cv_generator = CVGenerator(load_yaml(info_path), processed_job_info, output_dir, max_pages=max_pages)
+            result.pdf = cv_generator.generate_cv(cv_dir=job_dir, on_existing='overwrite')
+            result.timings['generate_cv'] = time.perf_counter() - stage_start
+
+            report = load_compile_report(output_dir)
+            result.pages = report.pages if report else None
+            if result.pdf is None:
+                result.error = "No PDF was produced"
+            else:
+                result.status = "ok"
+        except Exception as e:
+            logger.exception(f"Batch job {job.name} failed: {str(e)}")
+            result.error = str(e)
+    result.elapsed = time.perf_counter() - start
+    result.metrics = get_registry().summary(job.name)
+    return result
+
+
+def run_batch(jobs_path: str, info_path: str, batch_dir: str, workers: int = 4, max_pages: int = 1) -> Dict:
+    """
+    Tailor the CV to every job description in jobs_path using a pool of worker processes.
+
+    Each job works in its own directory, while the LLM response cache, the processed job descriptions
+    and the precompiled LaTeX formats are shared on disk. A manifest.json with per-job timings, page
+    counts and failures is written to batch_dir and returned.
+    """
+    jobs = load_batch_jobs(jobs_path)
+    os.makedirs(batch_dir, exist_ok=True)
+    logger.info(f"Running {len(jobs)} job(s) from {jobs_path} with {workers} worker(s)")
+
+    start = time.perf_counter()
+    results: List[BatchResult] = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(run_batch_job, job, info_path, batch_dir, max_pages): job for job in jobs}
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                result = future.result()
+            except Exception as e:
+                # The worker process itself died
+                result = BatchResult(job.name, job.source, "failed", error=str(e))
+            logger.info(f"{result.name}: {result.status} in {result.elapsed:.1f}s ({result.pages} page(s))")
+            results.append(result)
+
+    order = {job.name: index for index, job in enumerate(jobs)}
+    results.sort(key=lambda result: order[result.name])
+    manifest = {
+        'jobs_path': jobs_path,
+        'info_path': info_path,
+        'max_pages': max_pages,
+        'workers': workers,
+        'elapsed': time.perf_counter() - start,
+        'succeeded': sum(1 for result in results if result.status == "ok"),
+        'failed': sum(1 for result in results if result.status != "ok"),
+        'cost': round(sum(result.metrics.get('total', {}).get('cost', 0.0) for result in results), 6),
+        'results': [asdict(result) for result in results],
+    }
+    manifest_path = os.path.join(batch_dir, 'manifest.json')
+    with open(manifest_path, 'w') as file:
+        json.dump(manifest, file, indent=2)
+    logger.info(f"Batch finished: {manifest['succeeded']} succeeded, {manifest['failed']} failed; manifest at {manifest_path}")
+    return manifest
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate one tailored CV per job description, in parallel")
+    parser.add_argument("jobs", help="Directory of .txt/.md job descriptions or a JSONL file with one job per line")
+    parser.add_argument("--info", default="info.yml", help="Path to the YAML file containing personal information")
+    parser.add_argument("--output", default="batch_output", help="Directory for the per-job CVs and the manifest")
+    parser.add_argument("--workers", type=int, default=4, help="Number of worker processes")
+    parser.add_argument("--pages", type=int, default=1, choices=[1, 2], help="Maximum number of pages for each CV")
+
+    args = parser.parse_args()
+    manifest = run_batch(args.jobs, args.info, args.output, args.workers, args.pages)
+    if manifest['failed']:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
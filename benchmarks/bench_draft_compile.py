@@ -0,0 +1,73 @@
+"""
+Measure what a draft (-draftmode) probe compile saves over a full compile in the reduction loop.
+
+Every reduction iteration recompiles the CV only to read its page count and layout from the log, so the
+saving per iteration is the difference between a full and a draft compile of the same document. main.tex
+is written by CVGenerator.generate_main_tex, as in the pipeline, so the log carries the \\cvmark{end} line
+draft page counts are read from. The render cache is disabled so every compile runs pdflatex.
+
+Usage: python benchmarks/bench_draft_compile.py [--cv-dir cv_template] [--profile info.example.yml]
+                                                [--runs 10] [--iterations 3]
+"""
+import os
+import sys
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ["LATEX_RENDER_CACHE"] = "0"
+
+from loguru import logger
+from utils import compile_latex_report, load_yaml
+
+
+def time_compiles(output_dir, draft, runs):
+    timings, pages = [], None
+    for _ in range(runs):
+        report = compile_latex_report(output_dir, stage="probe" if draft else "compile", draft=draft)
+        if report is None or not report.success:
+            raise RuntimeError(f"{'Draft' if draft else 'Full'} compile of {output_dir} failed")
+        timings.append(report.elapsed)
+        pages = report.pages
+    return statistics.median(timings), pages
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark draft probe compiles against full compiles")
+    parser.add_argument("--cv-dir", default="cv_template",
+                        help="Directory with resume.cls and the section files to compile")
+    parser.add_argument("--profile", default="info.example.yml", help="Profile whose details go into main.tex")
+    parser.add_argument("--runs", type=int, default=10, help="Compiles per mode")
+    parser.add_argument("--iterations", type=int, default=3,
+                        help="Reduction iterations to estimate the saving for (compiles before the final one)")
+    args = parser.parse_args()
+
+    if shutil.which('pdflatex') is None:
+        print("pdflatex not found on PATH; nothing to measure")
+        return
+    logger.remove()
+    logger.add(sys.stderr, level="ERROR")
+
+    from cv_generator import CVGenerator
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        shutil.copytree(args.cv_dir, output_dir, dirs_exist_ok=True)
+        CVGenerator(load_yaml(args.profile), {}, output_dir).generate_main_tex()
+        # Warm up the precompiled format and the file system cache
+        compile_latex_report(output_dir)
+        full_time, full_pages = time_compiles(output_dir, False, args.runs)
+        draft_time, draft_pages = time_compiles(output_dir, True, args.runs)
+
+    saving = full_time - draft_time
+    print(f"full compile:   {full_time * 1000:8.1f} ms  ({full_pages} page(s))")
+    print(f"draft compile:  {draft_time * 1000:8.1f} ms  ({draft_pages} page(s))")
+    print(f"saved per reduction iteration: {saving * 1000:.1f} ms ({saving / full_time:.0%})")
+    print(f"saved over {args.iterations} iterations: {saving * args.iterations * 1000:.1f} ms")
+    if draft_pages != full_pages:
+        print("warning: draft and full compiles report different page counts")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Measure how long the entry points take to import, using python -X importtime in fresh interpreters.
+
+OPENAI_API_KEY is removed from the environment, as for a compile-only command that never calls the model.
+
+Usage: python benchmarks/bench_import_time.py [--modules main app ...] [--runs 5] [--top 8]
+"""
+import os
+import re
+import sys
+import argparse
+import statistics
+import subprocess
+from collections import defaultdict
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+MODULES = ['main', 'app', 'cv_generator', 'utils', 'job_description_processor']
+# "import time: <self us> | <cumulative us> | <indented module name>"
+LINE_PATTERN = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| ( *)(\S+)")
+
+
+def import_times(module):
+    """
+    Cumulative import time in microseconds of `module` and of each module it imports directly, from a
+    fresh interpreter. Nested imports are printed before the import that triggered them, two spaces deeper.
+    """
+    env = {key: value for key, value in os.environ.items() if key != 'OPENAI_API_KEY'}
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, env=env, capture_output=True, text=True)
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr.strip().splitlines()[-1]}")
+    children = {}
+    for line in result.stderr.splitlines():
+        match = LINE_PATTERN.match(line)
+        if not match:
+            continue
+        name, total, depth = match.group(4), int(match.group(2)), len(match.group(3))
+        if depth == 2:
+            children[name] = total
+        elif depth == 0:
+            if name == module:
+                return total, children
+            children = {}
+    raise RuntimeError(f"No import time reported for {module}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark entry point import times")
+    parser.add_argument("--modules", nargs="+", default=MODULES, help="Modules to import")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module")
+    parser.add_argument("--top", type=int, default=8, help="Heaviest direct imports to list per module")
+    args = parser.parse_args()
+
+    for module in args.modules:
+        totals, children = [], defaultdict(list)
+        for _ in range(args.runs):
+            total, imports = import_times(module)
+            totals.append(total)
+            for name, time in imports.items():
+                children[name].append(time)
+        print(f"{module}: {statistics.median(totals) / 1000:.1f} ms (median of {args.runs})")
+        heaviest = sorted(children, key=lambda name: statistics.median(children[name]), reverse=True)
+        for name in heaviest[:args.top]:
+            print(f"  {name:<40}{statistics.median(children[name]) / 1000:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
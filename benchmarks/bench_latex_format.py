@@ -0,0 +1,68 @@
+"""
+Compare cold pdflatex compiles against compiles that load the precompiled preamble format.
+
+Usage: python benchmarks/bench_latex_format.py [--source output] [--runs 5]
+"""
+import os
+import sys
+import time
+import shutil
+import argparse
+import statistics
+import subprocess
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latex_format import ensure_dump_marker, get_format_args
+
+
+def time_compiles(directory, args, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(['pdflatex', '-interaction=nonstopmode', *args, 'main.tex'],
+                       cwd=directory, capture_output=True, text=True)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the precompiled LaTeX format")
+    parser.add_argument("--source", default="output", help="Directory with main.tex, resume.cls and the sections")
+    parser.add_argument("--runs", type=int, default=5, help="Compiles per configuration")
+    args = parser.parse_args()
+
+    if shutil.which('pdflatex') is None:
+        print("pdflatex not found on PATH")
+        return
+
+    with tempfile.TemporaryDirectory() as work_dir, tempfile.TemporaryDirectory() as format_dir:
+        for filename in os.listdir(args.source):
+            if filename.endswith(('.tex', '.cls')):
+                shutil.copy(os.path.join(args.source, filename), work_dir)
+        main_path = os.path.join(work_dir, 'main.tex')
+        with open(main_path, 'r') as file:
+            main_tex = ensure_dump_marker(file.read())
+        with open(main_path, 'w') as file:
+            file.write(main_tex)
+
+        cold = time_compiles(work_dir, [], args.runs)
+
+        start = time.perf_counter()
+        format_args = get_format_args(work_dir, format_dir=format_dir)
+        build_time = time.perf_counter() - start
+        if not format_args:
+            print("Format could not be built (is mylatexformat installed?)")
+            return
+        warm = time_compiles(work_dir, format_args, args.runs)
+
+    cold_mean, warm_mean = statistics.mean(cold), statistics.mean(warm)
+    print(f"cold compile:      mean {cold_mean * 1000:8.1f} ms  min {min(cold) * 1000:8.1f} ms")
+    print(f"format compile:    mean {warm_mean * 1000:8.1f} ms  min {min(warm) * 1000:8.1f} ms")
+    print(f"format build:           {build_time * 1000:8.1f} ms (once per preamble/class change)")
+    print(f"saving per compile:     {(cold_mean - warm_mean) * 1000:8.1f} ms ({1 - warm_mean / cold_mean:.0%})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Compare the single-pass LaTeX lexer against the multi-pass checks it replaced, on large sections.
+
+The legacy functions below are the validate_latex_syntax / fix_latex_syntax / '#' escaping that
+generate_section_content used to run, kept here only as a baseline.
+
+Usage: python benchmarks/bench_latex_lexer.py [--copies 1 10 100] [--runs 20]
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from latex_lexer import scan_latex
+
+TEMPLATE = "cv_template/sections/projects/example_project.tex"
+
+
+def legacy_validate(content):
+    brace_count = sum(1 if char == '{' else -1 if char == '}' else 0 for char in content)
+    if brace_count != 0:
+        return False
+    for command in [r'\\begin', r'\\end', r'\\section', r'\\subsection', r'\\textbf', r'\\textit', r'\\item']:
+        if content.count(command + '{') != content.count(command + '}'):
+            return False
+    for env in re.findall(r'\\begin\{(\w+)\}', content):
+        if content.count(r'\\begin{' + env + '}') != content.count(r'\\end{' + env + '}'):
+            return False
+    return not (r'\\begin{multicols}' in content or r'\\end{multicols}' in content)
+
+
+def legacy_fix(content):
+    brace_count = sum(1 if char == '{' else -1 if char == '}' else 0 for char in content)
+    content = '{' * max(0, -brace_count) + content + '}' * max(0, brace_count)
+    for command in ['\\\\begin', '\\\\end', '\\\\section', '\\\\subsection', '\\\\textbf', '\\\\textit', '\\\\item']:
+        content = re.sub(rf'{command}\s*([^{{}}]+)', rf'{command}{{\1}}', content)
+    for env in re.findall(r'\\begin\{(\w+)\}', content):
+        if content.count(r'\\begin{' + env + '}') > content.count(r'\\end{' + env + '}'):
+            content += r'\\end{' + env + '}'
+    content = re.sub(r'\\begin\{multicols\}.*?\\end\{multicols\}', '', content, flags=re.DOTALL)
+    return content.replace(r'\\begin{multicols}', '').replace(r'\\end{multicols}', '')
+
+
+def legacy(content):
+    if not legacy_validate(content):
+        content = legacy_fix(content)
+    return content.replace('#', r'\#').replace(r'\\#', r'\#')
+
+
+def build_section(copies, broken):
+    with open(TEMPLATE, 'r') as file:
+        template = file.read()
+    body = template.split('\n', 1)[1].rsplit('\\end{rSection}', 1)[0]
+    if broken:
+        # A typical model slip: a dropped closing brace and an unescaped ampersand in every entry
+        body = body.replace('{AI, Python, GitHub}', '{AI & ML, Python, GitHub').replace('Flask}', 'Flask')
+    return '\\begin{rSection}{Projects}\n' + body * copies + '\\end{rSection}'
+
+
+def time_function(function, content, runs):
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        function(content)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark LaTeX validation and repair")
+    parser.add_argument("--copies", type=int, nargs="+", default=[1, 10, 100],
+                        help="Section sizes, in copies of the example projects")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per configuration")
+    args = parser.parse_args()
+
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    print(f"{'section':<22}{'size':>10}{'legacy ms':>12}{'lexer ms':>12}{'speedup':>10}")
+    for broken in (False, True):
+        for copies in args.copies:
+            content = build_section(copies, broken)
+            legacy_time = time_function(legacy, content, args.runs)
+            lexer_time = time_function(scan_latex, content, args.runs)
+            label = f"{copies}x {'broken' if broken else 'valid'}"
+            print(f"{label:<22}{len(content):>10}{legacy_time * 1000:12.3f}{lexer_time * 1000:12.3f}"
+                  f"{legacy_time / lexer_time:9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
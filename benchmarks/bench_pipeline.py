@@ -0,0 +1,190 @@
+"""
+Run the whole pipeline (process_job_description -> CVGenerator.generate_cv -> CVReducer) over a corpus
+of profiles and job descriptions and report per-stage p50/p95 wall times and compile counts.
+
+By default the LLM is the local stub in llm_stub_server.py, so runs are free, offline and repeatable;
+--latency and --jitter make it behave like a remote model. Pass --api-base to benchmark against another
+OpenAI-compatible endpoint instead. LaTeX stages need pdflatex on PATH.
+
+Usage: python benchmarks/bench_pipeline.py [--profiles info.example.yml] [--jobs benchmarks/corpus/jobs]
+                                           [--runs 3] [--latency 0.5 --jitter 0.2] [--json results.json]
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, REPO_DIR)
+
+PIPELINE_STAGES = ("job_description", "generate_cv", "reduce", "total")
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile, which stays meaningful for the handful of runs a benchmark makes."""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(fraction * len(ordered) + 0.5) - 1))]
+
+
+def collect_corpus(profiles, jobs):
+    def expand(paths, extensions):
+        files = []
+        for path in paths:
+            if os.path.isdir(path):
+                files.extend(os.path.join(path, name) for name in sorted(os.listdir(path)) if name.endswith(extensions))
+            else:
+                files.append(path)
+        return [os.path.abspath(path) for path in files]
+    return expand(profiles, ('.yml', '.yaml')), expand(jobs, ('.txt', '.md'))
+
+
+def run_once(profile_path, job_path, work_dir, max_pages, run_id):
+    from utils import load_yaml, load_job_description
+    from job_description_processor import process_job_description
+    from cv_generator import CVGenerator
+    from cv_reducer import CVReducer
+    from metrics import get_registry, job_context
+
+    output_dir = os.path.join(work_dir, "output")
+    os.makedirs(output_dir, exist_ok=True)
+    info = load_yaml(profile_path)
+    job_description = load_job_description(job_path)
+    timings = {}
+
+    pdf_path, error = None, None
+    start = time.perf_counter()
+    with job_context(run_id):
+        try:
+            processed_job_info = process_job_description(job_description)
+            timings["job_description"] = time.perf_counter() - start
+
+            stage_start = time.perf_counter()
+            generator = CVGenerator(info, processed_job_info, output_dir, max_pages=max_pages)
+            pdf_path = generator.generate_cv(cv_dir=os.path.join(work_dir, "CVs"), on_existing="overwrite")
+            timings["generate_cv"] = time.perf_counter() - stage_start
+
+            stage_start = time.perf_counter()
+            CVReducer(output_dir, generator.cv_reducer.job_description, max_pages=max_pages).reduce_content()
+            timings["reduce"] = time.perf_counter() - stage_start
+        except Exception as e:
+            # One broken run should not end the benchmark; the stages it finished are still reported
+            error = f"{type(e).__name__}: {e}"
+        timings["total"] = time.perf_counter() - start
+
+    summary = get_registry().summary(run_id)
+    return {
+        "profile": os.path.basename(profile_path),
+        "job": os.path.basename(job_path),
+        "pdf": pdf_path is not None,
+        "error": error,
+        "timings": timings,
+        "stages": {f"{kind}:{stage}": stats for kind in ("llm", "compile") for stage, stats in summary.get(kind, {}).items()},
+        "compiles": sum(stats["calls"] for stats in summary.get("compile", {}).values()),
+        "llm_calls": sum(stats["calls"] for stats in summary.get("llm", {}).values()),
+    }
+
+
+def report(results):
+    rows = [(stage, [result["timings"].get(stage, 0.0) for result in results]) for stage in PIPELINE_STAGES]
+    stage_names = sorted({name for result in results for name in result["stages"]})
+    # A stage a run never reached counts as zero time for that run
+    rows += [(name, [result["stages"].get(name, {}).get("wall_time", 0.0) for result in results]) for name in stage_names]
+
+    failed = sum(result["error"] is not None for result in results)
+    print(f"{len(results)} runs, {sum(result['pdf'] for result in results)} produced a PDF, {failed} failed")
+    print(f"{'stage':<28}{'p50 ms':>12}{'p95 ms':>12}{'calls/run':>12}")
+    for name, values in rows:
+        calls = [result["stages"].get(name, {}).get("calls", 0) for result in results] if ":" in name else None
+        calls_column = f"{sum(calls) / len(calls):12.1f}" if calls else f"{'':>12}"
+        print(f"{name:<28}{percentile(values, 0.5) * 1000:12.1f}{percentile(values, 0.95) * 1000:12.1f}{calls_column}")
+
+    compiles = [result["compiles"] for result in results]
+    llm_calls = [result["llm_calls"] for result in results]
+    print(f"compiles per run:   p50 {percentile(compiles, 0.5)}  p95 {percentile(compiles, 0.95)}  max {max(compiles)}")
+    print(f"LLM calls per run:  p50 {percentile(llm_calls, 0.5)}  p95 {percentile(llm_calls, 0.95)}  max {max(llm_calls)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the CV pipeline end to end")
+    parser.add_argument("--profiles", nargs="+", default=[os.path.join(REPO_DIR, "info.example.yml")],
+                        help="info.yml files, or directories of them")
+    parser.add_argument("--jobs", nargs="+", default=[os.path.join(REPO_DIR, "job_description.example.txt"),
+                                                      os.path.join(REPO_DIR, "benchmarks", "corpus", "jobs")],
+                        help="Job description files, or directories of them")
+    parser.add_argument("--runs", type=int, default=3, help="Runs per profile and job description")
+    parser.add_argument("--pages", type=int, default=1, choices=[1, 2], help="Maximum number of pages for the CV")
+    parser.add_argument("--api-base", help="Use this OpenAI-compatible endpoint instead of starting the stub")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stub seconds per response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Stub latency varies by up to this many seconds")
+    parser.add_argument("--tokens-per-second", type=float, help="Stub pace for streamed responses")
+    parser.add_argument("--recordings", help="LLM cache database for the stub to replay")
+    parser.add_argument("--warm-cache", action="store_true",
+                        help="Let repeated runs hit the LLM, job description and render caches "
+                             "instead of measuring cold runs")
+    parser.add_argument("--json", help="Also write every run's measurements to this file")
+    args = parser.parse_args()
+
+    profiles, jobs = collect_corpus(args.profiles, args.jobs)
+    json_path = os.path.abspath(args.json) if args.json else None
+    if not profiles or not jobs:
+        print("No profiles or job descriptions found")
+        return
+    if shutil.which('pdflatex') is None:
+        print("pdflatex not found on PATH; compiles will fail, so bullets are fitted by length instead of width")
+        os.environ.setdefault("CV_BULLET_FIT", "length")
+
+    with tempfile.TemporaryDirectory() as bench_dir:
+        # Runs happen in a scratch directory so caches and outputs never touch the checkout
+        os.environ.setdefault("OPENAI_API_KEY", "stub")
+        os.environ.setdefault("OPENAI_MODEL", "gpt-4o-mini")
+        os.environ["LLM_CACHE_PATH"] = os.path.join(bench_dir, "llm_cache.sqlite3")
+        if not args.warm_cache:
+            os.environ["LLM_CACHE_BYPASS"] = "1"
+        os.symlink(os.path.join(REPO_DIR, "cv_template"), os.path.join(bench_dir, "cv_template"))
+        os.chdir(bench_dir)
+
+        import openai
+        from loguru import logger
+        server = None
+        if args.api_base:
+            openai.api_base = args.api_base
+        else:
+            from llm_stub_server import StubResponder, start_server
+            server, openai.api_base = start_server(responder=StubResponder(
+                args.latency, args.jitter, args.tokens_per_second, args.recordings, seed=0))
+        import cv_generator  # noqa: F401 -- pipeline modules add their own log sinks on import
+        logger.remove()
+        logger.add(sys.stderr, level="ERROR")
+
+        results = []
+        try:
+            for profile_path in profiles:
+                for job_path in jobs:
+                    for run in range(args.runs):
+                        if not args.warm_cache:
+                            shutil.rmtree(os.path.join(bench_dir, "job_descriptions"), ignore_errors=True)
+                            shutil.rmtree(os.path.join(bench_dir, ".cache", "latex", "renders"), ignore_errors=True)
+                        work_dir = tempfile.mkdtemp(dir=bench_dir)
+                        run_id = f"{os.path.basename(profile_path)}:{os.path.basename(job_path)}:{run}"
+                        results.append(run_once(profile_path, job_path, work_dir, args.pages, run_id))
+                        result = results[-1]
+                        print(f"{run_id}: {result['timings']['total']:.2f}s, {result['llm_calls']} LLM calls, "
+                              f"{result['compiles']} compiles" + (f" ({result['error']})" if result['error'] else ""))
+        finally:
+            if server is not None:
+                server.shutdown()
+            os.chdir(REPO_DIR)
+
+    report(results)
+    if json_path:
+        with open(json_path, "w") as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,191 @@
+import os
+import re
+import math
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import subprocess
+from typing import Dict, List, NamedTuple
+from loguru import logger
+from latex_format import get_format_args
+from latex_lexer import scan_latex
+from metrics import record_compile
+from utils import BULLET_PREFIX, chat_completion, parse_json_response
+
+MEASURE_MACRO = r"\newcommand{\cvmeasure}[2]{\setbox0\hbox{#2}\typeout{CVMEASURE:#1:\the\wd0:\the\linewidth}#2}"
+MEASURE_PATTERN = re.compile(r"CVMEASURE:(\w+)\.(\d+):([\d.]+)pt:([\d.]+)pt")
+INPUT_PATTERN = re.compile(r"\\input\{([^}]+)\}")
+
+# A bullet whose last line holds at most this fraction of the line width is cheap to pull back onto one line less
+DEFAULT_WRAP_TOLERANCE = 0.15
+
+
+class BulletMeasurement(NamedTuple):
+    section: str
+    line_index: int
+    text: str
+    width_pt: float
+    line_width_pt: float
+
+    @property
+    def lines(self) -> int:
+        return max(1, math.ceil(self.width_pt / self.line_width_pt))
+
+    @property
+    def spill_pt(self) -> float:
+        """Width of the text that lands on the bullet's last line."""
+        return self.width_pt - (self.lines - 1) * self.line_width_pt
+
+    def wraps_by_small_margin(self, tolerance: float = DEFAULT_WRAP_TOLERANCE) -> bool:
+        return self.lines > 1 and self.spill_pt <= tolerance * self.line_width_pt
+
+    def characters_to_cut(self) -> int:
+        """Estimate how many characters must go for the bullet to lose its last line."""
+        average_char_width = self.width_pt / max(1, len(self.text))
+        return math.ceil(self.spill_pt / average_char_width) + 2
+
+
+def get_input_sections(output_dir: str) -> List[str]:
+    with open(os.path.join(output_dir, 'main.tex'), 'r') as file:
+        return INPUT_PATTERN.findall(file.read())
+
+
+def instrument_section(content: str, section: str) -> str:
+    lines = content.split('\n')
+    for index, line in enumerate(lines):
+        if line.strip().startswith(BULLET_PREFIX):
+            text = line.strip()[len(BULLET_PREFIX):].strip()
+            lines[index] = f"    {BULLET_PREFIX}\\cvmeasure{{{section}.{index}}}{{{text}}}"
+    return '\n'.join(lines)
+
+
+def measure_bullets(output_dir: str) -> List[BulletMeasurement]:
+    """
+    Report the typeset width and line count of every bullet point in the CV.
+
+    The document is compiled once, as a draft that writes no PDF, in a scratch copy of `output_dir` with
+    each bullet wrapped in a macro that boxes its text and writes the box width and the available
+    \\linewidth to the log.
+    """
+    sections = get_input_sections(output_dir)
+    texts: Dict[tuple, str] = {}
+
+    with tempfile.TemporaryDirectory() as measure_dir:
+        for filename in os.listdir(output_dir):
+            if filename.endswith(('.tex', '.cls')):
+                shutil.copy(os.path.join(output_dir, filename), measure_dir)
+
+        main_path = os.path.join(measure_dir, 'main.tex')
+        with open(main_path, 'r') as file:
+            main_tex = file.read()
+        with open(main_path, 'w') as file:
+            file.write(main_tex.replace(r"\begin{document}", MEASURE_MACRO + "\n" + r"\begin{document}", 1))
+
+        for section in sections:
+            section_path = os.path.join(measure_dir, f"{section}.tex")
+            if not os.path.exists(section_path):
+                continue
+            with open(section_path, 'r') as file:
+                content = file.read()
+            for index, line in enumerate(content.split('\n')):
+                if line.strip().startswith(BULLET_PREFIX):
+                    texts[(section, index)] = line.strip()[len(BULLET_PREFIX):].strip()
+            with open(section_path, 'w') as file:
+                file.write(instrument_section(content, section))
+
+        start = time.perf_counter()
+        result = subprocess.run(['pdflatex', '-interaction=nonstopmode', '-draftmode', *get_format_args(measure_dir), 'main.tex'],
+                                cwd=measure_dir, capture_output=True, text=True)
+        record_compile("measure", time.perf_counter() - start, success=result.returncode == 0)
+        log_path = os.path.join(measure_dir, 'main.log')
+        if not os.path.exists(log_path):
+            logger.error("Bullet measurement compile produced no log")
+            return []
+        with open(log_path, 'r', encoding='latin-1') as file:
+            log = file.read()
+
+    measurements = []
+    for section, line_index, width, line_width in MEASURE_PATTERN.findall(log):
+        key = (section, int(line_index))
+        if key in texts and float(line_width) > 0:
+            measurements.append(BulletMeasurement(section, int(line_index), texts[key], float(width), float(line_width)))
+    logger.info(f"Measured {len(measurements)} bullet points in {output_dir}")
+    return measurements
+
+
+def shorten_bullets(measurements: List[BulletMeasurement]) -> Dict[tuple, str]:
+    """Ask for every near-miss bullet to be shortened in a single request, keyed by (section, line index)."""
+    limits = {index: len(m.text) - m.characters_to_cut() for index, m in enumerate(measurements)}
+    prompt = (
+        "Shorten each bullet point to at most its max_length characters while keeping its key information, "
+        "metrics and LaTeX escapes intact.\n"
+        'Return only a JSON array of objects of the form {"index": <index>, "text": "<bullet point>"}.\n\n'
+        + json.dumps([{"index": index, "max_length": limits[index], "text": m.text}
+                      for index, m in enumerate(measurements)], indent=2)
+    )
+    try:
+        response = parse_json_response(chat_completion(
+            "You are an expert in CV writing. Tighten bullet points without losing their meaning.", prompt,
+            stage="bullets"
+        ))
+    except Exception as e:
+        logger.error(f"Error shortening bullet points: {str(e)}")
+        return {}
+
+    shortened = {}
+    for item in response:
+        index = int(item.get("index", -1))
+        # Bullets are LaTeX, so an unescaped % or & in a rewrite would break the next compile
+        text = scan_latex(str(item.get("text", "")).strip().lstrip('-').strip()).fixed
+        if index in limits and text and len(text) <= limits[index]:
+            measurement = measurements[index]
+            shortened[(measurement.section, measurement.line_index)] = text
+    return shortened
+
+
+def fit_bullet_widths(output_dir: str, tolerance: float = DEFAULT_WRAP_TOLERANCE) -> int:
+    """
+    Shorten only the bullets that spill onto an extra line by a small margin, so LLM calls are spent
+    where they actually recover vertical space. Returns the number of bullets rewritten.
+    """
+    near_misses = [m for m in measure_bullets(output_dir) if m.wraps_by_small_margin(tolerance)]
+    if not near_misses:
+        logger.info("No bullet points wrap by a small margin")
+        return 0
+
+    logger.info(f"{len(near_misses)} bullet points wrap by less than {tolerance:.0%} of a line, shortening")
+    shortened = shorten_bullets(near_misses)
+    for section in {section for section, _ in shortened}:
+        section_path = os.path.join(output_dir, f"{section}.tex")
+        with open(section_path, 'r') as file:
+            lines = file.read().split('\n')
+        for (bullet_section, line_index), text in shortened.items():
+            if bullet_section == section:
+                lines[line_index] = f"    {BULLET_PREFIX}{text}"
+        with open(section_path, 'w') as file:
+            file.write('\n'.join(lines))
+
+    logger.success(f"Shortened {len(shortened)} of {len(near_misses)} wrapping bullet points")
+    return len(shortened)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure typeset bullet widths and shorten near-miss wraps")
+    parser.add_argument("action", choices=["measure", "fit"], help="Action to perform")
+    parser.add_argument("--output_dir", default="output", help="Directory containing main.tex and the sections")
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_WRAP_TOLERANCE,
+                        help="Largest last-line fill, as a fraction of the line width, worth shortening")
+    args = parser.parse_args()
+
+    if args.action == "measure":
+        for m in measure_bullets(args.output_dir):
+            flag = " <- near miss" if m.wraps_by_small_margin(args.tolerance) else ""
+            logger.info(f"{m.section}:{m.line_index} {m.lines} line(s), {m.width_pt:.1f}pt of {m.line_width_pt:.1f}pt{flag}")
+    elif args.action == "fit":
+        fit_bullet_widths(args.output_dir, args.tolerance)
+
+
+if __name__ == "__main__":
+    main()
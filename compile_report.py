@@ -0,0 +1,119 @@
+import os
+import re
+from dataclasses import dataclass, field, asdict
+from typing import Dict, Iterable, List, Optional
+
+# main.tex writes "CVLAYOUT:<label>:<page>:<\pagetotal>:<\pagegoal>" to the log via \cvmark
+LAYOUT_MARK_PATTERN = re.compile(r"^CVLAYOUT:(.+):(\d+):(-?[\d.]+)pt:(-?[\d.]+)pt")
+OUTPUT_PATTERN = re.compile(r"^Output written on .*\((\d+) pages?")
+NO_OUTPUT_PATTERN = re.compile(r"^No pages of output")
+OVERFULL_PATTERN = re.compile(r"^Overfull \\([hv])box \(([\d.]+)pt too (?:wide|high)\)(?:.*?\blines? (\d+))?")
+UNDERFULL_PATTERN = re.compile(r"^Underfull \\([hv])box \(badness (\d+)\)(?:.*?\blines? (\d+))?")
+WARNING_PATTERN = re.compile(r"^(?:LaTeX|Package \w+|Class \w+)(?: Font)? Warning: (.*)")
+ERROR_PATTERN = re.compile(r"^! (.*)")
+
+# \pagegoal is \maxdimen while a page is still empty
+EMPTY_PAGE_GOAL = 16000.0
+
+
+@dataclass
+class BoxWarning:
+    kind: str
+    amount: float
+    line: Optional[int] = None
+
+
+@dataclass
+class LayoutMark:
+    label: str
+    page: int
+    page_total: float
+    page_goal: float
+
+
+@dataclass
+class CompileReport:
+    success: bool
+    pages: Optional[int] = None
+    elapsed: float = 0.0
+    overfull_boxes: List[BoxWarning] = field(default_factory=list)
+    underfull_boxes: List[BoxWarning] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    errors: List[str] = field(default_factory=list)
+    marks: List[LayoutMark] = field(default_factory=list)
+
+    @property
+    def end_mark(self) -> Optional[LayoutMark]:
+        return next((mark for mark in reversed(self.marks) if mark.label == "end"), None)
+
+    @property
+    def page_goal(self) -> Optional[float]:
+        """Usable text height of a page in points."""
+        goals = [mark.page_goal for mark in self.marks if mark.page_goal < EMPTY_PAGE_GOAL]
+        return max(goals) if goals else None
+
+    @property
+    def last_page_fill(self) -> Optional[float]:
+        """Fraction of the last page's text height that is occupied, from 0.0 to 1.0."""
+        mark = self.end_mark
+        if mark is None:
+            return None
+        if mark.page_goal >= EMPTY_PAGE_GOAL or mark.page_goal <= 0:
+            return 0.0 if mark.page_total <= 0 else 1.0
+        return min(1.0, mark.page_total / mark.page_goal)
+
+    def to_dict(self) -> Dict:
+        report = asdict(self)
+        report["last_page_fill"] = self.last_page_fill
+        return report
+
+
+def parse_compile_log(lines: Iterable[str], success: bool = True, elapsed: float = 0.0) -> CompileReport:
+    """Build a CompileReport from pdflatex log lines in a single pass."""
+    report = CompileReport(success=success, elapsed=elapsed)
+    for line in lines:
+        line = line.rstrip("\n")
+        if line.startswith("CVLAYOUT:"):
+            match = LAYOUT_MARK_PATTERN.match(line)
+            if match:
+                label, page, total, goal = match.groups()
+                report.marks.append(LayoutMark(label, int(page), float(total), float(goal)))
+        elif line.startswith("Output written on"):
+            match = OUTPUT_PATTERN.match(line)
+            if match:
+                report.pages = int(match.group(1))
+        elif NO_OUTPUT_PATTERN.match(line):
+            report.pages = 0
+        elif line.startswith("Overfull"):
+            match = OVERFULL_PATTERN.match(line)
+            if match:
+                report.overfull_boxes.append(BoxWarning(match.group(1) + "box", float(match.group(2)),
+                                                        int(match.group(3)) if match.group(3) else None))
+        elif line.startswith("Underfull"):
+            match = UNDERFULL_PATTERN.match(line)
+            if match:
+                report.underfull_boxes.append(BoxWarning(match.group(1) + "box", float(match.group(2)),
+                                                         int(match.group(3)) if match.group(3) else None))
+        elif line.startswith("! "):
+            report.errors.append(ERROR_PATTERN.match(line).group(1))
+        elif "Warning:" in line:
+            match = WARNING_PATTERN.match(line)
+            if match:
+                report.warnings.append(match.group(1).strip())
+
+    # Without an output line (e.g. no PDF was written), fall back to the page the end-of-document mark landed on
+    end_mark = report.end_mark
+    if report.pages in (None, 0) and end_mark is not None:
+        report.pages = end_mark.page if end_mark.page_total > 0 else end_mark.page - 1
+    if report.errors:
+        report.success = False
+    return report
+
+
+def load_compile_report(output_dir: str, success: bool = True, elapsed: float = 0.0) -> Optional[CompileReport]:
+    """Parse the main.log left by the most recent compile in output_dir."""
+    log_path = os.path.join(output_dir, 'main.log')
+    if not os.path.exists(log_path):
+        return None
+    with open(log_path, 'r', encoding='latin-1') as file:
+        return parse_compile_log(file, success=success, elapsed=elapsed)
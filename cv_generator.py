@@ -1,25 +1,39 @@
 import os
 import re
+import json
+import functools
 import argparse
 from loguru import logger
-from utils import load_yaml, load_job_description, compile_latex, validate_latex_syntax, fix_latex_syntax, move_cv_to_output
-from job_description_processor import process_job_description
-from prompts.education_generator import generate_education_section
-from prompts.work_experience_generator import generate_work_experience_section
-from prompts.projects_generator import generate_projects_section
-from prompts.technical_skills_generator import generate_technical_skills_section
-from prompts.name_generator import generate_cv_name
-from utils import load_template, get_pdf_pages
-from cv_reducer import CVReducer
-import openai
+from utils import load_yaml, load_job_description, compile_latex, compile_latex_report, log_latex_issues, move_cv_to_output
+from utils import load_template, iterate_async, chat_completion, get_bullet_fit_mode, get_section_format, adjust_bullet_points_batch
+from bullet_fit import fit_bullet_widths
+from compile_report import load_compile_report
+from layout import measure_layout
+from typographic_fit import DEFAULT_TYPOGRAPHY, build_ladder, fit_typography, is_enabled as typographic_fit_enabled
+from relevance import slice_job_info, slice_profile
+from latex_lexer import scan_latex
+from section_renderer import render_section, save_section_data
+from section_optimizer import SectionOptimizer
+from metrics import get_registry
 import shutil
 import subprocess
 from dotenv import load_dotenv
 
 load_dotenv()
 
+# Sections that can absorb extra content when the CV comes up short of its page target
+EXPANDABLE_SECTIONS = ['work_experience', 'projects']
+MIN_EXPANSION_LINES = 3
+
 class CVGenerator:
-    def __init__(self, info, processed_job_info, output_dir, max_pages=1):
+    def __init__(self, info, processed_job_info, output_dir, max_pages=1, max_concurrency=None):
+        # Imported here so the compile and move actions don't load the generation and reduction stack
+        from prompts.education_generator import generate_education_section, generate_education_data
+        from prompts.work_experience_generator import generate_work_experience_section, generate_work_experience_data
+        from prompts.projects_generator import generate_projects_section, generate_projects_data
+        from prompts.technical_skills_generator import generate_technical_skills_section, generate_technical_skills_data
+        from cv_reducer import CVReducer
+
         self.info = info
         self.processed_job_info = processed_job_info
         self.job_description = str(processed_job_info)
@@ -31,60 +45,106 @@ class CVGenerator:
             'projects': ('cv_template/sections/projects/example_project.tex', generate_projects_section),
             'technical_skills': ('cv_template/sections/technical_skills.tex', generate_technical_skills_section)
         }
+        # In "json" mode sections are generated as data and rendered locally (see section_renderer.py)
+        self.section_format = get_section_format()
+        self.section_data_generators = {
+            'education': generate_education_data,
+            'work_experience': generate_work_experience_data,
+            'projects': generate_projects_data,
+            'technical_skills': generate_technical_skills_data,
+        }
         self.cv_reducer = CVReducer(
             output_dir, 
-            processed_job_info.get('processed_description', self.job_description)
+            processed_job_info.get('processed_description', self.job_description),
+            max_pages=max_pages
         )
         self.desired_pages = max_pages
+        # Margins, spacing and font size written into main.tex; tightened by fit_typography before content is cut
+        self.typography = DEFAULT_TYPOGRAPHY
+        # Sections are independent LLM round trips, so they can all be in flight at once
+        self.max_concurrency = max_concurrency or int(os.getenv("CV_MAX_CONCURRENCY", "4"))
+
+    def generate_sections(self, section_names=None):
+        for section in iterate_async(self.generate_sections_async(section_names)):
+            logger.debug(f"Section {section} completed")
+
+    async def generate_sections_async(self, section_names=None, on_token=None):
+        """
+        Generate sections concurrently, yielding each section name as soon as its .tex file is written.
+
+        At most `max_concurrency` sections are generated at the same time. If on_token is given, it is
+        called with (section, text) for each piece of a section's raw text as the model streams it.
+        """
+        import asyncio
+        if section_names is None:
+            section_names = list(self.sections.keys())
+
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async def generate(section):
+            async with semaphore:
+                section_on_token = functools.partial(on_token, section) if on_token else None
+                await asyncio.to_thread(self.generate_single_section, section, section_on_token)
+            return section
+
+        tasks = [asyncio.create_task(generate(section)) for section in section_names]
+        try:
+            for completed in asyncio.as_completed(tasks):
+                yield await completed
+        finally:
+            for task in tasks:
+                task.cancel()
 
-    def generate_sections(self):
-        for section, (template_path, generate_function) in self.sections.items():
-            template = load_template(template_path)
-            required_info = self.info.get(f"{section}_details", self.info)
-            latex_content = generate_function(required_info, self.processed_job_info, template)
-            latex_content = "\n".join(line for line in latex_content.splitlines() if line.strip())
-            
-            with open(f'{self.output_dir}/{section}.tex', 'w') as file:
-                file.write(latex_content)
-                logger.info(f"Content for {section} written to {self.output_dir}/{section}.tex")
-                
     def generate_cv_name(self):
+        from prompts.name_generator import generate_cv_name
         return generate_cv_name(self.job_description)
 
-    def check_existing_cv(self, cv_name):
-        cv_dir = 'CVs'
+    def check_existing_cv(self, cv_name, cv_dir='CVs', on_existing='ask'):
+        """
+        Decide the name to save a CV under when one with this name already exists in cv_dir.
+
+        on_existing is 'ask' (prompt on the terminal), 'suffix' (save as the next free _N name),
+        'overwrite' (reuse the name) or 'skip' (return None so nothing is generated).
+        """
+        os.makedirs(cv_dir, exist_ok=True)
         existing_cvs = [f for f in os.listdir(cv_dir) if f.startswith(cv_name) and f.endswith('.pdf')]
         
         if existing_cvs:
-            print(f"A CV with the name {cv_name} already exists.")
-            user_input = input("Do you want to regenerate this CV? (y/n): ").lower()
-            
-            if user_input == 'y':
+            logger.info(f"A CV with the name {cv_name} already exists.")
+            if on_existing == 'ask':
+                user_input = input("Do you want to regenerate this CV? (y/n): ").lower()
+                on_existing = 'suffix' if user_input == 'y' else 'skip'
+
+            if on_existing == 'suffix':
                 max_suffix = max([int(re.search(r'_(\d+)\.pdf$', cv).group(1)) for cv in existing_cvs if re.search(r'_(\d+)\.pdf$', cv)] or [0])
-                new_cv_name = f"{cv_name[:-4]}_{max_suffix + 1}"
+                new_cv_name = f"{cv_name}_{max_suffix + 1}"
                 return new_cv_name
-            else:
+            elif on_existing == 'skip':
                 return None
         
         return cv_name
 
-    def generate_cv(self):
+    def generate_cv(self, cv_dir='CVs', on_existing='ask'):
+        """Generate, fit and compile the CV, then move it into cv_dir. Returns the saved PDF path, or None."""
         cv_name = self.generate_cv_name()
-        cv_name = self.check_existing_cv(cv_name)
+        cv_name = self.check_existing_cv(cv_name, cv_dir, on_existing)
         
         if cv_name is None:
-            print("CV generation cancelled.")
-            return
+            logger.info("CV generation cancelled.")
+            return None
 
         for filename in os.listdir(self.output_dir):
             file_path = os.path.join(self.output_dir, filename)
-            os.remove(file_path)
+            if os.path.isfile(file_path):
+                os.remove(file_path)
 
         self.generate_sections()
         self.generate_main_tex()
         self.generate_resume_cls()
+        self.fit_bullet_widths()
         
-        num_pages = compile_latex(self.output_dir)
+        # Intermediate compiles only need page counts and layout; the PDF is written once, after the final review
+        num_pages = compile_latex(self.output_dir, draft=True)
         if num_pages is not None:
             if num_pages > self.max_pages:
                 logger.warning(f"Generated CV has {num_pages} pages, which exceeds the maximum of {self.max_pages}.")
@@ -98,52 +158,55 @@ class CVGenerator:
             if num_pages is not None:
                 logger.info(f"Final CV has {num_pages} page(s).")
                 
-                cv_dir = 'CVs'
                 os.makedirs(cv_dir, exist_ok=True)
-                pdf_file = next((f for f in os.listdir(self.output_dir) if f.endswith('.pdf')), None)
-                if pdf_file:
-                    new_pdf_name = f"{cv_name}.pdf"
-                    shutil.move(os.path.join(self.output_dir, pdf_file), os.path.join(cv_dir, new_pdf_name))
-                    logger.info(f"CV generated and saved as {new_pdf_name} in the CVs directory.")
+                pdf_path = os.path.join(self.output_dir, 'main.pdf')
+                if os.path.exists(pdf_path):
+                    new_pdf_path = os.path.join(cv_dir, f"{cv_name}.pdf")
+                    shutil.move(pdf_path, new_pdf_path)
+                    logger.info(f"CV generated and saved as {new_pdf_path}.")
+                    return new_pdf_path
                 else:
                     logger.error("PDF file not found, unable to move.")
             else:
                 logger.error("Failed to generate final CV after review.")
         else:
             logger.error("Failed to generate initial CV.")
+        return None
+
+    def fit_bullet_widths(self):
+        if get_bullet_fit_mode() == "width":
+            fit_bullet_widths(self.output_dir)
 
     def generate_specific_sections(self, section_names):
         for section in section_names:
-            if section in self.sections:
-                template_path, generate_function = self.sections[section]
-                template = load_template(template_path)
-                required_info = self.info.get(f"{section}_details", self.info)
-                latex_content = generate_function(required_info, self.processed_job_info, template)
-                latex_content = "\n".join(line for line in latex_content.splitlines() if line.strip())
-                
-                with open(f'{self.output_dir}/{section}.tex', 'w') as file:
-                    file.write(latex_content)
-                    logger.info(f"Content for {section} written to {self.output_dir}/{section}.tex")
-            else:
+            if section not in self.sections:
                 logger.warning(f"Section '{section}' not found in available sections.")
+        self.generate_sections([section for section in section_names if section in self.sections])
 
     def compile_specific_sections(self, section_names):
         self.generate_resume_cls()
         self.generate_main_tex(section_names)
         self.compile_and_check_pages()
 
-    def generate_main_tex(self, section_names=None):
+    def generate_main_tex(self, section_names=None, typography=None):
         if section_names is None:
             section_names = self.sections.keys()
+        typography = typography or self.typography
 
-        main_tex = r"""\documentclass{resume} % Use the custom resume.cls style
+        main_tex = typography.class_prelude() + r"""\documentclass{resume} % Use the custom resume.cls style
 \usepackage{amssymb}
 \usepackage{enumitem}
 \usepackage{multicol} % Added multicols package
-\usepackage{hyperref} % Allows me to make clickable links
-\usepackage[left=0.75in,top=0.35in,right=0.75in,bottom=0.35in]{geometry} % Document margins
 \newcommand{\tab}[1]{\hspace{.2667\textwidth}\rlap{#1}}
 \newcommand{\itab}[1]{\hspace{0em}\rlap{#1}}
+% Writes the current page and how much of it is filled to the log (parsed by compile_report.py).
+% The penalty makes TeX move the finished paragraphs onto the page first; at 0 it still allows the break a
+% section boundary would allow anyway, so the marks leave the layout unchanged
+\newcommand{\cvmark}[1]{\par\penalty0\typeout{CVLAYOUT:#1:\thepage:\the\pagetotal:\the\pagegoal}}
+\csname endofdump\endcsname % Everything above is precompiled into a cached format (see latex_format.py)
+\usepackage{hyperref} % Allows me to make clickable links
+\usepackage[""" + typography.geometry() + r"""]{geometry} % Document margins
+""" + typography.preamble() + r"""
 
 % Personal Information
 \name{""" + f"{self.info['personal_information']['name']} {self.info['personal_information']['surname']}" + r"""}
@@ -159,8 +222,10 @@ class CVGenerator:
 """
         for section in section_names:
             if section in self.sections:
+                main_tex += f"\\cvmark{{section:{section}}}\n"
                 main_tex += f"\\input{{{section}}}\n"
 
+        main_tex += r"\cvmark{end}" + "\n"
         main_tex += r"\end{document}"
 
         with open(f'{self.output_dir}/main.tex', 'w') as file:
@@ -187,56 +252,118 @@ class CVGenerator:
             logger.error(f"Failed to copy {source_path} to {destination_path}.")
 
     def compile_and_check_pages(self):
-        current_dir = os.getcwd()
-        os.chdir(self.output_dir)
+        """Probe the page count with a draft compile, adjust the content if needed, then write the PDF once."""
+        pages = compile_latex(self.output_dir, draft=True)
         
-        try:
-            pages = compile_latex(self.output_dir)
-            
-            if pages is None:
-                logger.error("Failed to compile CV.")
-                return
-            
-            if pages != self.desired_pages:
-                logger.warning(f"CV has {pages} pages. Adjusting content to fit {self.desired_pages} page(s).")
-                self.adjust_content()
-        finally:
-            os.chdir(current_dir)
+        if pages is None:
+            logger.error("Failed to compile CV.")
+            return
+        
+        if pages != self.desired_pages:
+            logger.warning(f"CV has {pages} pages. Adjusting content to fit {self.desired_pages} page(s).")
+            self.adjust_content()
+        compile_latex(self.output_dir)
 
-    def generate_single_section(self, section):
+    def generate_single_section(self, section, on_token=None):
         template_path, generate_function = self.sections[section]
-        template = load_template(template_path)
-        required_info = self.info.get(f"{section}_details", self.info)
-        latex_content = generate_function(required_info, self.processed_job_info, template)
+        required_info = slice_profile(self.info, section, self.processed_job_info)
+        job_info = slice_job_info(self.processed_job_info, section)
+        if self.section_format == "json":
+            data = self.section_data_generators[section](required_info, job_info, on_token=on_token)
+            if get_bullet_fit_mode() == "length":
+                self.fit_bullet_lengths(data)
+            save_section_data(self.output_dir, section, data)
+            latex_content = render_section(section, data)
+        else:
+            template = load_template(template_path)
+            latex_content = generate_function(required_info, job_info, template, on_token=on_token)
         latex_content = "\n".join(line for line in latex_content.splitlines() if line.strip())
         
         with open(f'{self.output_dir}/{section}.tex', 'w') as file:
             file.write(latex_content)
             logger.info(f"Content for {section} written to {self.output_dir}/{section}.tex")
 
+    def fit_bullet_lengths(self, data):
+        """Bring every bullet of the section data within the character range, in as few requests as possible."""
+        entries = [entry for entry in data.get('entries') or [] if isinstance(entry, dict) and entry.get('bullets')]
+        bullets = [str(bullet) for entry in entries for bullet in entry['bullets']]
+        adjusted = iter(adjust_bullet_points_batch(bullets))
+        for entry in entries:
+            entry['bullets'] = [next(adjusted) for _ in entry['bullets']]
+
+    def get_page_count(self):
+        """Page count of the most recent compile, read from its log rather than by parsing the PDF."""
+        report = load_compile_report(self.output_dir)
+        return report.pages if report else None
+
+    def measure_layout(self):
+        """Overflow and free space of the most recent compile, or None if it was not instrumented."""
+        report = load_compile_report(self.output_dir)
+        return measure_layout(report, self.desired_pages) if report else None
+
     def adjust_content(self):
-        current_pages = get_pdf_pages(os.path.join(self.output_dir, 'main.pdf'))
-        
-        if current_pages == self.desired_pages:
-            logger.info(f"CV is already {self.desired_pages} page(s). No adjustment needed.")
+        layout = self.measure_layout()
+        if layout is None:
+            logger.warning("No layout measurements available. Skipping content adjustment.")
             return
 
-        if current_pages < self.desired_pages:
-            self.expand_content()
-        else:
+        if not layout.fits:
             self.reduce_content()
+        elif layout.pages < self.desired_pages and layout.remaining_lines() >= MIN_EXPANSION_LINES:
+            self.expand_content(layout)
+        else:
+            logger.info(f"CV is already {self.desired_pages} page(s). No adjustment needed.")
 
-    def expand_content(self):
-        logger.info("Expanding CV content...")
-        for section in self.sections:
-            self.expand_section(section)
-            if get_pdf_pages(os.path.join(self.output_dir, 'main.pdf')) == self.desired_pages:
-                break
+    def expand_content(self, layout):
+        """Fill the measured free space in one pass, then trim once if the expansion overshoots."""
+        logger.info(f"Expanding CV content by about {layout.remaining_lines()} lines...")
+        expandable = [section for section in EXPANDABLE_SECTIONS if section in layout.section_heights]
+        if not expandable:
+            logger.warning("No expandable sections in the CV.")
+            return
+
+        lines_per_section = max(1, layout.remaining_lines() // len(expandable))
+        for section in expandable:
+            self.expand_section(section, lines_per_section)
+
+        self.generate_main_tex()
+        if compile_latex(self.output_dir, draft=True) is None:
+            return
+        layout = self.measure_layout()
+        if layout is not None and not layout.fits:
+            self.reduce_content()
 
     def reduce_content(self):
+        if self.fit_typography():
+            return
         logger.info("Reducing CV content...")
         self.cv_reducer.reduce_content()
 
+    def fit_typography(self):
+        """
+        Try to bring an overflowing CV within the page limit by tightening margins, spacing and font size,
+        probing with draft compiles. On success main.tex keeps the least intrusive setting that fits;
+        otherwise it is restored. Either way its layout is left in main.log for whatever runs next.
+        """
+        if not typographic_fit_enabled():
+            return False
+        layout = self.measure_layout()
+        if layout is None or layout.fits:
+            return False
+        ladder = build_ladder()
+        ladder = ladder[ladder.index(self.typography):] if self.typography in ladder else [self.typography]
+
+        typography = fit_typography(
+            lambda setting: self.generate_main_tex(typography=setting),
+            lambda: compile_latex_report(self.output_dir, stage="fit", draft=True),
+            self.desired_pages, layout.overflow_lines(), ladder)
+        if typography is not None:
+            self.typography = typography
+        self.generate_main_tex()
+        # Restoring the main.tex compiled before the fit is a render cache hit
+        compile_latex(self.output_dir, draft=True)
+        return typography is not None
+
     def identify_least_relevant_section(self):
         return self.cv_reducer.identify_least_relevant_section(self.sections.keys())
 
@@ -262,24 +389,38 @@ class CVGenerator:
             self.generate_main_tex()
             self.compile_and_check_pages()
 
-    def expand_section(self, section):
-        if section in self.sections:
-            template_path, generate_function = self.sections[section]
-            template = load_template(template_path)
-            required_info = self.info.get(f"{section}_details", self.info)
-            
-            # Generate additional content for the section
-            additional_content = generate_function(required_info, self.processed_job_info, template, expand=True)
-            
-            # Append the additional content to the existing section file
-            with open(f'{self.output_dir}/{section}.tex', 'a') as file:
-                file.write(additional_content)
-            
-            logger.info(f"Expanded content for {section}")
-            
-            # Recompile the CV
-            self.generate_main_tex()
-            self.compile_and_check_pages()
+    def expand_section(self, section, target_lines):
+        import yaml
+        if section not in self.sections:
+            return
+        file_path = f'{self.output_dir}/{section}.tex'
+        with open(file_path, 'r') as file:
+            content = file.read()
+        required_info = self.info.get(f"{section}_details", self.info)
+
+        prompt = f"""
+        Expand this CV section by approximately {target_lines} lines of rendered content, using only facts from the candidate information.
+        Prefer details that are relevant to the job requirements. Keep the LaTeX structure unchanged and return only the LaTeX for the section.
+
+        Candidate Information:
+        {yaml.dump(required_info)}
+
+        Job Requirements:
+        {yaml.dump(self.processed_job_info)}
+
+        Current CV Section ({section}):
+        {content}
+        """
+
+        try:
+            expanded_content = chat_completion("You are an expert in CV writing and LaTeX.", prompt, stage="expand").strip().strip('`')
+            if expanded_content.startswith('latex'):
+                expanded_content = expanded_content[len('latex'):]
+            with open(file_path, 'w') as file:
+                file.write(expanded_content.strip())
+            logger.info(f"Expanded content for {section} by about {target_lines} lines")
+        except Exception as e:
+            logger.error(f"Error expanding content for {section}: {str(e)}")
 
     def final_review(self):
         logger.info("Starting final review process...")
@@ -288,8 +429,8 @@ class CVGenerator:
         self.check_latex_syntax()
         
         # Ensure one-page requirement
-        current_pages = get_pdf_pages(os.path.join(self.output_dir, 'main.pdf'))
-        if current_pages > self.max_pages:
+        current_pages = self.get_page_count()
+        if current_pages and current_pages > self.max_pages:
             logger.warning(f"CV is still {current_pages} pages. Attempting final reduction...")
             self.reduce_content()
         
@@ -306,11 +447,12 @@ class CVGenerator:
             file_path = f'{self.output_dir}/{section}.tex'
             with open(file_path, 'r') as file:
                 content = file.read()
-            if not validate_latex_syntax(content):
-                logger.warning(f"LaTeX syntax issues detected in {section}. Attempting to fix...")
-                fixed_content = fix_latex_syntax(content)
+            result = scan_latex(content)
+            if not result.valid:
+                logger.warning(f"LaTeX syntax issues detected in {section}. Fixing {len(result.issues)} issues...")
+                log_latex_issues(result.issues)
                 with open(file_path, 'w') as file:
-                    file.write(fixed_content)
+                    file.write(result.fixed)
 
     def check_completeness(self):
         required_sections = set(self.sections.keys())
@@ -330,50 +472,9 @@ class CVGenerator:
                 self.generate_single_section(section)
 
     def optimize_content(self):
-        prompt = f"""
-        Review and optimize the following CV content. Ensure it's well-structured, concise, and highlights the most relevant information for this job description:
-
-        Job Description:
-        {self.job_description}
-
-        CV Content:
-        """
-        
-        for section in self.sections:
-            file_path = f'{self.output_dir}/{section}.tex'
-            with open(file_path, 'r') as file:
-                prompt += f"\n\n{section.upper()}:\n{file.read()}"
-        
-        prompt += "\n\nProvide optimized content for each section, maintaining LaTeX format."
-
-        response = openai.ChatCompletion.create(
-            model=os.getenv("OPENAI_MODEL"),
-            messages=[
-                {"role": "system", "content": "You are an expert in CV optimization and LaTeX."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        optimized_content = response.choices[0].message['content'].strip()
-        
-        # Parse and save optimized content
-        current_section = None
-        section_content = ""
-        for line in optimized_content.split('\n'):
-            if line.strip().upper() in [section.upper() for section in self.sections]:
-                if current_section:
-                    with open(f'{self.output_dir}/{current_section.lower()}.tex', 'w') as file:
-                        file.write(section_content.strip())
-                current_section = line.strip()
-                section_content = ""
-            else:
-                section_content += line + "\n"
-        
-        if current_section:
-            with open(f'{self.output_dir}/{current_section.lower()}.tex', 'w') as file:
-                file.write(section_content.strip())
-
-        logger.info("CV content optimized.")
+        """Improve each section changed since its last optimization with targeted edits (see section_optimizer.py)."""
+        SectionOptimizer(self.output_dir, self.job_description, list(self.sections),
+                         use_data=self.section_format == "json", max_workers=self.max_concurrency).optimize()
 
     def compile_cv(self):
         logger.info("Compiling CV...")
@@ -386,7 +487,8 @@ class CVGenerator:
         except Exception as e:
             logger.error(f"Failed to compile CV: {str(e)}")
 
-def generate_cv(info_path, job_description_path, output_dir, max_pages):
+def generate_cv(info_path, job_description_path, output_dir, max_pages, on_existing='ask'):
+    from job_description_processor import process_job_description
     logger.info("Starting CV generation process...")
 
     info = load_yaml(info_path)
@@ -403,10 +505,14 @@ def generate_cv(info_path, job_description_path, output_dir, max_pages):
 
     os.makedirs(output_dir, exist_ok=True)
 
-    build_cv(info, processed_job_info, output_dir, max_pages)
+    build_cv(info, processed_job_info, output_dir, max_pages, on_existing=on_existing)
 
     logger.info("CV generation process completed.")
 
+def build_cv(info, processed_job_info, output_dir, max_pages, cv_dir='CVs', on_existing='ask'):
+    cv_generator = CVGenerator(info, processed_job_info, output_dir, max_pages=max_pages)
+    return cv_generator.generate_cv(cv_dir=cv_dir, on_existing=on_existing)
+
 def compile_cv(output_dir):
     logger.info("Compiling CV...")
     num_pages = compile_latex(output_dir)
@@ -427,11 +533,15 @@ def main():
     parser.add_argument("--output", default="output", help="Output directory for generated files")
     parser.add_argument("--pages", type=int, default=1, choices=[1, 2], help="Maximum number of pages for the CV")
     parser.add_argument("--cv-name", help="Name of the CV file (required for 'move' action)")
+    parser.add_argument("--on-existing", default="ask", choices=["ask", "suffix", "overwrite", "skip"],
+                        help="What to do when a CV with the same name already exists")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Print the time, tokens and cost of each stage as JSON when done")
     
     args = parser.parse_args()
 
     if args.action == "generate":
-        generate_cv(args.info, args.job, args.output, args.pages)
+        generate_cv(args.info, args.job, args.output, args.pages, args.on_existing)
     elif args.action == "compile":
         compile_cv(args.output)
     elif args.action == "move":
@@ -440,5 +550,12 @@ def main():
             return
         move_cv(args.output, args.cv_name)
 
+    # Where the run's time, tokens and money went, per stage
+    summary = json.dumps(get_registry().summary(), indent=2)
+    if args.metrics:
+        print(summary)
+    else:
+        logger.debug(f"Stage metrics: {summary}")
+
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -1,45 +1,122 @@
 import os
+import re
 import shutil
-import openai
-import yaml
 import traceback
-from utils import get_pdf_pages, compile_latex  # Add get_pdf_pages import
+from concurrent.futures import ThreadPoolExecutor
+from utils import compile_latex_report, chat_completion, hash_text
+from compile_report import load_compile_report
+from layout import measure_layout, BASELINE_SKIP_PT
+from knapsack_reducer import KnapsackReducer
+from relevance import get_scorer, score_documents, break_ties
+from metrics import bind_context
 from dotenv import load_dotenv
 from loguru import logger
 
 load_dotenv()
 
 class CVReducer:
-    def __init__(self, output_dir, job_description, max_pages=1):
+    def __init__(self, output_dir, job_description, max_pages=1, strategy=None, scorer=None):
         self.output_dir = output_dir
         self.max_pages = max_pages
         self.sections_to_reduce = ['technical_skills', 'projects', 'work_experience']
-        openai.api_key = os.getenv('OPENAI_API_KEY')
         self.job_description = job_description
+        # "knapsack" selects items to keep from one scoring pass; "rewrite" asks the model to shorten whole sections
+        self.strategy = strategy or os.getenv("CV_REDUCER_STRATEGY", "knapsack")
+        # "lexical" scores with BM25 locally, "llm" asks the model, "hybrid" asks the model only to break lexical ties
+        self.scorer = get_scorer(scorer)
+        self.relevance_scores = {}
+
+    def compile_pdf(self):
+        return compile_latex_report(self.output_dir)
+
+    def compile_probe(self):
+        """Lay the CV out for its page count without writing a PDF; the caller compiles the final PDF once."""
+        return compile_latex_report(self.output_dir, stage="probe", draft=True)
+
+    def get_pdf_pages(self):
+        report = load_compile_report(self.output_dir)
+        return report.pages if report else None
+
+    def reduce_content(self, max_iterations=3):
+        if self.strategy == "knapsack":
+            report = KnapsackReducer(self.output_dir, self.job_description, self.max_pages,
+                                     self.sections_to_reduce, scorer=self.scorer).reduce_content()
+            layout = measure_layout(report, self.max_pages) if report else None
+            if layout is None or layout.fits:
+                return
+            logger.warning("Item selection did not fit the CV, falling back to section rewrites.")
+        self.rewrite_content(max_iterations)
+
+    def rewrite_content(self, max_iterations=3):
+        """
+        Cut exactly the overflow reported by the last compile, then recompile to confirm.
 
-    def reduce_content(self):
-        pdf_path = os.path.join(self.output_dir, 'main.pdf')
-        current_pages = get_pdf_pages(pdf_path)
-        while current_pages and current_pages > self.max_pages:
-            section_to_reduce = self.identify_section_to_reduce()
-            if not section_to_reduce:
+        Each iteration measures how many lines spill past max_pages and asks the least relevant
+        sections to drop that many lines, so a CV usually fits after one or two compiles.
+        """
+        report = load_compile_report(self.output_dir)
+        for _ in range(max_iterations):
+            layout = measure_layout(report, self.max_pages) if report else None
+            if layout is None or layout.fits:
+                break
+            cuts = self.plan_cuts(layout)
+            if not cuts:
                 logger.warning("Unable to identify a section to reduce. Stopping reduction process.")
                 break
-            if self.reduce_section(section_to_reduce):
-                compile_latex(self.output_dir)
-                new_pages = get_pdf_pages(pdf_path)
-                if new_pages and new_pages < current_pages:
-                    current_pages = new_pages
-                    logger.info(f"Reduced {section_to_reduce}. Current page count: {current_pages}")
-                    if current_pages <= self.max_pages:
-                        break
-                else:
-                    logger.warning(f"Reducing {section_to_reduce} did not decrease page count.")
+            logger.info(f"CV overflows by {layout.overflow_pt:.1f}pt; cutting {cuts}")
+            if not [section for section, lines in cuts.items() if self.reduce_section(section, lines)]:
+                break
+            report = self.compile_probe()
+
+        current_pages = report.pages if report else None
+        if current_pages and current_pages > self.max_pages:
+            logger.warning(f"Could not reduce CV to {self.max_pages} page(s). Current page count: {current_pages}")
+
+    def plan_cuts(self, layout):
+        """Spread the overflow, in lines plus one of slack, over sections from least to most relevant."""
+        lines_to_cut = layout.overflow_lines() + 1
+        cuts = {}
+        for section in self.rank_sections():
+            section_lines = int(layout.section_heights.get(section, 0) / BASELINE_SKIP_PT)
+            # Never ask for more than half a section in one go; the rest goes to the next section
+            lines = min(lines_to_cut, max(1, section_lines // 2))
+            cuts[section] = lines
+            lines_to_cut -= lines
+            if lines_to_cut <= 0:
+                break
+        return cuts
+
+    def rank_sections(self):
+        """Reducible sections ordered from least to most relevant."""
+        contents = {section: self.get_section_content(section) for section in self.sections_to_reduce}
+        if self.scorer == "llm":
+            section_scores = dict(zip(contents, self.get_relevance_scores(contents, list(contents))))
+        else:
+            sections = list(contents)
+            scores = score_documents([contents[section] for section in sections], self.job_description)
+            if self.scorer == "hybrid":
+                scores = break_ties(scores, lambda tied: dict(zip(tied, self.get_relevance_scores(
+                    contents, [sections[index] for index in tied]))))
+            section_scores = dict(zip(sections, scores))
+            logger.debug(f"Lexical section relevance: {section_scores}")
+        return sorted(section_scores, key=section_scores.get)
+
+    def get_relevance_scores(self, contents, sections):
+        """LLM relevance scores of the given sections, requested concurrently."""
+        with ThreadPoolExecutor(max_workers=max(1, len(sections))) as executor:
+            score = bind_context(lambda section: self.get_relevance_score(section, contents[section]))
+            return list(executor.map(score, sections))
+
+    def get_relevance_score(self, section, content):
+        """Relevance score memoized by section content and job description, so unchanged sections are never rescored."""
+        key = (section, hash_text(content), hash_text(self.job_description))
+        if key not in self.relevance_scores:
+            self.relevance_scores[key] = self.calculate_relevance_score(section, content)
+        return self.relevance_scores[key]
 
     def identify_section_to_reduce(self):
-        section_scores = {section: self.calculate_relevance_score(section, self.get_section_content(section))
-                          for section in self.sections_to_reduce}
-        return min(section_scores, key=section_scores.get) if section_scores else None
+        ranking = self.rank_sections()
+        return ranking[0] if ranking else None
 
     def get_section_content(self, section):
         section_file = os.path.join(self.output_dir, f"{section}.tex")
@@ -65,25 +142,24 @@ class CVReducer:
         """
 
         try:
-            response = openai.ChatCompletion.create(
-                model=os.getenv("OPENAI_MODEL"),
-                messages=[
-                    {"role": "system", "content": "You are an expert in CV evaluation and job matching."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            score = int(response.choices[0].message['content'].strip())
+            output = chat_completion("You are an expert in CV evaluation and job matching.", prompt, stage="relevance")
+            match = re.search(r"\d+(?:\.\d+)?", output)
+            if match is None:
+                raise ValueError(f"no score in {output.strip()[:40]!r}")
+            score = min(10.0, max(1.0, float(match.group())))
             logger.info(f"Relevance score for {section}: {score}")
             return score
         except Exception as e:
             logger.error(f"Error calculating relevance score for {section}: {str(e)}")
             return 5  # Default to middle score if there's an error
 
-    def reduce_section(self, section):
+    def reduce_section(self, section, target_lines=None):
         content = self.get_section_content(section)
+        target = f"Remove approximately {target_lines} lines of rendered content, no more." if target_lines else ""
         prompt = f"""
         Reduce the content of this CV section while maintaining the most relevant information for the job description.
-        Remove the least important items or details.
+        Remove the least important items or details. {target}
+        Keep the LaTeX structure unchanged and return only the LaTeX for the section.
 
         Job Description:
         {self.job_description}
@@ -95,14 +171,7 @@ class CVReducer:
         """
 
         try:
-            response = openai.ChatCompletion.create(
-                model=os.getenv("OPENAI_MODEL"),
-                messages=[
-                    {"role": "system", "content": "You are an expert in CV optimization and job matching."},
-                    {"role": "user", "content": prompt}
-                ]
-            )
-            reduced_content = response.choices[0].message['content'].strip()
+            reduced_content = chat_completion("You are an expert in CV optimization and job matching.", prompt, stage="reduce").strip()
             
             with open(os.path.join(self.output_dir, f"{section}.tex"), 'w') as file:
                 file.write(reduced_content)
@@ -114,6 +183,7 @@ class CVReducer:
             return False
 
 def main():
+    import yaml
     logger.add("cv_reducer.log", rotation="500 MB")
 
     with open('info.yml', 'r') as file:
@@ -1,28 +1,64 @@
 import hashlib
 import re
 import json
-from typing import Dict, List
-import openai
+import threading
+import unicodedata
+from typing import Dict, List, Optional
 import sys
 from loguru import logger
 import os
 from dotenv import load_dotenv
+from utils import chat_completion, parse_json_response
 
 load_dotenv()
 
 logger.add("job_description_processor.log", rotation="10 MB")
 
-def preprocess_job_description(job_description: str) -> Dict[str, List[str]]:
+TITLE_PATTERNS = [
+    r"Job Title:\s*(.*)",
+    r"Position:\s*(.*)",
+    r"Role:\s*(.*)",
+]
+# Words as relevance.TOKEN_PATTERN reads them (C++, C#, Node.js stay whole), but in any script
+FINGERPRINT_TOKEN_PATTERN = re.compile(r"\w[\w+#./-]*[\w+#]|\w")
+
+def normalize_job_description(job_description: str) -> str:
+    """
+    Fold a job description to a canonical form for cache lookups.
+
+    Case, Unicode compatibility forms, punctuation, bullet characters and whitespace are all folded,
+    so reposts that differ only in formatting normalize to the same text. Punctuation inside a word
+    is kept, since "C++" and "C#" are different skills.
+    """
+    normalized = unicodedata.normalize("NFKC", job_description).casefold()
+    return " ".join(FINGERPRINT_TOKEN_PATTERN.findall(normalized))
+
+def get_job_fingerprint(job_description: str) -> str:
+    return hashlib.sha256(normalize_job_description(job_description).encode()).hexdigest()
+
+def match_job_title(job_description: str) -> Optional[str]:
+    """Find an explicitly labelled job title without calling the model."""
+    for pattern in TITLE_PATTERNS:
+        match = re.search(pattern, job_description, re.IGNORECASE)
+        if match and match.group(1).strip():
+            logger.info(f"Job title extracted using pattern: {pattern}")
+            return match.group(1).strip()
+    return None
+
+def preprocess_job_description(job_description: str, include_title: bool = False) -> Dict[str, List[str]]:
     """
     Preprocess the job description to extract key information.
     
     Args:
     job_description (str): The raw job description text.
+    include_title (bool): Also ask for the job title in the same request.
     
     Returns:
     Dict[str, List[str]]: A dictionary containing structured information from the job description.
     """
     logger.info("Starting job description preprocessing")
+    title_instruction = "7. Job Title (a single string; if none is stated, write the title that best reflects the role)\n" if include_title else ""
+    title_field = '\n        "job_title": "title",' if include_title else ""
     # Use GPT-4 to extract and structure the information
     prompt = f"""
     Analyze the following job description and extract the following information:
@@ -32,52 +68,34 @@ def preprocess_job_description(job_description: str) -> Dict[str, List[str]]:
     4. Company Mission
     5. Industry-Specific Terminology
     6. Additional Relevant Information
-
+    {title_instruction}
     For each category, provide a list of items. Keep each item concise and relevant.
 
     Job Description:
     {job_description}
 
     Please format your response as a JSON object with the following structure:
-    {{
+    {{{title_field}
         "essential_requirements": ["item1", "item2", ...],
         "preferred_skills": ["item1", "item2", ...],
         "key_responsibilities": ["item1", "item2", ...],
         "company_mission": ["item1", "item2", ...],
+        "industry_terminology": ["item1", "item2", ...],
         "additional_info": ["item1", "item2", ...]
     }}
     """
 
     logger.info("Sending request to OpenAI API")
-    response = openai.ChatCompletion.create(
-        model=os.getenv("OPENAI_MODEL"),
-        messages=[
-            {"role": "system", "content": "You are an expert in analyzing job descriptions and extracting key information."},
-            {"role": "user", "content": prompt}
-        ]
-    )
-    output = response.choices[0].message['content']
-    # Extract JSON from the output string
+    output = chat_completion("You are an expert in analyzing job descriptions and extracting key information.", prompt, stage="job_description")
     try:
-        # Remove the "```json" prefix and "```" suffix if present
-        json_str = re.sub(r'^```json\s*|\s*```$', '', output.strip(), flags=re.MULTILINE)
-        extracted_info = json.loads(json_str)
+        extracted_info = parse_json_response(output)
         logger.info("Successfully parsed JSON from OpenAI API response")
     except json.JSONDecodeError as e:
         logger.error(f"Failed to parse JSON from OpenAI API response: {e}")
-        # Attempt to extract JSON-like structure from the string
-        match = re.search(r'\{.*\}', output, re.DOTALL)
-        if match:
-            json_str = match.group(0)
-            try:
-                extracted_info = json.loads(json_str)
-                logger.info("Successfully extracted and parsed JSON from API response")
-            except json.JSONDecodeError:
-                logger.error("Failed to parse extracted JSON-like structure")
-                extracted_info = {}
-        else:
-            logger.error("No JSON-like structure found in the API response")
-            extracted_info = {}
+        extracted_info = {}
+    if not isinstance(extracted_info, dict):
+        logger.error("No JSON object found in the API response")
+        extracted_info = {}
 
     logger.info("Job description preprocessing completed")
     return extracted_info
@@ -93,18 +111,9 @@ def get_job_title(job_description: str) -> str:
     str: The extracted job title.
     """
     logger.info("Starting job title extraction")
-    # Look for common patterns in job titles
-    patterns = [
-        r"Job Title:\s*(.*)",
-        r"Position:\s*(.*)",
-        r"Role:\s*(.*)",
-    ]
-
-    for pattern in patterns:
-        match = re.search(pattern, job_description, re.IGNORECASE)
-        if match:
-            logger.info(f"Job title extracted using pattern: {pattern}")
-            return match.group(1).strip()
+    job_title = match_job_title(job_description)
+    if job_title:
+        return job_title
 
     logger.info("No pattern match found, using OpenAI API for job title extraction")
     # If no pattern matches, use GPT-4 to extract the job title
@@ -116,16 +125,10 @@ def get_job_title(job_description: str) -> str:
     {job_description}
     """
 
-    response = openai.ChatCompletion.create(
-        model=os.getenv("OPENAI_MODEL"),
-        messages=[
-            {"role": "system", "content": "You are an expert in analyzing job descriptions and extracting key information."},
-            {"role": "user", "content": prompt}
-        ]
-    )
+    job_title = chat_completion("You are an expert in analyzing job descriptions and extracting key information.", prompt, stage="job_description")
 
     logger.info("Job title extraction completed")
-    return response.choices[0].message['content'].strip()
+    return job_title.strip()
 
 def process_job_description(job_description: str) -> Dict[str, any]:
     """
@@ -139,30 +142,37 @@ def process_job_description(job_description: str) -> Dict[str, any]:
     """
     logger.info("Starting job description processing")
     
-    # Create a hash of the job description
-    job_hash = hashlib.md5(job_description.encode()).hexdigest()
+    # Key the cache on the normalized text so reposts that differ only in formatting hit it
+    job_hash = get_job_fingerprint(job_description)
     
     # Create the job_descriptions folder if it doesn't exist
     os.makedirs("job_descriptions", exist_ok=True)
     
     # Define the file path
     file_path = f"job_descriptions/{job_hash}.json"
+    # Entries written before fingerprinting are keyed by the MD5 of the raw text
+    legacy_file_path = f"job_descriptions/{hashlib.md5(job_description.encode()).hexdigest()}.json"
     
     # Check if the file already exists
-    if os.path.exists(file_path):
-        logger.info(f"Processed job description found at {file_path}")
-        with open(file_path, 'r') as file:
-            return json.load(file)
+    for existing_path in (file_path, legacy_file_path):
+        if os.path.exists(existing_path):
+            logger.info(f"Processed job description found at {existing_path}")
+            with open(existing_path, 'r') as file:
+                return json.load(file)
     
-    # If not, process the job description
-    processed_info = preprocess_job_description(job_description)
-    job_title = get_job_title(job_description)
+    # If not, process the job description; the title comes from the same request unless it is labelled
+    job_title = match_job_title(job_description)
+    processed_info = preprocess_job_description(job_description, include_title=job_title is None)
+    if job_title is None:
+        job_title = str(processed_info.get('job_title') or "").strip() or get_job_title(job_description)
     
     processed_info['job_title'] = job_title
     
-    # Save the processed information
-    with open(file_path, 'w') as file:
+    # Save the processed information; write and rename so concurrent runs never read a partial file
+    staged_path = f"{file_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(staged_path, 'w') as file:
         json.dump(processed_info, file, indent=2)
+    os.replace(staged_path, file_path)
     
     logger.info(f"Job description processing completed and saved to {file_path}")
     return processed_info
@@ -0,0 +1,219 @@
+import os
+import json
+import time
+import uuid
+import shutil
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Optional
+from loguru import logger
+from cv_generator import CVGenerator
+from job_description_processor import process_job_description
+from metrics import job_context, get_registry
+from utils import iterate_async, load_yaml
+
+DEFAULT_JOB_ROOT = os.path.join("output", "jobs")
+# Finished jobs and their workspaces are kept this long so the PDF can still be viewed and downloaded
+JOB_RETENTION_SECONDS = 3600
+# Seconds between SSE keep-alive comments while a job is quiet
+HEARTBEAT_SECONDS = 15
+
+
+class JobQueueFull(Exception):
+    pass
+
+
+class JobCancelled(Exception):
+    pass
+
+
+@dataclass
+class Job:
+    id: str
+    job_description: str
+    workspace: str
+    status: str = "queued"
+    error: Optional[str] = None
+    created: float = field(default_factory=time.time)
+    finished: Optional[float] = None
+    cancel_requested: bool = False
+    # Status events, kept so a reconnecting client can replay them; streamed section text is not kept here
+    events: List[str] = field(default_factory=list)
+    # Text streamed so far for each section still being generated, and a counter bumped on every piece
+    partial_text: Dict[str, str] = field(default_factory=dict)
+    token_version: int = 0
+    condition: threading.Condition = field(default_factory=threading.Condition, repr=False)
+
+    @property
+    def done(self) -> bool:
+        return self.status in ("complete", "failed", "cancelled")
+
+    @property
+    def pdf_path(self) -> str:
+        return os.path.join(self.workspace, "main.pdf")
+
+    def emit(self, event: str) -> None:
+        with self.condition:
+            self.events.append(event)
+            self.condition.notify_all()
+
+    def emit_token(self, section: str, text: str) -> None:
+        """Stream a piece of a section's text to live listeners; it is never added to the replayed events."""
+        with self.condition:
+            self.partial_text[section] = self.partial_text.get(section, "") + text
+            self.token_version += 1
+            self.condition.notify_all()
+
+    def clear_tokens(self, section: str) -> None:
+        """Forget a section's streamed text once the section itself has landed."""
+        with self.condition:
+            self.partial_text.pop(section, None)
+
+    def progress(self, event: str) -> None:
+        """Report a pipeline step, stopping the job here if it has been cancelled."""
+        if self.cancel_requested:
+            raise JobCancelled(self.id)
+        self.emit(event)
+
+    def finish(self, status: str, error: Optional[str] = None) -> None:
+        with self.condition:
+            self.status, self.error, self.finished = status, error, time.time()
+            self.condition.notify_all()
+
+    def stream(self, start: int = 0, heartbeat: float = HEARTBEAT_SECONDS) -> Iterator[Optional[str]]:
+        """
+        Yield the job's events from index start until it finishes, or None when nothing happened for heartbeat seconds.
+
+        Streamed section text is interleaved as token:<section>:<json text> events, which are not counted in
+        the event index: a stream first gets one piece with each unfinished section's text so far, then only
+        what is new, so a reconnecting client never replays the text piece by piece.
+        """
+        index, seen_version, sent = start, None, {}
+        while True:
+            with self.condition:
+                woken = self.condition.wait_for(
+                    lambda: index < len(self.events) or self.done or self.token_version != seen_version, timeout=heartbeat)
+                pending = self.events[index:]
+                done = self.done
+                tokens = []
+                if self.token_version != seen_version:
+                    seen_version = self.token_version
+                    for section, text in self.partial_text.items():
+                        if len(text) > sent.get(section, 0):
+                            # JSON keeps newlines out of the SSE data line
+                            tokens.append(f"token:{section}:{json.dumps(text[sent.get(section, 0):])}")
+                            sent[section] = len(text)
+            index += len(pending)
+            if tokens or pending:
+                yield from tokens
+                yield from pending
+            elif not woken:
+                yield None
+            if done and index >= len(self.events):
+                return
+
+
+class JobManager:
+    """
+    Run CV generations on a bounded pool of workers, each in its own workspace directory.
+
+    Jobs are identified by a random id. Progress is recorded as a list of events per job, so any number
+    of SSE clients can follow a job, and reconnect to it, without the work being tied to a request thread.
+    """
+
+    def __init__(self, info_path='info.yml', root=DEFAULT_JOB_ROOT, max_workers=None, max_pending=None, max_pages=1):
+        self.info_path = info_path
+        self.root = root
+        self.max_pages = max_pages
+        self.max_workers = max_workers or int(os.getenv("CV_JOB_WORKERS", "2"))
+        self.max_pending = max_pending or int(os.getenv("CV_JOB_MAX_PENDING", "16"))
+        self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cv-job")
+        self.jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def submit(self, job_description: str) -> Job:
+        self.prune()
+        with self._lock:
+            active = sum(1 for job in self.jobs.values() if not job.done)
+            if active >= self.max_workers + self.max_pending:
+                raise JobQueueFull(f"{active} CV jobs are already queued or running")
+            job_id = uuid.uuid4().hex
+            job = Job(job_id, job_description, os.path.join(self.root, job_id))
+            self.jobs[job_id] = job
+        os.makedirs(job.workspace, exist_ok=True)
+        logger.info(f"Queued CV job {job_id}")
+        self.executor.submit(self.run, job)
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def run(self, job: Job) -> None:
+        job.status = "running"
+        with job_context(job.id):
+            self.run_pipeline(job)
+        logger.info(f"CV job {job.id} metrics: {json.dumps(get_registry().summary(job.id)['total'])}")
+
+    def run_pipeline(self, job: Job) -> None:
+        try:
+            self.generate(job)
+            job.emit("complete")
+            job.finish("complete")
+            logger.info(f"CV job {job.id} completed")
+        except JobCancelled:
+            logger.info(f"CV job {job.id} cancelled")
+            job.finish("cancelled")
+        except Exception as e:
+            logger.exception(f"CV job {job.id} failed: {str(e)}")
+            job.emit(f"error:{str(e)}")
+            job.finish("failed", str(e))
+
+    def generate(self, job: Job) -> None:
+        job.progress("Analyzing job description")
+        processed_job_info = process_job_description(job.job_description)
+        cv_generator = CVGenerator(load_yaml(self.info_path), processed_job_info, job.workspace, max_pages=self.max_pages)
+
+        cv_generator.generate_resume_cls()
+        completed_sections = []
+        # Sections are generated concurrently; each one is reported and previewed as soon as it lands
+        # Raw section text is forwarded as the model writes it
+        for section in iterate_async(cv_generator.generate_sections_async(on_token=job.emit_token)):
+            job.clear_tokens(section)
+            completed_sections.append(section)
+            cv_generator.generate_main_tex([s for s in cv_generator.sections if s in completed_sections])
+            cv_generator.compile_cv()
+            job.progress(f"section:{section}")
+
+        job.progress("Fitting bullet points to the page")
+        cv_generator.fit_bullet_widths()
+
+        job.progress("Optimizing CV content")
+        cv_generator.optimize_content()
+
+        job.progress("Compiling final LaTeX document")
+        cv_generator.compile_cv()
+
+    def cancel(self, job_id: str) -> bool:
+        """Ask a job to stop at its next progress event; returns False if there is no such unfinished job."""
+        job = self.get(job_id)
+        if job is None or job.done:
+            return False
+        job.cancel_requested = True
+        return True
+
+    def prune(self, max_age: float = JOB_RETENTION_SECONDS) -> None:
+        """Forget finished jobs older than max_age and delete their workspaces."""
+        now = time.time()
+        with self._lock:
+            expired = [job for job in self.jobs.values() if job.done and now - job.finished > max_age]
+            for job in expired:
+                del self.jobs[job.id]
+        for job in expired:
+            shutil.rmtree(job.workspace, ignore_errors=True)
+            logger.info(f"Removed workspace of CV job {job.id}")
+
+    def shutdown(self, wait: bool = True) -> None:
+        self.executor.shutdown(wait=wait)
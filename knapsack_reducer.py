@@ -0,0 +1,301 @@
+import os
+import re
+import json
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from bullet_fit import measure_bullets
+from compile_report import CompileReport, load_compile_report
+from layout import measure_layout, LayoutReport, BASELINE_SKIP_PT
+from relevance import get_scorer, score_documents, break_ties
+from utils import chat_completion, compile_latex_report, parse_json_response
+
+MIN_BULLETS_PER_ENTRY = 2
+MIN_SKILLS = 6
+# Height of a section's title and rule, in lines, which no item removal can recover
+SECTION_TITLE_LINES = 2
+# An entry's header is worth this many of its bullets, so headers are dropped only with weak bullets
+HEADER_VALUE_WEIGHT = 1.5
+DEFAULT_SCORE = 5.0
+VSPACE_PATTERN = re.compile(r"\\vspace\{(-?[\d.]+)\s*(cm|pt|mm|in|ex|em)\}")
+UNIT_TO_PT = {"pt": 1.0, "cm": 28.45, "mm": 2.845, "in": 72.27, "ex": 4.7, "em": 10.95}
+
+
+@dataclass
+class Item:
+    line_index: int
+    text: str
+    score: float = DEFAULT_SCORE
+    lines: int = 1
+
+
+@dataclass
+class Entry:
+    """A project, job or skills list: the source lines it owns and the bullets inside it."""
+    section: str
+    header: str
+    line_indices: List[int] = field(default_factory=list)
+    items: List[Item] = field(default_factory=list)
+    header_lines: float = 1.0
+    score: float = DEFAULT_SCORE
+    columns: int = 1
+
+    @property
+    def droppable(self) -> bool:
+        return bool(self.header)
+
+    @property
+    def min_items(self) -> int:
+        minimum = MIN_BULLETS_PER_ENTRY if self.droppable else MIN_SKILLS
+        return min(minimum, len(self.items))
+
+
+def count_header_lines(header_lines: List[str]) -> float:
+    """Rendered lines of an entry header: one plus each explicit line break, plus any vertical spacing."""
+    rendered = 1.0
+    for line in header_lines:
+        rendered += len(re.findall(r"\\\\(?!\w)", line))
+        for amount, unit in VSPACE_PATTERN.findall(line):
+            rendered += float(amount) * UNIT_TO_PT[unit] / BASELINE_SKIP_PT
+    return max(1.0, rendered)
+
+
+def parse_section(section: str, content: str) -> List[Entry]:
+    """
+    Split a generated section into entries.
+
+    An entry starts at a `{\\bf ...}` header (together with any \\vspace separator just before it) and
+    owns every line up to its closing \\end{itemize}. A section without headers, such as technical
+    skills, becomes a single entry whose items are its \\item lines.
+    """
+    lines = content.split('\n')
+    entries: List[Entry] = []
+    current: Optional[Entry] = None
+    header_source: List[str] = []
+    separator: List[int] = []
+    in_itemize = False
+
+    for index, line in enumerate(lines):
+        stripped = line.strip()
+        if stripped.startswith(r"{\bf"):
+            if current is not None:
+                current.header_lines = count_header_lines(header_source)
+            current = Entry(section, stripped, separator + [index])
+            header_source = [lines[i] for i in separator] + [stripped]
+            entries.append(current)
+            separator, in_itemize = [], False
+        elif stripped.startswith(r"\begin{itemize}"):
+            in_itemize = True
+            if current is not None:
+                current.line_indices.append(index)
+        elif stripped.startswith(r"\end{itemize}"):
+            in_itemize = False
+            if current is not None:
+                current.line_indices.append(index)
+                current.header_lines = count_header_lines(header_source)
+                current = None
+        elif in_itemize and stripped.startswith(r"\item"):
+            text = re.sub(r"^\\item(\[[^\]]*\])?\s*", "", stripped)
+            if current is None:
+                current = Entry(section, "", [])
+                entries.append(current)
+            current.items.append(Item(index, text))
+            current.line_indices.append(index)
+        elif stripped.startswith(r"\vspace") and current is None:
+            separator.append(index)
+        elif stripped.startswith((r"\begin{rSection}", r"\end{rSection}", r"\begin{multicols}", r"\end{multicols}")):
+            separator = []
+        elif current is not None and stripped:
+            current.line_indices.append(index)
+            if not in_itemize:
+                header_source.append(stripped)
+                current.header += " " + stripped
+
+    if current is not None and current.header:
+        current.header_lines = count_header_lines(header_source)
+    if r"\begin{multicols}{2}" in content:
+        for entry in entries:
+            if not entry.droppable:
+                entry.columns = 2
+    return entries
+
+
+class KnapsackReducer:
+    """
+    Fit the CV to max_pages by choosing which items to keep rather than asking for rewrites.
+
+    Every item is scored once against the job description and measured once; a multiple-choice
+    knapsack then picks, per entry, how many of its best bullets to keep (or whether to drop it) so
+    that the highest total relevance fits the page, and the sections are rewritten by deleting lines.
+    """
+
+    def __init__(self, output_dir, job_description, max_pages=1, sections=None, scorer=None):
+        self.output_dir = output_dir
+        self.job_description = job_description
+        self.max_pages = max_pages
+        self.sections = sections or ['technical_skills', 'projects', 'work_experience']
+        self.scorer = get_scorer(scorer)
+
+    def reduce_content(self) -> Optional[CompileReport]:
+        report = load_compile_report(self.output_dir)
+        layout = measure_layout(report, self.max_pages) if report else None
+        if layout is None or layout.fits:
+            return report
+
+        entries = self.parse_sections()
+        if not entries:
+            logger.warning("No reducible items found in the CV sections.")
+            return report
+
+        self.score_items(entries)
+        line_height = self.measure_items(entries, layout)
+        current_height = sum(self.entry_height(entry, len(entry.items), line_height) for entry in entries)
+        # Leave half a line of slack for measurement error
+        capacity = current_height - layout.overflow_pt - BASELINE_SKIP_PT / 2
+        kept = self.solve(entries, capacity, line_height)
+        if kept is None:
+            logger.warning("Even the smallest CV does not fit the page limit.")
+            return report
+
+        self.apply(entries, kept)
+        logger.info(f"Cut at least {current_height - capacity:.1f}pt of items; compiling the reduced CV")
+        # Only the layout is needed here; the PDF is written by the caller's final compile
+        return compile_latex_report(self.output_dir, stage="probe", draft=True)
+
+    def parse_sections(self) -> List[Entry]:
+        entries = []
+        for section in self.sections:
+            section_path = os.path.join(self.output_dir, f"{section}.tex")
+            if os.path.exists(section_path):
+                with open(section_path, 'r') as file:
+                    entries.extend(parse_section(section, file.read()))
+        return entries
+
+    def score_items(self, entries: List[Entry]) -> None:
+        """Score every header and bullet against the job description, locally unless the LLM scorer is selected."""
+        targets: List[Tuple[object, str]] = []
+        for entry in entries:
+            if entry.droppable:
+                targets.append((entry, entry.header))
+            targets.extend((item, item.text) for item in entry.items)
+        texts = [text for _, text in targets]
+
+        if self.scorer == "llm":
+            scores = self.request_scores(texts, range(len(texts)))
+            scores = [scores.get(index, DEFAULT_SCORE) for index in range(len(texts))]
+        else:
+            scores = score_documents(texts, self.job_description)
+            if self.scorer == "hybrid":
+                scores = break_ties(scores, lambda tied: self.request_scores(texts, tied))
+
+        for (target, _), score in zip(targets, scores):
+            target.score = score
+
+    def request_scores(self, texts: List[str], indices) -> Dict[int, float]:
+        """Ask the model to rate the texts at the given indices in a single request."""
+        prompt = (
+            "Rate how relevant each CV item is to the job description on a scale of 0-10.\n"
+            'Return only a JSON object mapping each id to its score, e.g. {"0": 7, "1": 3}.\n\n'
+            f"Job Description:\n{self.job_description}\n\nItems:\n"
+            + json.dumps([{"id": index, "text": texts[index]} for index in indices], indent=2)
+        )
+        try:
+            scores = parse_json_response(chat_completion(
+                "You are an expert in CV evaluation and job matching.", prompt, stage="relevance"
+            ))
+        except Exception as e:
+            logger.error(f"Error scoring CV items: {str(e)}")
+            scores = {}
+        if not isinstance(scores, dict):
+            scores = {}
+
+        parsed = {}
+        for index in indices:
+            try:
+                parsed[index] = float(scores.get(str(index), DEFAULT_SCORE))
+            except (TypeError, ValueError):
+                parsed[index] = DEFAULT_SCORE
+        return parsed
+
+    def measure_items(self, entries: List[Entry], layout: LayoutReport) -> float:
+        """
+        Record how many typeset lines each bullet takes, and return the height of one such line.
+
+        Line height is calibrated against the measured section heights, so it reflects the tight
+        item spacing the templates use rather than the nominal \\baselineskip.
+        """
+        measured = {(m.section, m.line_index): m.lines for m in measure_bullets(self.output_dir)}
+        for entry in entries:
+            for item in entry.items:
+                item.lines = measured.get((entry.section, item.line_index), 1)
+
+        units = sum(self.entry_height(entry, len(entry.items), 1.0) for entry in entries)
+        measured_height = sum(layout.section_heights.get(section, 0.0) for section in {e.section for e in entries})
+        content_height = measured_height - SECTION_TITLE_LINES * BASELINE_SKIP_PT * len({e.section for e in entries})
+        if units <= 0 or content_height <= 0:
+            return BASELINE_SKIP_PT
+        return content_height / units
+
+    @staticmethod
+    def ranked_items(entry: Entry) -> List[Item]:
+        return sorted(entry.items, key=lambda item: item.score, reverse=True)
+
+    def entry_height(self, entry: Entry, item_count: int, line_height: float) -> float:
+        if item_count == 0 and entry.droppable:
+            return 0.0
+        item_lines = sum(item.lines for item in self.ranked_items(entry)[:item_count])
+        if entry.columns > 1:
+            item_lines = math.ceil(item_lines / entry.columns)
+        header = entry.header_lines if entry.droppable else 0.0
+        return (header + item_lines) * line_height
+
+    def entry_value(self, entry: Entry, item_count: int) -> float:
+        if item_count == 0 and entry.droppable:
+            return 0.0
+        header = HEADER_VALUE_WEIGHT * entry.score if entry.droppable else 0.0
+        return header + sum(item.score for item in self.ranked_items(entry)[:item_count])
+
+    def solve(self, entries: List[Entry], capacity: float, line_height: float) -> Optional[List[int]]:
+        """
+        Multiple-choice knapsack over entries: each entry keeps its k best items (k >= its minimum) or is
+        dropped entirely. Heights are rounded up to whole points. Returns the chosen k per entry, or None
+        if no combination fits.
+        """
+        best: Dict[int, Tuple[float, List[int]]] = {0: (0.0, [])}
+        limit = int(math.floor(capacity))
+        for entry in entries:
+            options = list(range(entry.min_items, len(entry.items) + 1))
+            if entry.droppable:
+                options = sorted(set(options) | {0})
+            next_best: Dict[int, Tuple[float, List[int]]] = {}
+            for weight, (value, choices) in best.items():
+                for count in options:
+                    new_weight = weight + math.ceil(self.entry_height(entry, count, line_height))
+                    if new_weight > limit:
+                        continue
+                    new_value = value + self.entry_value(entry, count)
+                    if new_weight not in next_best or new_value > next_best[new_weight][0]:
+                        next_best[new_weight] = (new_value, choices + [count])
+            if not next_best:
+                return None
+            best = next_best
+        return max(best.values(), key=lambda option: option[0])[1]
+
+    def apply(self, entries: List[Entry], kept_counts: List[int]) -> None:
+        removed: Dict[str, set] = {}
+        for entry, count in zip(entries, kept_counts):
+            if count == 0 and entry.droppable:
+                removed.setdefault(entry.section, set()).update(entry.line_indices)
+                logger.info(f"Dropping {entry.section} entry: {entry.header[:60]}")
+                continue
+            for item in self.ranked_items(entry)[count:]:
+                removed.setdefault(entry.section, set()).add(item.line_index)
+                logger.debug(f"Dropping {entry.section} item: {item.text[:60]}")
+
+        for section, line_indices in removed.items():
+            section_path = os.path.join(self.output_dir, f"{section}.tex")
+            with open(section_path, 'r') as file:
+                lines = file.read().split('\n')
+            with open(section_path, 'w') as file:
+                file.write('\n'.join(line for index, line in enumerate(lines) if index not in line_indices))
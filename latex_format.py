@@ -0,0 +1,133 @@
+import os
+import shutil
+import hashlib
+import tempfile
+import threading
+import subprocess
+from typing import List, Optional
+from loguru import logger
+
+# Everything in main.tex before this marker is static and gets dumped into a precompiled format.
+# Outside a format build \csname endofdump\endcsname expands to \relax, so plain compiles are unaffected.
+DUMP_MARKER = r"\csname endofdump\endcsname"
+FORMAT_PREFIX = "cvfmt-"
+DEFAULT_FORMAT_DIR = os.path.join(".cache", "latex", "formats")
+
+_failed_keys = set()
+_build_lock = threading.Lock()
+_pdflatex_version: Optional[str] = None
+
+
+def is_enabled() -> bool:
+    return os.getenv("LATEX_PRECOMPILED_FORMAT", "1").lower() not in ("0", "false", "no")
+
+
+def get_pdflatex_version() -> str:
+    global _pdflatex_version
+    if _pdflatex_version is None:
+        try:
+            result = subprocess.run(['pdflatex', '--version'], capture_output=True, text=True)
+            _pdflatex_version = result.stdout.splitlines()[0] if result.stdout else ""
+        except OSError:
+            _pdflatex_version = ""
+    return _pdflatex_version
+
+
+def split_preamble(main_tex: str) -> Optional[str]:
+    """Return the static part of the preamble, or None if main.tex has no dump marker."""
+    if DUMP_MARKER not in main_tex:
+        return None
+    return main_tex.split(DUMP_MARKER, 1)[0]
+
+
+def ensure_dump_marker(main_tex: str) -> str:
+    """Insert the dump marker into a main.tex written before formats existed (ahead of hyperref)."""
+    if DUMP_MARKER in main_tex:
+        return main_tex
+    anchor = r"\usepackage{hyperref}"
+    if anchor not in main_tex:
+        anchor = r"\begin{document}"
+    return main_tex.replace(anchor, DUMP_MARKER + "\n" + anchor, 1)
+
+
+def get_format_key(static_preamble: str, class_source: str) -> str:
+    digest = hashlib.sha256()
+    for part in (get_pdflatex_version(), static_preamble, class_source):
+        digest.update(part.encode('utf-8'))
+        digest.update(b"\0")
+    return digest.hexdigest()[:16]
+
+
+def build_format(output_dir: str, key: str, format_dir: str) -> Optional[str]:
+    """Dump the static preamble of output_dir/main.tex into format_dir/<prefix><key>.fmt using mylatexformat."""
+    format_name = f"{FORMAT_PREFIX}{key}"
+    format_path = os.path.join(format_dir, f"{format_name}.fmt")
+    os.makedirs(format_dir, exist_ok=True)
+
+    with tempfile.TemporaryDirectory() as build_dir:
+        for filename in ('main.tex', 'resume.cls'):
+            shutil.copy(os.path.join(output_dir, filename), build_dir)
+        logger.info(f"Building precompiled LaTeX format {format_name}")
+        try:
+            result = subprocess.run(
+                ['pdflatex', '-ini', '-interaction=nonstopmode', f'-jobname={format_name}',
+                 '&pdflatex', 'mylatexformat.ltx', 'main.tex'],
+                cwd=build_dir, capture_output=True, text=True
+            )
+        except OSError as e:
+            logger.warning(f"Could not run pdflatex to build format {format_name}: {str(e)}")
+            return None
+        built_path = os.path.join(build_dir, f"{format_name}.fmt")
+        if result.returncode != 0 or not os.path.exists(built_path):
+            logger.warning(f"Could not build LaTeX format {format_name}, compiling without it")
+            return None
+        # Build in a scratch directory and rename into place so concurrent builds never see a partial file
+        staged_path = f"{format_path}.{os.getpid()}.tmp"
+        shutil.move(built_path, staged_path)
+        os.replace(staged_path, format_path)
+
+    return format_path
+
+
+def get_format_args(output_dir: str, format_dir: str = DEFAULT_FORMAT_DIR) -> List[str]:
+    """
+    Return the pdflatex arguments that load a precompiled format for output_dir/main.tex.
+
+    The format is keyed by the static preamble, resume.cls and the pdflatex version, so any change to
+    them builds a new one. Returns no arguments (a cold compile) when formats are disabled or unavailable.
+    """
+    if not is_enabled():
+        return []
+    try:
+        with open(os.path.join(output_dir, 'main.tex'), 'r') as file:
+            static_preamble = split_preamble(file.read())
+        with open(os.path.join(output_dir, 'resume.cls'), 'r') as file:
+            class_source = file.read()
+    except FileNotFoundError:
+        return []
+    if static_preamble is None:
+        return []
+
+    key = get_format_key(static_preamble, class_source)
+    format_name = f"{FORMAT_PREFIX}{key}"
+    cached_path = os.path.join(format_dir, f"{format_name}.fmt")
+
+    with _build_lock:
+        if key in _failed_keys:
+            return []
+        if not os.path.exists(cached_path) and build_format(output_dir, key, format_dir) is None:
+            _failed_keys.add(key)
+            return []
+
+    # pdflatex looks for formats in the working directory first, so expose the cached one there
+    local_path = os.path.join(output_dir, f"{format_name}.fmt")
+    if not os.path.exists(local_path):
+        for filename in os.listdir(output_dir):
+            if filename.startswith(FORMAT_PREFIX) and filename.endswith('.fmt'):
+                os.remove(os.path.join(output_dir, filename))
+        try:
+            os.link(cached_path, local_path)
+        except OSError:
+            shutil.copy(cached_path, local_path)
+
+    return [f'-fmt={format_name}']
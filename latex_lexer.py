@@ -0,0 +1,233 @@
+import re
+import argparse
+from dataclasses import dataclass, field
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+from loguru import logger
+
+# Environments a generated section must not contain; only their \begin/\end markers are removed
+FORBIDDEN_ENVIRONMENTS = frozenset({'document'})
+# Environments in which & separates columns instead of being a literal ampersand
+ALIGNMENT_ENVIRONMENTS = frozenset({
+    'tabular', 'tabular*', 'tabularx', 'longtable', 'array', 'align', 'align*', 'matrix', 'pmatrix', 'bmatrix',
+})
+# Environments whose body is math, where _ ^ and & are markup
+MATH_ENVIRONMENTS = frozenset({
+    'math', 'displaymath', 'equation', 'equation*', 'align', 'align*', 'alignat', 'alignat*', 'flalign', 'flalign*',
+    'gather', 'gather*', 'multline', 'multline*', 'eqnarray', 'eqnarray*',
+})
+# Math opening delimiters and the delimiter that closes each
+MATH_DELIMITERS = {'$': '$', '$$': '$$', '\\(': '\\)', '\\[': '\\]'}
+# Text characters that must be escaped outside math, and their escaped form
+ESCAPES = {'#': r'\#', '&': r'\&', '%': r'\%', '_': r'\_', '^': r'\^{}'}
+# Every character plain text needs escaped to typeset as itself; < and > print as other glyphs in OT1
+PLAIN_TEXT_ESCAPES = {
+    **ESCAPES, '\\': r'\textbackslash{}', '{': r'\{', '}': r'\}', '$': r'\$', '~': r'\textasciitilde{}',
+    '<': r'\textless{}', '>': r'\textgreater{}',
+}
+PLAIN_TEXT_SPECIALS = re.compile('|'.join(re.escape(character) for character in PLAIN_TEXT_ESCAPES))
+
+TOKEN_PATTERN = re.compile(r"""
+    (?P<text>(?:[^\\%{}$#&_^]+|\\(?!begin\b|end\b|url\b|href\b|verb(?![A-Za-z])|[()\[\]]|(?:textbf|textit|emph|section|subsection)[ \t]+[^\s{\\])(?:[A-Za-z]+\*?|[^A-Za-z]))+)
+  | (?P<open>\{)
+  | (?P<close>\})
+  | (?P<math>\$\$?|\\[()\[\]])
+  | (?P<verb>\\verb\*?(?P<verb_delimiter>[^A-Za-z\s*])[^\n]*?(?P=verb_delimiter))
+  | (?P<begin>\\begin(?:[ \t]*\{(?P<begin_name>[^{}]*)\}|[ \t]+(?P<begin_bare>[A-Za-z*]+)))
+  | (?P<end>\\end(?:[ \t]*\{(?P<end_name>[^{}]*)\}|[ \t]+(?P<end_bare>[A-Za-z*]+)))
+  | (?P<url>\\(?:url|href)[ \t]*\{[^{}]*\})
+  | (?P<bare_argument>\\(?P<bare_command>textbf|textit|emph|section|subsection)[ \t]+(?P<bare_word>[^\s{}\\%$#&_^]+))
+  | (?P<percent>(?<=\d)%)
+  | (?P<comment>%[^\n]*)
+  | (?P<special>[#&_^])
+  | (?P<command>\\(?:[A-Za-z]+\*?|.)?)
+""", re.VERBOSE | re.DOTALL)
+
+
+class Token(NamedTuple):
+    kind: str
+    text: str
+    position: int
+    # Environment name of begin/end tokens, or the command and word of a bare_argument token
+    name: Optional[str] = None
+    argument: Optional[str] = None
+
+
+@dataclass
+class LatexIssue:
+    kind: str
+    position: int
+    message: str
+
+
+@dataclass
+class LatexScan:
+    fixed: str
+    issues: List[LatexIssue] = field(default_factory=list)
+
+    @property
+    def valid(self) -> bool:
+        return not self.issues
+
+
+def escape_latex(text: str) -> str:
+    """Plain text as LaTeX that typesets it literally. Unlike scan_latex, nothing in it is read as markup."""
+    return PLAIN_TEXT_SPECIALS.sub(lambda match: PLAIN_TEXT_ESCAPES[match.group()], text)
+
+
+def tokenize(content: str) -> Iterator[Token]:
+    """
+    Split LaTeX into tokens in one left-to-right pass; every character belongs to exactly one token.
+
+    Text, including commands that do not open or close anything (\\item, \\bf, \\%), comes out as runs
+    so the scanner only sees the tokens that change its state.
+    """
+    for match in TOKEN_PATTERN.finditer(content):
+        # Named groups nested in an alternative close before it, so lastgroup is the alternative itself
+        kind = match.lastgroup
+        if kind in ('begin', 'end'):
+            name = match.group(f"{kind}_name")
+            yield Token(kind, match.group(), match.start(), name if name is not None else match.group(f"{kind}_bare"),
+                        'bare' if name is None else None)
+        elif kind == 'bare_argument':
+            yield Token(kind, match.group(), match.start(), match.group('bare_command'), match.group('bare_word'))
+        else:
+            yield Token(kind, match.group(), match.start())
+
+
+def scan_latex(content: str, forbidden_environments: Iterable[str] = FORBIDDEN_ENVIRONMENTS) -> LatexScan:
+    """
+    Validate and repair LaTeX in a single pass over its tokens.
+
+    Checks that braces and environments nest, that special characters in text are escaped and that no
+    forbidden environment is used, and records a fix for each problem as it goes: stray closing braces and
+    \\end commands are dropped, environments and groups left open are closed where their enclosing
+    environment ends (or at the end), unescaped specials are escaped, bare arguments get braces and an
+    unterminated $ is escaped (an unterminated \\( or \\[ is closed at the end). Specials inside math
+    ($...$, \\(...\\), \\[...\\] and environments such as equation or align), URLs and \\verb are left
+    alone, as are braces inside URLs and \\verb.
+
+    Content without problems is returned as is; otherwise the fixes are spliced between the untouched
+    stretches of the original.
+    """
+    forbidden_environments = frozenset(forbidden_environments)
+    issues: List[LatexIssue] = []
+    # Replacements of content[start:end], found in order except for an unterminated $ patched at the end;
+    # insertions come before a replacement at the same offset
+    edits: List[tuple] = []
+    # Open groups (None) and environments (their name), innermost last, with where they were opened
+    stack: List[tuple] = []
+    math_delimiter, math_position = None, None
+
+    def close_frame(position: int) -> None:
+        name, opened_at = stack.pop()
+        if name is None:
+            issues.append(LatexIssue('unclosed_brace', opened_at, "Unclosed brace"))
+            edits.append((position, position, '}'))
+        else:
+            issues.append(LatexIssue('unclosed_environment', opened_at, f"Unclosed {name} environment"))
+            edits.append((position, position, f"\\end{{{name}}}"))
+
+    for match in TOKEN_PATTERN.finditer(content):
+        kind = match.lastgroup
+        if kind == 'text':
+            continue
+        start = match.start()
+        if kind == 'open':
+            stack.append((None, start))
+        elif kind == 'close':
+            if stack and stack[-1][0] is None:
+                stack.pop()
+            else:
+                where = f" inside {stack[-1][0]} environment" if stack else ""
+                issues.append(LatexIssue('unmatched_brace', start, f"Unmatched closing brace{where}"))
+                edits.append((start, match.end(), ''))
+        elif kind == 'math':
+            delimiter = match.group()
+            if math_delimiter is None:
+                # A stray \) or \] passes through like any other command
+                if delimiter in MATH_DELIMITERS:
+                    math_delimiter, math_position = delimiter, start
+            elif delimiter == MATH_DELIMITERS[math_delimiter]:
+                math_delimiter = None
+            elif math_delimiter == '$' and delimiter == '$$':
+                # "$a$$b$": one inline formula closing and the next opening
+                math_position = start + 1
+        elif kind in ('special', 'percent'):
+            character = match.group()
+            in_math = math_delimiter is not None or any(name in MATH_ENVIRONMENTS for name, _ in stack)
+            if not in_math and not (character == '&' and any(name in ALIGNMENT_ENVIRONMENTS for name, _ in stack)):
+                issues.append(LatexIssue('unescaped_special', start, f"Unescaped {character}"))
+                edits.append((start, match.end(), ESCAPES[character]))
+        elif kind in ('begin', 'end'):
+            name = match.group(f"{kind}_name")
+            bare = name is None
+            if bare:
+                name = match.group(f"{kind}_bare")
+            if name in forbidden_environments:
+                issues.append(LatexIssue('forbidden_environment', start, f"Forbidden {name} environment"))
+                edits.append((start, match.end(), ''))
+                continue
+            if kind == 'begin':
+                stack.append((name, start))
+            else:
+                depth = next((index for index in range(len(stack) - 1, -1, -1) if stack[index][0] == name), None)
+                if depth is None:
+                    issues.append(LatexIssue('unmatched_environment', start, f"\\end{{{name}}} without \\begin"))
+                    edits.append((start, match.end(), ''))
+                    continue
+                while len(stack) > depth + 1:
+                    close_frame(start)
+                stack.pop()
+            if bare:
+                issues.append(LatexIssue('missing_braces', start, f"\\{kind} {name} without braces"))
+                edits.append((start, match.end(), f"\\{kind}{{{name}}}"))
+        elif kind == 'bare_argument':
+            command = match.group('bare_command')
+            issues.append(LatexIssue('missing_braces', start, f"\\{command} without braces"))
+            edits.append((start, match.end(), f"\\{command}{{{match.group('bare_word')}}}"))
+        elif kind == 'command' and match.group() == '\\':
+            issues.append(LatexIssue('dangling_backslash', start, "Backslash at end of content"))
+            edits.append((start, match.end(), ''))
+        # Comments, URLs, \verb and any other command pass through unchanged
+
+    if math_delimiter is not None:
+        issues.append(LatexIssue('unclosed_math', math_position, f"Unclosed {math_delimiter}"))
+        if math_delimiter.startswith('$'):
+            edits.append((math_position, math_position + len(math_delimiter), '\\$' * len(math_delimiter)))
+        else:
+            edits.append((len(content), len(content), MATH_DELIMITERS[math_delimiter]))
+    while stack:
+        close_frame(len(content))
+    if not edits:
+        return LatexScan(content, issues)
+
+    edits.sort(key=lambda edit: edit[0])
+    output, position = [], 0
+    for start, end, replacement in edits:
+        output.append(content[position:start])
+        output.append(replacement)
+        position = max(position, end)
+    output.append(content[position:])
+    return LatexScan(''.join(output), issues)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check and repair the LaTeX of a CV section")
+    parser.add_argument("path", help="Path to a .tex file")
+    parser.add_argument("--fix", action="store_true", help="Write the repaired content back to the file")
+    args = parser.parse_args()
+
+    with open(args.path, 'r') as file:
+        result = scan_latex(file.read())
+    for issue in result.issues:
+        logger.warning(f"{args.path} at {issue.position}: {issue.message}")
+    if result.valid:
+        logger.success(f"{args.path}: no LaTeX issues found")
+    elif args.fix:
+        with open(args.path, 'w') as file:
+            file.write(result.fixed)
+        logger.success(f"Fixed {len(result.issues)} issues in {args.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,69 @@
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+from compile_report import CompileReport, LayoutMark, EMPTY_PAGE_GOAL
+
+# \baselineskip of the 11pt article class that resume.cls loads
+BASELINE_SKIP_PT = 13.6
+
+
+@dataclass
+class LayoutReport:
+    """
+    Vertical space accounting for one compile, in TeX points.
+
+    Section heights are measured between the \\cvmark hooks that generate_main_tex places before each
+    \\input. A section that straddles a page break is also charged for the space left unused at the
+    bottom of the earlier page, which is what removing it would actually recover.
+    """
+    pages: int
+    max_pages: int
+    page_goal: float
+    last_page_total: float
+    section_heights: Dict[str, float] = field(default_factory=dict)
+
+    @property
+    def overflow_pt(self) -> float:
+        """Height of the content that does not fit within max_pages."""
+        if self.pages <= self.max_pages:
+            return 0.0
+        return (self.pages - self.max_pages - 1) * self.page_goal + self.last_page_total
+
+    @property
+    def remaining_pt(self) -> float:
+        """Unused height left within max_pages."""
+        if self.pages > self.max_pages:
+            return 0.0
+        return (self.max_pages - self.pages) * self.page_goal + max(0.0, self.page_goal - self.last_page_total)
+
+    @property
+    def fits(self) -> bool:
+        return self.pages <= self.max_pages
+
+    def overflow_lines(self) -> int:
+        return math.ceil(self.overflow_pt / BASELINE_SKIP_PT)
+
+    def remaining_lines(self) -> int:
+        return math.floor(self.remaining_pt / BASELINE_SKIP_PT)
+
+
+def to_position(mark: LayoutMark, page_goal: float) -> float:
+    total = 0.0 if mark.page_goal >= EMPTY_PAGE_GOAL else mark.page_total
+    return (mark.page - 1) * page_goal + total
+
+
+def measure_layout(report: CompileReport, max_pages: int) -> Optional[LayoutReport]:
+    """Turn the \\cvmark hooks in a compile report into a LayoutReport, or None if main.tex was not instrumented."""
+    end_mark = report.end_mark
+    page_goal = report.page_goal
+    if end_mark is None or page_goal is None or not report.pages:
+        return None
+
+    section_marks: List[LayoutMark] = [mark for mark in report.marks if mark.label.startswith("section:")]
+    section_heights = {}
+    for mark, next_mark in zip(section_marks, section_marks[1:] + [end_mark]):
+        height = to_position(next_mark, page_goal) - to_position(mark, page_goal)
+        section_heights[mark.label[len("section:"):]] = max(0.0, height)
+
+    last_page_total = 0.0 if end_mark.page_goal >= EMPTY_PAGE_GOAL else end_mark.page_total
+    return LayoutReport(report.pages, max_pages, page_goal, last_page_total, section_heights)
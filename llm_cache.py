@@ -0,0 +1,155 @@
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import argparse
+import threading
+from typing import Dict, Optional
+from loguru import logger
+
+DEFAULT_CACHE_PATH = os.path.join(".cache", "llm_cache.sqlite3")
+DEFAULT_MAX_BYTES = 100 * 1024 * 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+
+
+class LLMCache:
+    """
+    Persistent, content-addressed cache of LLM responses.
+
+    Entries are keyed by a hash of (model, system message, prompt) and stored in SQLite so the cache
+    can be shared between threads and processes. The cache is bounded by total response size and by
+    age: expired entries are dropped on access, and the least recently used entries are evicted once
+    the size limit is exceeded.
+
+    When `bypass` is set, lookups always miss but fresh responses are still stored, which refreshes
+    the cache without disabling it for other runs.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS, bypass: bool = False):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.bypass = bypass
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._connection = sqlite3.connect(path, timeout=30, check_same_thread=False)
+        with self._lock, self._connection:
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS responses ("
+                "key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, "
+                "size INTEGER NOT NULL, created REAL NOT NULL, accessed REAL NOT NULL)"
+            )
+            self._connection.execute("CREATE INDEX IF NOT EXISTS responses_accessed ON responses (accessed)")
+
+    @staticmethod
+    def make_key(model: Optional[str], system_message: str, prompt: str) -> str:
+        payload = json.dumps([model or "", system_message, prompt], ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, model: Optional[str], system_message: str, prompt: str) -> Optional[str]:
+        if self.bypass:
+            self.misses += 1
+            return None
+
+        key = self.make_key(model, system_message, prompt)
+        now = time.time()
+        with self._lock, self._connection:
+            row = self._connection.execute(
+                "SELECT response, created FROM responses WHERE key = ?", (key,)
+            ).fetchone()
+            if row is not None and now - row[1] > self.ttl_seconds:
+                self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                return None
+            self._connection.execute("UPDATE responses SET accessed = ? WHERE key = ?", (now, key))
+
+        self.hits += 1
+        logger.debug(f"LLM cache hit for {key[:12]}")
+        return row[0]
+
+    def set(self, model: Optional[str], system_message: str, prompt: str, response: str) -> None:
+        key = self.make_key(model, system_message, prompt)
+        now = time.time()
+        size = len(response.encode("utf-8"))
+        with self._lock, self._connection:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (key, model, response, size, created, accessed) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model, response, size, now, now),
+            )
+            self._evict(now)
+
+    def _evict(self, now: float) -> None:
+        self._connection.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl_seconds,))
+        total_size = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()[0]
+        if total_size <= self.max_bytes:
+            return
+
+        evicted = 0
+        for key, size in self._connection.execute(
+                "SELECT key, size FROM responses ORDER BY accessed ASC").fetchall():
+            if total_size <= self.max_bytes:
+                break
+            self._connection.execute("DELETE FROM responses WHERE key = ?", (key,))
+            total_size -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} entries from LLM cache")
+
+    def clear(self) -> None:
+        with self._lock, self._connection:
+            self._connection.execute("DELETE FROM responses")
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, total_size = self._connection.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM responses"
+            ).fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": total_size}
+
+
+_cache: Optional[LLMCache] = None
+_cache_pid: Optional[int] = None
+_cache_lock = threading.Lock()
+
+
+def get_llm_cache() -> LLMCache:
+    """Return the process-wide cache, configured from LLM_CACHE_* environment variables."""
+    global _cache, _cache_pid
+    with _cache_lock:
+        # SQLite connections must not be shared across fork, so each process opens its own
+        if _cache is None or _cache_pid != os.getpid():
+            _cache = LLMCache(
+                path=os.getenv("LLM_CACHE_PATH", DEFAULT_CACHE_PATH),
+                max_bytes=int(os.getenv("LLM_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+                ttl_seconds=float(os.getenv("LLM_CACHE_TTL_SECONDS", DEFAULT_TTL_SECONDS)),
+                bypass=os.getenv("LLM_CACHE_BYPASS", "").lower() in ("1", "true", "yes"),
+            )
+            _cache_pid = os.getpid()
+        return _cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the LLM response cache")
+    parser.add_argument("action", choices=["stats", "clear"], help="Action to perform")
+    args = parser.parse_args()
+
+    cache = get_llm_cache()
+    if args.action == "stats":
+        logger.info(f"LLM cache at {cache.path}: {cache.stats()}")
+    elif args.action == "clear":
+        cache.clear()
+        logger.success(f"Cleared LLM cache at {cache.path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+import os
+import json
+import time
+import random
+import threading
+import openai
+import requests
+from requests.adapters import HTTPAdapter
+from typing import Callable, Dict, Optional, Tuple
+from loguru import logger
+from llm_cache import get_llm_cache
+from metrics import record_llm_call, estimate_tokens
+
+DEFAULT_MAX_IN_FLIGHT = 8
+DEFAULT_TIMEOUT_SECONDS = 60.0
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_API_BASE = "https://api.openai.com/v1"
+# openai refuses to send a request without some key; servers behind OPENAI_API_BASE (the stub, say) ignore it
+PLACEHOLDER_API_KEY = "sk-no-key"
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+RETRYABLE_ERRORS = (
+    openai.error.RateLimitError,
+    openai.error.APIConnectionError,
+    openai.error.Timeout,
+    openai.error.ServiceUnavailableError,
+    openai.error.TryAgain,
+)
+# Parameters that can be set per stage, with how to parse them from the environment
+STAGE_PARAMETERS = {
+    'temperature': float,
+    'max_tokens': int,
+    'top_p': float,
+}
+
+
+def get_stage_config(stage: str) -> Dict:
+    """
+    Model and parameters for a pipeline stage, e.g. "section" or "relevance".
+
+    OPENAI_MODEL_<STAGE>, OPENAI_TEMPERATURE_<STAGE>, OPENAI_MAX_TOKENS_<STAGE>, OPENAI_TOP_P_<STAGE> and
+    OPENAI_TIMEOUT_<STAGE> override OPENAI_MODEL, OPENAI_TEMPERATURE and so on for that stage.
+    """
+    suffix = stage.upper()
+
+    def setting(name: str) -> Optional[str]:
+        return os.getenv(f"{name}_{suffix}") or os.getenv(name)
+
+    config = {'model': setting("OPENAI_MODEL"), 'params': {}}
+    for parameter, parse in STAGE_PARAMETERS.items():
+        value = setting(f"OPENAI_{parameter.upper()}")
+        if value:
+            config['params'][parameter] = parse(value)
+    config['timeout'] = float(setting("OPENAI_TIMEOUT") or DEFAULT_TIMEOUT_SECONDS)
+    return config
+
+
+def ensure_api_key() -> None:
+    """
+    Make sure openai has a key before a request is sent. Checked per request rather than at import or
+    construction, so cached replays and commands that never call the model run without one.
+    """
+    if openai.api_key:
+        return
+    openai.api_key = os.getenv("OPENAI_API_KEY")
+    if openai.api_key:
+        return
+    if openai.api_base.rstrip('/') != DEFAULT_API_BASE:
+        openai.api_key = PLACEHOLDER_API_KEY
+        return
+    logger.critical("OPENAI_API_KEY environment variable is not set")
+    raise ValueError("OPENAI_API_KEY environment variable is not set")
+
+
+def is_retryable(error: Exception) -> bool:
+    if isinstance(error, RETRYABLE_ERRORS):
+        return True
+    # 5xx responses surface as a plain APIError
+    return isinstance(error, openai.error.APIError) and (error.http_status or 0) >= 500
+
+
+def get_retry_after(error: Exception) -> Optional[float]:
+    headers = getattr(error, 'headers', None) or {}
+    try:
+        return float(headers.get('retry-after') or headers.get('Retry-After'))
+    except (TypeError, ValueError):
+        return None
+
+
+class TokenBucket:
+    """Allow `rate` acquisitions per second on average, with bursts of up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class LLMClient:
+    """
+    The single way the pipeline talks to the chat completions API.
+
+    All requests share one pooled HTTP session, so parallel stages reuse connections instead of each
+    thread opening its own. At most `max_in_flight` requests run at once, optionally paced by a
+    requests-per-minute token bucket, and rate limits, timeouts and 5xx errors are retried with
+    jittered exponential backoff (honouring Retry-After). Responses go through the LLM cache.
+    """
+
+    def __init__(self, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT, requests_per_minute: Optional[float] = None,
+                 max_retries: int = DEFAULT_MAX_RETRIES, cache=None):
+        self.max_in_flight = max_in_flight
+        self.max_retries = max_retries
+        self.cache = cache or get_llm_cache()
+        self._semaphore = threading.BoundedSemaphore(max_in_flight)
+        self._bucket = TokenBucket(requests_per_minute / 60, max(1.0, requests_per_minute / 60)) if requests_per_minute else None
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=max_in_flight)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        # openai 0.28 otherwise creates a new session, and so new connections, for every thread
+        openai.requestssession = self.session
+
+    def complete(self, system_message: str, prompt: str, stage: str = "default", use_cache: bool = True,
+                 on_token: Optional[Callable[[str], None]] = None) -> str:
+        """
+        Send a single system + user message exchange to the model, serving repeats from the LLM cache.
+
+        With on_token, the response is streamed and on_token is called with each piece of text as it arrives
+        (a cached response is passed in one piece). The complete text is returned either way.
+        """
+        config = get_stage_config(stage)
+        # Parameters change the response, so they are part of its cache key; the bare model keeps old entries valid
+        cache_model = config['model'] if not config['params'] else f"{config['model']} {json.dumps(config['params'], sort_keys=True)}"
+        start = time.perf_counter()
+        if use_cache:
+            cached_content = self.cache.get(cache_model, system_message, prompt)
+            if cached_content is not None:
+                record_llm_call(stage, config['model'], time.perf_counter() - start, cache_hit=True)
+                if on_token is not None:
+                    on_token(cached_content)
+                return cached_content
+
+        ensure_api_key()
+        messages = [
+            {"role": "system", "content": system_message},
+            {"role": "user", "content": prompt}
+        ]
+        request = dict(model=config['model'], messages=messages, request_timeout=config['timeout'], **config['params'])
+        try:
+            content, usage = self.request(request, stage, on_token)
+        except Exception:
+            record_llm_call(stage, config['model'], time.perf_counter() - start, success=False)
+            raise
+        # Streamed responses carry no usage, so their token counts are estimated
+        prompt_tokens = usage.get('prompt_tokens') or estimate_tokens(system_message + prompt)
+        completion_tokens = usage.get('completion_tokens') or estimate_tokens(content)
+        record_llm_call(stage, config['model'], time.perf_counter() - start, prompt_tokens, completion_tokens)
+        self.cache.set(cache_model, system_message, prompt, content)
+        return content
+
+    def request(self, request: Dict, stage: str, on_token: Optional[Callable[[str], None]] = None) -> Tuple[str, Dict]:
+        """Make the API request, retrying transient errors; returns the content and the reported token usage."""
+        for attempt in range(self.max_retries + 1):
+            streamed = []
+            try:
+                if self._bucket is not None:
+                    self._bucket.acquire()
+                with self._semaphore:
+                    if on_token is None:
+                        response = openai.ChatCompletion.create(**request)
+                        return response.choices[0].message['content'], dict(getattr(response, 'usage', None) or {})
+                    for chunk in openai.ChatCompletion.create(stream=True, **request):
+                        piece = chunk['choices'][0]['delta'].get('content') if chunk['choices'] else None
+                        if piece:
+                            streamed.append(piece)
+                            on_token(piece)
+                    return ''.join(streamed), {}
+            except Exception as e:
+                # A stream that already produced text cannot be replayed without duplicating it
+                if streamed or not is_retryable(e) or attempt == self.max_retries:
+                    raise
+                delay = random.uniform(0, min(BACKOFF_MAX_SECONDS, BACKOFF_BASE_SECONDS * 2 ** attempt))
+                delay = max(delay, get_retry_after(e) or 0.0)
+                logger.warning(f"{type(e).__name__} in {stage} request, retrying in {delay:.1f}s "
+                               f"(attempt {attempt + 1}/{self.max_retries})")
+                time.sleep(delay)
+
+
+_client: Optional[LLMClient] = None
+_client_pid: Optional[int] = None
+_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """Return the process-wide client, configured from LLM_MAX_IN_FLIGHT, LLM_REQUESTS_PER_MINUTE and LLM_MAX_RETRIES."""
+    global _client, _client_pid
+    with _client_lock:
+        # Connection pools and the cache connection must not be shared across fork
+        if _client is None or _client_pid != os.getpid():
+            requests_per_minute = os.getenv("LLM_REQUESTS_PER_MINUTE")
+            _client = LLMClient(
+                max_in_flight=int(os.getenv("LLM_MAX_IN_FLIGHT", DEFAULT_MAX_IN_FLIGHT)),
+                requests_per_minute=float(requests_per_minute) if requests_per_minute else None,
+                max_retries=int(os.getenv("LLM_MAX_RETRIES", DEFAULT_MAX_RETRIES)),
+            )
+            _client_pid = os.getpid()
+        return _client
@@ -0,0 +1,287 @@
+import os
+import re
+import json
+import time
+import uuid
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional
+from loguru import logger
+from llm_cache import LLMCache
+from metrics import estimate_tokens
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# Request parameters that are part of LLMClient's cache key, in the same form
+KEYED_PARAMETERS = ('temperature', 'max_tokens', 'top_p')
+
+SECTION_PATTERN = re.compile(r"\\begin\{rSection\}.*?\\end\{rSection\}", re.DOTALL)
+ITEM_PATTERN = re.compile(r"^\s*\\item\b.*$", re.MULTILINE)
+JSON_ARRAY_PATTERN = re.compile(r"\[\s*\{.*\}\s*\]", re.DOTALL)
+
+
+def synthesize_job_description(prompt: str) -> str:
+    job_description = prompt.split("Job Description:", 1)[-1].split("Please format your response", 1)[0]
+    lines = [line.strip(" -*•\t") for line in job_description.splitlines() if line.strip(" -*•\t")]
+    extracted = {
+        "essential_requirements": lines[:4],
+        "preferred_skills": lines[4:7],
+        "key_responsibilities": lines[7:10],
+        "company_mission": lines[10:11],
+        "additional_info": lines[11:13],
+        "industry_terminology": lines[13:16],
+    }
+    if '"job_title"' in prompt:
+        extracted = {"job_title": lines[0] if lines else "Software Engineer", **extracted}
+    return json.dumps(extracted, indent=2)
+
+
+def synthesize_bullets(prompt: str) -> str:
+    """Echo an indexed bullet batch back, cut to its max_length where one is given."""
+    match = JSON_ARRAY_PATTERN.search(prompt)
+    if match is None:
+        return "[]"
+    try:
+        bullets = json.loads(match.group())
+    except json.JSONDecodeError:
+        return "[]"
+    return json.dumps([{"index": bullet.get("index"), "text": bullet.get("text", "")[:bullet.get("max_length")]}
+                       for bullet in bullets])
+
+
+def synthesize_edits(prompt: str) -> str:
+    """Edits for an optimizer prompt: the first bullet of the outline is replaced by a tightened copy."""
+    match = re.search(r"^\s*\[(\d+)\.(\d+)\] (.+)$", prompt, re.MULTILINE)
+    if not match:
+        return json.dumps({"edits": []})
+    text = " ".join(match.group(3).split()[:12])
+    return json.dumps({"edits": [{"op": "replace_bullet", "entry": int(match.group(1)),
+                                  "bullet": int(match.group(2)), "text": text}]})
+
+
+def fill_schema(value):
+    """Example data for a JSON schema sketch such as {"skills": ["..."]}: placeholders become text, lists get two items."""
+    if isinstance(value, dict):
+        return {key: fill_schema(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [fill_schema(item) for item in value for _ in range(2)]
+    if value == "...":
+        return "Delivered a measurable improvement to a production system used by thousands of people"
+    return value
+
+
+def synthesize_section_data(prompt: str) -> str:
+    schema = prompt.split("Return only JSON of the form:", 1)[1].strip().split("\n", 1)[0]
+    try:
+        return json.dumps(fill_schema(json.loads(schema)))
+    except json.JSONDecodeError:
+        return "{}"
+
+
+def synthesize_response(system_message: str, prompt: str) -> str:
+    """
+    A plausible response to one of the pipeline's prompts, so every stage has well-formed input.
+
+    Section prompts get their template back (or example data in the shape they ask for), reduce and
+    expand prompts get the section with its last item removed or repeated, optimizer prompts get one
+    bullet edit, and the other JSON prompts get JSON of the shape they ask for.
+    """
+    if '"essential_requirements"' in prompt:
+        return synthesize_job_description(prompt)
+    if "Extract the job title" in prompt:
+        return "Software Engineer"
+    if "filename for a CV" in prompt:
+        return "Software_Engineer_CV"
+    if "mapping each id to its score" in prompt:
+        ids = re.findall(r'"id": (\d+)', prompt)
+        return json.dumps({index: 3 + int(index) * 7 % 8 for index in ids})
+    if "Rate (1-10)" in prompt:
+        return str(3 + len(prompt) % 7)
+    if '{"index": <index>, "text": "<bullet point>"}' in prompt:
+        return synthesize_bullets(prompt)
+    if '"op": "replace_bullet"' in prompt:
+        return synthesize_edits(prompt)
+    if "Return only JSON of the form:" in prompt:
+        return synthesize_section_data(prompt)
+
+    sections = SECTION_PATTERN.findall(prompt)
+    if sections:
+        section = sections[-1]
+        items = ITEM_PATTERN.findall(section)
+        if items and prompt.lstrip().startswith("Reduce"):
+            return section.replace(items[-1] + "\n", "", 1)
+        if items and prompt.lstrip().startswith("Expand"):
+            return section.replace(items[-1], f"{items[-1]}\n{items[-1]}", 1)
+        return section
+    if "bullet point" in prompt.lower() and ": " in prompt:
+        # Single bullet rewrites end with the bullet itself
+        return prompt.rsplit(": ", 1)[1].strip()
+    return "OK"
+
+
+class StubResponder:
+    """
+    Decides what the stub answers and how long it takes.
+
+    Responses recorded in an LLM cache database are replayed when the request matches one (same model,
+    parameters and messages); anything else gets a synthetic response. Every response is delayed by
+    `latency` seconds give or take up to `jitter`, and streamed responses are paced at
+    `tokens_per_second`.
+    """
+
+    def __init__(self, latency: float = 0.0, jitter: float = 0.0, tokens_per_second: Optional[float] = None,
+                 recordings: Optional[str] = None, seed: Optional[int] = None):
+        self.latency = latency
+        self.jitter = jitter
+        self.tokens_per_second = tokens_per_second
+        self.recordings = LLMCache(path=recordings, ttl_seconds=float("inf")) if recordings else None
+        self.random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.replayed = 0
+
+    def delay(self) -> float:
+        with self._lock:
+            return max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter))
+
+    def respond(self, body: Dict) -> str:
+        messages = body.get('messages') or []
+        system_message = next((m.get('content', '') for m in messages if m.get('role') == 'system'), '')
+        prompt = next((m.get('content', '') for m in reversed(messages) if m.get('role') == 'user'), '')
+        with self._lock:
+            self.requests += 1
+
+        if self.recordings is not None:
+            params = {name: body[name] for name in KEYED_PARAMETERS if name in body}
+            model = body.get('model') if not params else f"{body.get('model')} {json.dumps(params, sort_keys=True)}"
+            recorded = self.recordings.get(model, system_message, prompt)
+            if recorded is not None:
+                with self._lock:
+                    self.replayed += 1
+                return recorded
+        return synthesize_response(system_message, prompt)
+
+
+def split_stream(content: str) -> List[str]:
+    """Cut a response into word-sized pieces, the way a model streams it."""
+    return re.findall(r"\S+\s*|\s+", content) or [""]
+
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    responder: StubResponder = None
+
+    def log_message(self, format, *args):
+        logger.debug(f"Stub {self.address_string()} {format % args}")
+
+    def send_json(self, status: int, payload: Dict) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        except json.JSONDecodeError:
+            self.send_json(400, {"error": {"message": "Request body is not JSON", "type": "invalid_request_error"}})
+            return
+        if not self.path.rstrip("/").endswith("/chat/completions"):
+            self.send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+            return
+
+        content = self.responder.respond(body)
+        time.sleep(self.responder.delay())
+        model = body.get("model") or "stub"
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:24]}"
+        if body.get("stream"):
+            self.stream(completion_id, model, content)
+            return
+
+        prompt_tokens = estimate_tokens("".join(m.get("content", "") for m in body.get("messages") or []))
+        completion_tokens = estimate_tokens(content)
+        self.send_json(200, {
+            "id": completion_id,
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{"index": 0, "message": {"role": "assistant", "content": content}, "finish_reason": "stop"}],
+            "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens,
+                      "total_tokens": prompt_tokens + completion_tokens},
+        })
+
+    def stream(self, completion_id: str, model: str, content: str) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        # No length is known up front, so the connection is closed to end the stream
+        self.send_header("Connection", "close")
+        self.end_headers()
+        self.close_connection = True
+
+        def event(delta: Dict, finish_reason: Optional[str] = None) -> None:
+            chunk = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                     "model": model, "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]}
+            self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode("utf-8"))
+            self.wfile.flush()
+
+        event({"role": "assistant"})
+        for piece in split_stream(content):
+            if self.responder.tokens_per_second:
+                time.sleep(estimate_tokens(piece) / self.responder.tokens_per_second)
+            event({"content": piece})
+        event({}, "stop")
+        self.wfile.write(b"data: [DONE]\n\n")
+        self.wfile.flush()
+
+
+def create_server(host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, responder: Optional[StubResponder] = None) -> ThreadingHTTPServer:
+    """Build (but do not start) a stub server; port 0 picks a free port, see server.server_address."""
+    handler = type("BoundStubRequestHandler", (StubRequestHandler,), {"responder": responder or StubResponder()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    return server
+
+
+def start_server(host: str = DEFAULT_HOST, port: int = 0, responder: Optional[StubResponder] = None):
+    """Serve from a background thread. Returns the server and its API base URL, for openai.api_base."""
+    server = create_server(host, port, responder)
+    threading.Thread(target=server.serve_forever, name="llm-stub", daemon=True).start()
+    api_base = f"http://{server.server_address[0]}:{server.server_address[1]}/v1"
+    logger.info(f"LLM stub serving at {api_base}")
+    return server, api_base
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve an OpenAI-compatible chat completions stub for offline runs")
+    parser.add_argument("--host", default=os.getenv("LLM_STUB_HOST", DEFAULT_HOST), help="Interface to listen on")
+    parser.add_argument("--port", type=int, default=int(os.getenv("LLM_STUB_PORT", DEFAULT_PORT)), help="Port to listen on")
+    parser.add_argument("--latency", type=float, default=float(os.getenv("LLM_STUB_LATENCY", 0)),
+                        help="Seconds before each response starts")
+    parser.add_argument("--jitter", type=float, default=float(os.getenv("LLM_STUB_JITTER", 0)),
+                        help="Latency varies uniformly by up to this many seconds either way")
+    parser.add_argument("--tokens-per-second", type=float, default=None, help="Pace of streamed responses")
+    parser.add_argument("--recordings", help="LLM cache database whose responses are replayed for matching requests")
+    parser.add_argument("--seed", type=int, help="Seed for the latency jitter")
+    args = parser.parse_args()
+
+    responder = StubResponder(args.latency, args.jitter, args.tokens_per_second, args.recordings, args.seed)
+    server = create_server(args.host, args.port, responder)
+    logger.info(f"LLM stub serving at http://{args.host}:{server.server_address[1]}/v1 "
+                f"(set OPENAI_API_BASE to point the pipeline at it)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        logger.info(f"Served {responder.requests} requests, {responder.replayed} from recordings")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,13 @@
 import os
+import json
 import shutil
+import argparse
 from dotenv import load_dotenv
-import openai
 from loguru import logger
 from cv_generator import CVGenerator
 from utils import load_yaml, load_job_description, get_pdf_pages
 from job_description_processor import process_job_description
+from metrics import get_registry
 
 # Configure logger
 logger.add("app.log", rotation="500 MB", level="DEBUG")
@@ -14,10 +16,6 @@ logger.add("app.log", rotation="500 MB", level="DEBUG")
 load_dotenv()
 logger.info("Environment variables loaded.")
 
-# Set up OpenAI API key
-openai.api_key = os.getenv("OPENAI_API_KEY")
-logger.success("OpenAI API key set successfully.")
-
 def generate_single_section(cv_generator, section_name):
     cv_generator.generate_single_section(section_name)
     pdf_pages = get_pdf_pages(cv_generator.output_dir)
@@ -64,6 +62,17 @@ def main():
         logger.exception(f"An unexpected error occurred: {str(e)}")
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Generate a CV from info.yml for job_description.txt")
+    parser.add_argument("--metrics", action="store_true",
+                        help="Print the time, tokens and cost of each stage as JSON when done")
+    args = parser.parse_args()
+
     logger.info("Starting CV generation process...")
     main()
-    logger.info("CV generation process completed.")
\ No newline at end of file
+    logger.info("CV generation process completed.")
+    # Where the run's time, tokens and money went, per stage
+    summary = json.dumps(get_registry().summary(), indent=2)
+    if args.metrics:
+        print(summary)
+    else:
+        logger.debug(f"Stage metrics: {summary}")
\ No newline at end of file
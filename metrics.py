@@ -0,0 +1,190 @@
+import os
+import math
+import threading
+import contextvars
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass, field, asdict
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# USD per million (prompt, completion) tokens, matched by model name prefix (longest prefix wins)
+MODEL_PRICES = {
+    'gpt-4o-mini': (0.15, 0.60),
+    'gpt-4o': (2.50, 10.00),
+    'gpt-4-turbo': (10.00, 30.00),
+    'gpt-4': (30.00, 60.00),
+    'gpt-3.5-turbo': (0.50, 1.50),
+}
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, math.inf)
+# Per-job aggregates are kept for this many of the most recent jobs
+MAX_TRACKED_JOBS = 256
+
+# Set around a job (web job, batch entry) so every call it makes is also attributed to it
+current_job: contextvars.ContextVar[Optional[str]] = contextvars.ContextVar("current_job", default=None)
+
+
+def estimate_tokens(text: str) -> int:
+    """About four characters per token, for responses that come without usage (streams)."""
+    return math.ceil(len(text) / 4)
+
+
+def estimate_cost(model: Optional[str], prompt_tokens: int, completion_tokens: int) -> float:
+    input_price = os.getenv("LLM_PRICE_INPUT_PER_1M")
+    output_price = os.getenv("LLM_PRICE_OUTPUT_PER_1M")
+    if input_price and output_price:
+        prices = (float(input_price), float(output_price))
+    else:
+        matches = [prefix for prefix in MODEL_PRICES if (model or "").startswith(prefix)]
+        if not matches:
+            return 0.0
+        prices = MODEL_PRICES[max(matches, key=len)]
+    return (prompt_tokens * prices[0] + completion_tokens * prices[1]) / 1_000_000
+
+
+@dataclass
+class StageStats:
+    calls: int = 0
+    errors: int = 0
+    cache_hits: int = 0
+    wall_time: float = 0.0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    cost: float = 0.0
+    buckets: List[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS))
+
+    def add(self, wall_time: float, success: bool, cache_hit: bool, prompt_tokens: int,
+            completion_tokens: int, cost: float) -> None:
+        self.calls += 1
+        self.errors += 0 if success else 1
+        self.cache_hits += 1 if cache_hit else 0
+        self.wall_time += wall_time
+        self.prompt_tokens += prompt_tokens
+        self.completion_tokens += completion_tokens
+        self.cost += cost
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if wall_time <= bound:
+                self.buckets[index] += 1
+                break
+
+    def to_dict(self) -> Dict:
+        stats = asdict(self)
+        del stats['buckets']
+        stats['wall_time'] = round(self.wall_time, 3)
+        stats['cost'] = round(self.cost, 6)
+        return stats
+
+
+class MetricsRegistry:
+    """
+    Per-stage timings, tokens, cost and cache hits of LLM calls and LaTeX compiles.
+
+    Every sample is added to the process-wide totals and, when recorded inside job_context, to that
+    job's totals as well.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.process: Dict[Tuple[str, str], StageStats] = {}
+        self.jobs: "OrderedDict[str, Dict[Tuple[str, str], StageStats]]" = OrderedDict()
+
+    def record(self, kind: str, stage: str, wall_time: float, success: bool = True, cache_hit: bool = False,
+               prompt_tokens: int = 0, completion_tokens: int = 0, cost: float = 0.0) -> None:
+        key = (kind, stage)
+        sample = (wall_time, success, cache_hit, prompt_tokens, completion_tokens, cost)
+        job_id = current_job.get()
+        with self._lock:
+            self.process.setdefault(key, StageStats()).add(*sample)
+            if job_id is not None:
+                if job_id not in self.jobs:
+                    self.jobs[job_id] = {}
+                    while len(self.jobs) > MAX_TRACKED_JOBS:
+                        self.jobs.popitem(last=False)
+                self.jobs[job_id].setdefault(key, StageStats()).add(*sample)
+
+    def summary(self, job_id: Optional[str] = None) -> Dict:
+        """JSON-friendly totals per kind and stage, for the whole process or a single job."""
+        with self._lock:
+            stats = self.process if job_id is None else self.jobs.get(job_id, {})
+            summary: Dict = {}
+            for (kind, stage), stage_stats in sorted(stats.items()):
+                summary.setdefault(kind, {})[stage] = stage_stats.to_dict()
+            summary['total'] = {
+                'wall_time': round(sum(s.wall_time for s in stats.values()), 3),
+                'prompt_tokens': sum(s.prompt_tokens for s in stats.values()),
+                'completion_tokens': sum(s.completion_tokens for s in stats.values()),
+                'cost': round(sum(s.cost for s in stats.values()), 6),
+            }
+        return summary
+
+    def to_prometheus(self) -> str:
+        """Process-wide metrics in the Prometheus text exposition format."""
+        lines = []
+
+        def family(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        with self._lock:
+            stats = sorted(self.process.items())
+            for kind in sorted({kind for kind, _ in self.process}):
+                prefix = f"cv_{kind}"
+                kind_stats = [(stage, s) for (k, stage), s in stats if k == kind]
+
+                family(f"{prefix}_seconds", "histogram", f"Wall time of {kind} calls by stage")
+                for stage, s in kind_stats:
+                    cumulative = 0
+                    for bound, count in zip(LATENCY_BUCKETS, s.buckets):
+                        cumulative += count
+                        le = "+Inf" if bound == math.inf else f"{bound}"
+                        lines.append(f'{prefix}_seconds_bucket{{stage="{stage}",le="{le}"}} {cumulative}')
+                    lines.append(f'{prefix}_seconds_sum{{stage="{stage}"}} {s.wall_time:.6f}')
+                    lines.append(f'{prefix}_seconds_count{{stage="{stage}"}} {s.calls}')
+
+                family(f"{prefix}_errors_total", "counter", f"Failed {kind} calls by stage")
+                lines.extend(f'{prefix}_errors_total{{stage="{stage}"}} {s.errors}' for stage, s in kind_stats)
+
+                family(f"{prefix}_cache_hits_total", "counter", f"{kind.capitalize()} calls served from a cache")
+                lines.extend(f'{prefix}_cache_hits_total{{stage="{stage}"}} {s.cache_hits}' for stage, s in kind_stats)
+                if kind == "llm":
+                    family(f"{prefix}_tokens_total", "counter", "Prompt and completion tokens by stage")
+                    for stage, s in kind_stats:
+                        lines.append(f'{prefix}_tokens_total{{stage="{stage}",type="prompt"}} {s.prompt_tokens}')
+                        lines.append(f'{prefix}_tokens_total{{stage="{stage}",type="completion"}} {s.completion_tokens}')
+                    family(f"{prefix}_cost_usd_total", "counter", "Estimated LLM cost in USD by stage")
+                    lines.extend(f'{prefix}_cost_usd_total{{stage="{stage}"}} {s.cost:.6f}' for stage, s in kind_stats)
+        return "\n".join(lines) + "\n"
+
+
+_registry = MetricsRegistry()
+
+
+def get_registry() -> MetricsRegistry:
+    return _registry
+
+
+def record_llm_call(stage: str, model: Optional[str], wall_time: float, prompt_tokens: int = 0,
+                    completion_tokens: int = 0, cache_hit: bool = False, success: bool = True) -> None:
+    cost = 0.0 if cache_hit else estimate_cost(model, prompt_tokens, completion_tokens)
+    _registry.record("llm", stage, wall_time, success, cache_hit, prompt_tokens, completion_tokens, cost)
+
+
+def record_compile(stage: str, wall_time: float, success: bool = True, cache_hit: bool = False) -> None:
+    _registry.record("compile", stage, wall_time, success, cache_hit)
+
+
+@contextmanager
+def job_context(job_id: str) -> Iterator[None]:
+    token = current_job.set(job_id)
+    try:
+        yield
+    finally:
+        current_job.reset(token)
+
+
+def bind_context(function: Callable) -> Callable:
+    """Wrap function so calls from pool threads still see the caller's job (executors do not copy contextvars)."""
+    context = contextvars.copy_context()
+
+    def run(*args, **kwargs):
+        return context.copy().run(function, *args, **kwargs)
+    return run
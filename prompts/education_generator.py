@@ -1,7 +1,8 @@
 import yaml
-from utils import generate_section_content
+from utils import generate_section_content, generate_section_data
+from section_renderer import SECTION_SCHEMAS
 
-def generate_education_section(info, job_description, template):
+def generate_education_section(info, job_description, template, on_token=None):
     prompt = f"""
     Generate only the LaTeX output for the education section of a CV based on the following information and job description:
 
@@ -21,4 +22,25 @@ def generate_education_section(info, job_description, template):
     4. Limits to the most relevant and recent educational experiences.
     5. Contains correct and complete LaTeX syntax.
     """
-    return generate_section_content("Education", prompt)
\ No newline at end of file
+    return generate_section_content("Education", prompt, on_token=on_token)
+
+def generate_education_data(info, job_description, on_token=None):
+    prompt = f"""
+    Select the education entries for a CV based on the following information and job description:
+
+    Information:
+    {yaml.dump(info)}
+
+    Job Description:
+    {job_description}
+
+    Return only JSON of the form:
+    {SECTION_SCHEMAS['education']}
+
+    Ensure the output:
+    1. Includes relevant coursework and achievements that align with the job description in the grade field.
+    2. Uses dates in the form MMM YYYY.
+    3. Limits to the most relevant and recent educational experiences.
+    4. Contains plain text only, without LaTeX markup.
+    """
+    return generate_section_data("Education", prompt, on_token=on_token)
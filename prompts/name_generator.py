@@ -1,4 +1,4 @@
-from utils import generate_section_content
+from utils import chat_completion
 
 def generate_cv_name(job_description):
     prompt = f"""
@@ -17,4 +17,5 @@ def generate_cv_name(job_description):
     Job Description:
     {job_description}
     """
-    return generate_section_content("CV Name", prompt).strip()
\ No newline at end of file
+    # A filename, not LaTeX, so it skips the section post-processing (which would escape its underscores)
+    return chat_completion("You are an expert in CV writing.", prompt, stage="name").strip().strip('`').strip()
\ No newline at end of file
@@ -1,7 +1,8 @@
 import yaml
-from utils import generate_section_content
+from utils import generate_section_content, generate_section_data
+from section_renderer import SECTION_SCHEMAS
 
-def generate_projects_section(info, job_description, template):
+def generate_projects_section(info, job_description, template, on_token=None):
     prompt = f"""
     Generate only the LaTeX output for the projects section of a CV based on the following information and job description:
 
@@ -26,4 +27,28 @@ def generate_projects_section(info, job_description, template):
     9. Avoids repetition of information across bullet points.
     10. Emphasizes the project's impact and your role in its development.
     """
-    return generate_section_content("Projects", prompt)
\ No newline at end of file
+    return generate_section_content("Projects", prompt, on_token=on_token)
+
+def generate_projects_data(info, job_description, on_token=None):
+    prompt = f"""
+    Select and describe the projects for a CV based on the following information and job description:
+
+    Information:
+    {yaml.dump(info)}
+
+    Job Description:
+    {job_description}
+
+    Return only JSON of the form:
+    {SECTION_SCHEMAS['projects']}
+
+    Ensure the output:
+    1. Carefully selects projects that are most aligned with the job description.
+    2. Orders the selected projects from most relevant to least relevant.
+    3. Includes an appropriate number of projects based on relevance, not to fill space.
+    4. Highlights technologies and skills used that align with the job requirements.
+    5. Ensures bullet points are no shorter than 75 and no longer than 90 characters, including spaces.
+    6. Avoids repetition of information across bullet points.
+    7. Leaves out url when the project has none, and contains plain text only, without LaTeX markup.
+    """
+    return generate_section_data("Projects", prompt, on_token=on_token)
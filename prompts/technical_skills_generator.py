@@ -1,7 +1,8 @@
 import yaml
-from utils import generate_section_content
+from utils import generate_section_content, generate_section_data
+from section_renderer import SECTION_SCHEMAS
 
-def generate_technical_skills_section(info, job_description, template):
+def generate_technical_skills_section(info, job_description, template, on_token=None):
     prompt = f"""
     Generate the technical skills section for a CV based on the following information and job description:
 
@@ -27,4 +28,26 @@ def generate_technical_skills_section(info, job_description, template):
     10. Aim for a concise list of specific technical skills that demonstrates a strong match to the job requirements.
     11. Each listed skill must be a specific, individual technical skill (e.g., 'Python', 'Docker', 'TensorFlow'), not a broad category or description.
     """
-    return generate_section_content("Technical Skills", prompt)
\ No newline at end of file
+    return generate_section_content("Technical Skills", prompt, on_token=on_token)
+
+def generate_technical_skills_data(info, job_description, on_token=None):
+    prompt = f"""
+    Select the technical skills for a CV based on the following information and job description:
+
+    Information:
+    {yaml.dump(info)}
+
+    Job Description:
+    {job_description}
+
+    Return only JSON of the form:
+    {SECTION_SCHEMAS['technical_skills']}
+
+    Follow these guidelines:
+    1. Select ONLY the specific technical skills that directly align with the job description.
+    2. Order skills by their relevance to the job description.
+    3. If the job description mentions specific versions or variations of technologies, list those exact versions.
+    4. Each listed skill must be a specific, individual technical skill (e.g., 'Python', 'Docker', 'TensorFlow'), not a broad category or description.
+    5. Aim for a concise list that demonstrates a strong match to the job requirements.
+    """
+    return generate_section_data("Technical Skills", prompt, on_token=on_token)
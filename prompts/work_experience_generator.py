@@ -1,7 +1,8 @@
 import yaml
-from utils import generate_section_content
+from utils import generate_section_content, generate_section_data
+from section_renderer import SECTION_SCHEMAS
 
-def generate_work_experience_section(info, processed_job_info, template):
+def generate_work_experience_section(info, processed_job_info, template, on_token=None):
     prompt = f"""
     Generate the work experience section for a CV based on the following information and job requirements:
 
@@ -16,4 +17,25 @@ def generate_work_experience_section(info, processed_job_info, template):
 
     // ... rest of the prompt remains the same ...
     """
-    return generate_section_content("Work Experience", prompt)
\ No newline at end of file
+    return generate_section_content("Work Experience", prompt, on_token=on_token)
+
+def generate_work_experience_data(info, processed_job_info, on_token=None):
+    prompt = f"""
+    Select and describe the work experience for a CV based on the following information and job requirements:
+
+    Information:
+    {yaml.dump(info)}
+
+    Job Requirements:
+    {yaml.dump(processed_job_info)}
+
+    Return only JSON of the form:
+    {SECTION_SCHEMAS['work_experience']}
+
+    Ensure the output:
+    1. Lists roles from most to least recent.
+    2. Uses bullet points that highlight achievements relevant to the job requirements.
+    3. Keeps each bullet point between 75 and 90 characters, including spaces.
+    4. Contains plain text only, without LaTeX markup.
+    """
+    return generate_section_data("Work Experience", prompt, on_token=on_token)
@@ -0,0 +1,280 @@
+import os
+import re
+import ast
+import math
+from collections import Counter
+from typing import Callable, Dict, List, Optional, Sequence, Union
+from loguru import logger
+
+# Tokens keep the punctuation of names like C++, C#, Node.js and CI/CD
+TOKEN_PATTERN = re.compile(r"[a-z0-9][a-z0-9+#./-]*[a-z0-9+#]|[a-z0-9]")
+STOPWORDS = frozenset("""
+a an and are as at be by for from has have in into is it its of on or our that the their this to we with you
+your will can using use used via per across within over about able experience years strong knowledge skills
+""".split())
+
+# How much a term counts depending on where in the processed job description it appears
+JOB_FIELD_WEIGHTS = {
+    'job_title': 3.0,
+    'essential_requirements': 3.0,
+    'preferred_skills': 2.0,
+    'key_responsibilities': 1.5,
+    'industry_terminology': 1.5,
+    'company_mission': 0.5,
+    'additional_info': 0.5,
+}
+
+LATEX_COMMAND_PATTERN = re.compile(r"\\[a-zA-Z]+\*?(\[[^\]]*\])?|\$[^$]*\$|[{}]")
+# Lexical scores are mapped onto the 1-10 scale the LLM scorer uses
+MIN_SCORE, MAX_SCORE = 1.0, 10.0
+DEFAULT_SCORE = 5.0
+# In hybrid scoring, lexical scores within this much of each other count as tied and the LLM decides
+TIE_MARGIN = 0.5
+SCORERS = ("lexical", "llm", "hybrid")
+
+# Profile keys each section prompt needs; everything else in info.yml is left out
+SECTION_PROFILE_KEYS = {
+    'education': ['education_details'],
+    'work_experience': ['experience_details'],
+    'projects': ['projects'],
+    'technical_skills': ['skills', 'technical_skills', 'experience_details', 'projects', 'certifications'],
+}
+# Processed job description fields each section prompt needs; the mission and extra details only matter to the reducer
+SECTION_JOB_KEYS = {
+    'education': ['job_title', 'essential_requirements'],
+    'work_experience': ['job_title', 'essential_requirements', 'preferred_skills', 'key_responsibilities',
+                        'industry_terminology'],
+    'projects': ['job_title', 'essential_requirements', 'preferred_skills', 'key_responsibilities',
+                 'industry_terminology'],
+    'technical_skills': ['job_title', 'essential_requirements', 'preferred_skills', 'industry_terminology'],
+}
+# Lists that are ranked and cut to their top-k entries, with the env var and default for k
+RANKED_KEYS = {
+    'experience_details': ('CV_TOP_K_ROLES', 4),
+    'projects': ('CV_TOP_K_PROJECTS', 4),
+    'skills': ('CV_TOP_K_SKILLS', 25),
+    'technical_skills': ('CV_TOP_K_SKILLS', 25),
+}
+# Roles are kept in their original (chronological) order; other lists are reordered by relevance
+CHRONOLOGICAL_KEYS = {'experience_details'}
+
+
+def is_profile_slicing_enabled() -> bool:
+    return os.getenv("CV_PROFILE_SLICING", "1").lower() not in ("0", "false", "no")
+
+
+def get_scorer(scorer: Optional[str] = None) -> str:
+    """The relevance scorer for this run: "lexical" (BM25, the default), "llm", or "hybrid" (BM25 with LLM tiebreaks)."""
+    scorer = (scorer or os.getenv("CV_RELEVANCE_SCORER", "lexical")).lower()
+    if scorer not in SCORERS:
+        logger.warning(f"Unknown relevance scorer {scorer!r}, using lexical")
+        return "lexical"
+    return scorer
+
+
+def get_top_k(key: str) -> int:
+    env_var, default = RANKED_KEYS[key]
+    return int(os.getenv(env_var, default))
+
+
+def estimate_tokens(value) -> int:
+    """Rough prompt token count of a value as the section prompts embed it (about four characters per token)."""
+    import yaml
+    text = value if isinstance(value, str) else yaml.dump(value)
+    return math.ceil(len(text) / 4)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def flatten(value) -> str:
+    """All the strings inside a nested profile entry, joined with spaces."""
+    if isinstance(value, dict):
+        return " ".join(flatten(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return " ".join(flatten(item) for item in value)
+    return "" if value is None else str(value)
+
+
+def latex_to_text(content: str) -> str:
+    """Drop LaTeX commands, inline math and braces, leaving the words a reader sees."""
+    return LATEX_COMMAND_PATTERN.sub(" ", content)
+
+
+def parse_job_description(job_description: Union[Dict, str]) -> Union[Dict, str]:
+    """Recover the processed job dict from its str() form, which is what CVReducer is handed."""
+    if isinstance(job_description, str):
+        try:
+            parsed = ast.literal_eval(job_description.strip())
+        except (ValueError, SyntaxError, MemoryError, RecursionError):
+            return job_description
+        return parsed if isinstance(parsed, dict) else job_description
+    return job_description
+
+
+def get_job_terms(processed_job_info: Union[Dict, str]) -> Counter:
+    """Weight every term of the processed job description by the fields it appears in."""
+    processed_job_info = parse_job_description(processed_job_info)
+    if isinstance(processed_job_info, str):
+        return Counter(set(tokenize(processed_job_info)))
+    terms = Counter()
+    for field, value in processed_job_info.items():
+        weight = JOB_FIELD_WEIGHTS.get(field, 1.0)
+        for token in set(tokenize(flatten(value))):
+            terms[token] += weight
+    return terms
+
+
+def score_text(text: str, job_terms: Counter) -> float:
+    """Summed weight of the job terms the text mentions, damped so long entries do not win on length alone."""
+    tokens = set(tokenize(text))
+    if not tokens:
+        return 0.0
+    return sum(job_terms[token] for token in tokens) / math.sqrt(len(tokens))
+
+
+class BM25Scorer:
+    """
+    Okapi BM25 of a set of documents (sections or items of one CV) against weighted job terms.
+
+    Term statistics come from the documents themselves, so a skill every item mentions counts for less
+    than one that singles an item out. Scores are rescaled so the best document gets MAX_SCORE and a
+    document matching nothing gets MIN_SCORE.
+    """
+
+    def __init__(self, job_terms: Counter, k1: float = 1.5, b: float = 0.75):
+        self.job_terms = job_terms
+        self.k1 = k1
+        self.b = b
+
+    def raw_scores(self, documents: Sequence[str]) -> List[float]:
+        tokenized = [tokenize(latex_to_text(document)) for document in documents]
+        if not tokenized:
+            return []
+        average_length = sum(len(tokens) for tokens in tokenized) / len(tokenized) or 1.0
+        document_frequency = Counter(token for tokens in tokenized for token in set(tokens))
+        count = len(tokenized)
+
+        scores = []
+        for tokens in tokenized:
+            frequencies = Counter(tokens)
+            length_norm = self.k1 * (1 - self.b + self.b * len(tokens) / average_length)
+            score = 0.0
+            for term, frequency in frequencies.items():
+                weight = self.job_terms.get(term)
+                if not weight:
+                    continue
+                idf = math.log(1 + (count - document_frequency[term] + 0.5) / (document_frequency[term] + 0.5))
+                score += weight * idf * frequency * (self.k1 + 1) / (frequency + length_norm)
+            scores.append(score)
+        return scores
+
+    def scores(self, documents: Sequence[str]) -> List[float]:
+        raw = self.raw_scores(documents)
+        best = max(raw, default=0.0)
+        if best <= 0:
+            return [DEFAULT_SCORE] * len(raw)
+        return [MIN_SCORE + (MAX_SCORE - MIN_SCORE) * score / best for score in raw]
+
+
+def score_documents(documents: Sequence[str], job_description: Union[Dict, str]) -> List[float]:
+    """Lexical 1-10 relevance of each document to the job description."""
+    return BM25Scorer(get_job_terms(job_description)).scores(documents)
+
+
+def break_ties(scores: List[float], tiebreak: Callable[[List[int]], Dict[int, float]]) -> List[float]:
+    """
+    Let a slower scorer order documents whose lexical scores are within TIE_MARGIN of each other.
+
+    tiebreak is only asked about the tied documents, and its 1-10 scores move a document by less than
+    TIE_MARGIN, so they never reorder documents the lexical scores already separate.
+    """
+    order = sorted(range(len(scores)), key=lambda index: scores[index])
+    tied = set()
+    for lower, higher in zip(order, order[1:]):
+        if scores[higher] - scores[lower] < TIE_MARGIN:
+            tied.update((lower, higher))
+    if not tied:
+        return list(scores)
+
+    tiebreak_scores = tiebreak(sorted(tied))
+    combined = list(scores)
+    for index, score in tiebreak_scores.items():
+        combined[index] = scores[index] + (score - DEFAULT_SCORE) / (MAX_SCORE - MIN_SCORE) * TIE_MARGIN / 2
+    return combined
+
+
+def rank_entries(entries: List, job_terms: Counter) -> List[int]:
+    """Indices of entries from most to least relevant; ties keep profile order."""
+    scores = [score_text(flatten(entry), job_terms) for entry in entries]
+    return sorted(range(len(entries)), key=lambda index: (-scores[index], index))
+
+
+def select_top_k(key: str, entries: List, job_terms: Counter, top_k: Optional[int] = None) -> List:
+    top_k = get_top_k(key) if top_k is None else top_k
+    if len(entries) <= top_k:
+        return entries
+    kept = rank_entries(entries, job_terms)[:top_k]
+    if key in CHRONOLOGICAL_KEYS:
+        kept.sort()
+    return [entries[index] for index in kept]
+
+
+def select_profile(info: Dict, section: str, processed_job_info: Dict) -> Dict:
+    """
+    The slice of info.yml a section prompt needs, with roles, projects and skills cut to the top-k most
+    relevant to the job. Skills are drawn from the roles and projects too, so the skills section only
+    gets those parts of them.
+    """
+    job_terms = get_job_terms(processed_job_info)
+    profile = {}
+    for key in SECTION_PROFILE_KEYS.get(section, []):
+        value = info.get(key)
+        if not value:
+            continue
+        if isinstance(value, list) and key in RANKED_KEYS:
+            value = select_top_k(key, value, job_terms)
+        if section == 'technical_skills' and key == 'experience_details':
+            value = [{'position': role.get('position'), 'skills_acquired': role.get('skills_acquired', [])}
+                     for role in value if isinstance(role, dict)]
+        profile[key] = value
+    return profile
+
+
+def slice_profile(info: Dict, section: str, processed_job_info: Dict):
+    """
+    The profile data to put in a section prompt, logging the estimated prompt tokens saved.
+
+    Falls back to what the prompts got before slicing (the section's *_details entry or the whole profile)
+    when slicing is disabled or finds nothing for the section.
+    """
+    unsliced = info.get(f"{section}_details", info)
+    if not is_profile_slicing_enabled():
+        return unsliced
+    profile = select_profile(info, section, processed_job_info)
+    if not profile:
+        return unsliced
+    if section == 'education':
+        profile = profile['education_details']
+
+    before, after = estimate_tokens(unsliced), estimate_tokens(profile)
+    logger.info(f"Profile slice for {section}: ~{after} prompt tokens instead of ~{before} ({before - after} saved)")
+    return profile
+
+
+def slice_job_info(processed_job_info: Dict, section: str) -> Dict:
+    """
+    The fields of the processed job description a section prompt needs, logging the estimated prompt
+    tokens saved. Falls back to the whole job description when slicing is disabled or finds nothing.
+    """
+    if not is_profile_slicing_enabled() or not isinstance(processed_job_info, dict):
+        return processed_job_info
+    job_info = {key: processed_job_info[key] for key in SECTION_JOB_KEYS.get(section, [])
+                if processed_job_info.get(key)}
+    if not job_info:
+        return processed_job_info
+
+    before, after = estimate_tokens(processed_job_info), estimate_tokens(job_info)
+    logger.info(f"Job description slice for {section}: ~{after} prompt tokens instead of ~{before} ({before - after} saved)")
+    return job_info
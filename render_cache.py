@@ -0,0 +1,188 @@
+import os
+import re
+import shutil
+import hashlib
+import argparse
+import threading
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from latex_format import get_pdflatex_version
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "latex", "renders")
+DEFAULT_MAX_BYTES = 200 * 1024 * 1024
+# What a compile leaves behind that later steps read: the PDF and the log the compile report is parsed from
+RENDER_FILES = ('main.pdf', 'main.log')
+# A -draftmode compile writes no PDF, and only needs the log back
+DRAFT_FILES = ('main.log',)
+INPUT_PATTERN = re.compile(r"^[^%\n]*?\\(?:input|include)\{([^{}]+)\}", re.MULTILINE)
+
+
+def is_enabled() -> bool:
+    return os.getenv("LATEX_RENDER_CACHE", "1").lower() not in ("0", "false", "no")
+
+
+def find_inputs(output_dir: str, filename: str = 'main.tex', seen: Optional[set] = None) -> List[str]:
+    """filename and every file it pulls in with \\input or \\include, recursively, relative to output_dir."""
+    seen = set() if seen is None else seen
+    seen.add(filename)
+    files = [filename]
+    try:
+        with open(os.path.join(output_dir, filename), 'r') as file:
+            content = file.read()
+    except (FileNotFoundError, UnicodeDecodeError):
+        return files
+    for name in INPUT_PATTERN.findall(content):
+        name = name.strip()
+        if not os.path.splitext(name)[1]:
+            name += '.tex'
+        if name not in seen:
+            files.extend(find_inputs(output_dir, name, seen))
+    return files
+
+
+class RenderCache:
+    """
+    Compiled PDFs and their logs, keyed by a hash of everything pdflatex reads from the output directory:
+    main.tex, the files it inputs, resume.cls and the pdflatex version.
+
+    Each entry is a directory holding the files in RENDER_FILES, or only the log if the inputs have only
+    been draft compiled so far. A compile whose inputs are byte-identical to an earlier one copies them
+    back instead of running pdflatex. Files are written under a scratch name and renamed into place, so
+    concurrent compiles never see a partial file, and the least recently used entries are evicted once
+    the cache exceeds max_bytes.
+    """
+
+    def __init__(self, path: str = DEFAULT_CACHE_DIR, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        os.makedirs(path, exist_ok=True)
+
+    def make_key(self, output_dir: str) -> Optional[str]:
+        """Hash of the compile's inputs, or None if output_dir has no main.tex."""
+        if not os.path.exists(os.path.join(output_dir, 'main.tex')):
+            return None
+        digest = hashlib.sha256(get_pdflatex_version().encode('utf-8'))
+        for filename in find_inputs(output_dir) + ['resume.cls']:
+            digest.update(b"\0" + filename.encode('utf-8') + b"\0")
+            try:
+                with open(os.path.join(output_dir, filename), 'rb') as file:
+                    digest.update(file.read())
+            except FileNotFoundError:
+                digest.update(b"\0missing")
+        return digest.hexdigest()
+
+    def restore(self, key: str, output_dir: str, files: Tuple[str, ...] = RENDER_FILES) -> bool:
+        """Copy files of a cached render into output_dir; False if any of them is not cached."""
+        entry = os.path.join(self.path, key)
+        if not all(os.path.exists(os.path.join(entry, filename)) for filename in files):
+            self.misses += 1
+            return False
+        try:
+            for filename in files:
+                # Copies, not links: the next pdflatex run rewrites these files in place
+                shutil.copyfile(os.path.join(entry, filename), os.path.join(output_dir, filename))
+            os.utime(entry)
+        except OSError:
+            self.misses += 1
+            return False
+        self.hits += 1
+        logger.debug(f"Render cache hit for {key[:12]}")
+        return True
+
+    def store(self, key: str, output_dir: str, files: Tuple[str, ...] = RENDER_FILES) -> None:
+        """Add the files a compile left in output_dir to the entry for its inputs."""
+        entry = os.path.join(self.path, key)
+        missing = [filename for filename in files if not os.path.exists(os.path.join(entry, filename))]
+        if not missing:
+            return
+        for filename in missing:
+            path = os.path.join(entry, filename)
+            staged = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            try:
+                os.makedirs(entry, exist_ok=True)
+                shutil.copyfile(os.path.join(output_dir, filename), staged)
+                os.replace(staged, path)
+            except OSError as e:
+                logger.debug(f"Not caching {filename} of render {key[:12]}: {str(e)}")
+                if os.path.exists(staged):
+                    os.remove(staged)
+                return
+        with self._lock:
+            self._evict()
+
+    def _entries(self) -> List[tuple]:
+        """(last used, size, path) of every complete entry."""
+        entries = []
+        for name in os.listdir(self.path):
+            entry = os.path.join(self.path, name)
+            if not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, filename)) for filename in os.listdir(entry))
+                entries.append((os.path.getmtime(entry), size, entry))
+            except OSError:
+                continue
+        return entries
+
+    def _evict(self) -> None:
+        entries = self._entries()
+        total_size = sum(size for _, size, _ in entries)
+        if total_size <= self.max_bytes:
+            return
+
+        evicted = 0
+        for _, size, entry in sorted(entries):
+            if total_size <= self.max_bytes:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total_size -= size
+            evicted += 1
+        logger.debug(f"Evicted {evicted} entries from render cache")
+
+    def clear(self) -> None:
+        with self._lock:
+            for _, _, entry in self._entries():
+                shutil.rmtree(entry, ignore_errors=True)
+
+    def stats(self) -> Dict[str, int]:
+        entries = self._entries()
+        return {"hits": self.hits, "misses": self.misses, "entries": len(entries),
+                "bytes": sum(size for _, size, _ in entries)}
+
+
+_cache: Optional[RenderCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_render_cache() -> Optional[RenderCache]:
+    """Return the process-wide cache, configured from LATEX_RENDER_CACHE_* variables, or None if disabled."""
+    global _cache
+    if not is_enabled():
+        return None
+    with _cache_lock:
+        if _cache is None:
+            _cache = RenderCache(
+                path=os.getenv("LATEX_RENDER_CACHE_DIR", DEFAULT_CACHE_DIR),
+                max_bytes=int(os.getenv("LATEX_RENDER_CACHE_MAX_BYTES", DEFAULT_MAX_BYTES)),
+            )
+        return _cache
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Inspect or clear the cache of compiled CVs")
+    parser.add_argument("action", choices=["stats", "clear"], help="Action to perform")
+    args = parser.parse_args()
+
+    cache = get_render_cache() or RenderCache(os.getenv("LATEX_RENDER_CACHE_DIR", DEFAULT_CACHE_DIR))
+    if args.action == "stats":
+        logger.info(f"Render cache at {cache.path}: {cache.stats()}")
+    elif args.action == "clear":
+        cache.clear()
+        logger.success(f"Cleared render cache at {cache.path}")
+
+
+if __name__ == "__main__":
+    main()
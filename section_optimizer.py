@@ -0,0 +1,242 @@
+import os
+import re
+import copy
+import json
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from loguru import logger
+from knapsack_reducer import parse_section
+from latex_lexer import scan_latex
+from metrics import bind_context
+from section_renderer import SECTION_TEMPLATES, load_section_data, render_section, save_section_data
+from utils import chat_completion, hash_text, parse_json_response
+
+# Content hashes of the sections as they were after their last optimization, per output directory
+STATE_FILE = 'optimized_sections.json'
+EDIT_SCHEMA = ('{"edits": [{"op": "replace_bullet", "entry": 1, "bullet": 2, "text": "..."}, '
+               '{"op": "drop_item", "entry": 2, "bullet": 3}, {"op": "drop_item", "entry": 3}]}')
+ITEM_PREFIX_PATTERN = re.compile(r"^(\s*\\item(?:\[[^\]]*\])?\s*)")
+
+# A section as the model sees it: (entry header, its bullets) pairs; a skills list is one entry without a header
+Outline = List[Tuple[str, List[str]]]
+
+
+@dataclass
+class Edit:
+    op: str
+    # Zero-based; bullet is None when a whole entry is dropped
+    entry: int
+    bullet: Optional[int] = None
+    text: str = ""
+
+
+def format_outline(outline: Outline) -> str:
+    lines = []
+    for entry_number, (header, bullets) in enumerate(outline, 1):
+        lines.append(f"[{entry_number}] {header or '(list)'}")
+        lines.extend(f"  [{entry_number}.{bullet_number}] {bullet}" for bullet_number, bullet in enumerate(bullets, 1))
+    return "\n".join(lines)
+
+
+def parse_edits(response, outline: Outline) -> List[Edit]:
+    """
+    The valid edits of a model response, numbered from zero. Edits that point at nothing, repeat an
+    earlier edit, or would leave an entry without bullets or the section without entries are ignored.
+    """
+    raw_edits = response.get('edits') if isinstance(response, dict) else None
+    edits: List[Edit] = []
+    dropped_entries, dropped_bullets, replaced = set(), {}, set()
+    for raw in raw_edits if isinstance(raw_edits, list) else []:
+        try:
+            op, entry = raw['op'], int(raw['entry']) - 1
+            bullet = int(raw['bullet']) - 1 if raw.get('bullet') is not None else None
+        except (KeyError, TypeError, ValueError):
+            logger.warning(f"Ignoring malformed edit {raw}")
+            continue
+        if not 0 <= entry < len(outline) or entry in dropped_entries or \
+                (bullet is not None and not 0 <= bullet < len(outline[entry][1])):
+            logger.warning(f"Ignoring edit of a missing item: {raw}")
+            continue
+        bullets = dropped_bullets.setdefault(entry, set())
+        if op == 'replace_bullet' and bullet is not None and str(raw.get('text') or '').strip():
+            if bullet not in bullets and (entry, bullet) not in replaced:
+                replaced.add((entry, bullet))
+                edits.append(Edit(op, entry, bullet, " ".join(str(raw['text']).split())))
+        elif op == 'drop_item' and bullet is not None:
+            if bullet not in bullets and len(bullets) + 1 < len(outline[entry][1]):
+                bullets.add(bullet)
+                edits.append(Edit(op, entry, bullet))
+        elif op == 'drop_item' and outline[entry][0] and len(dropped_entries) + 1 < len(outline):
+            dropped_entries.add(entry)
+            edits.append(Edit(op, entry))
+        else:
+            logger.warning(f"Ignoring edit {raw}")
+    # An entry that is dropped as a whole needs none of its other edits
+    return [edit for edit in edits if edit.bullet is None or edit.entry not in dropped_entries]
+
+
+def apply_latex_edits(section: str, content: str, edits: List[Edit]) -> str:
+    """Apply edits to a section's LaTeX line by line, leaving every line they do not touch as it was."""
+    entries = parse_section(section, content)
+    lines = content.split('\n')
+    removed = set()
+    for edit in edits:
+        entry = entries[edit.entry]
+        if edit.bullet is None:
+            removed.update(entry.line_indices)
+        elif edit.op == 'drop_item':
+            removed.add(entry.items[edit.bullet].line_index)
+        else:
+            index = entry.items[edit.bullet].line_index
+            prefix = ITEM_PREFIX_PATTERN.match(lines[index])
+            lines[index] = (prefix.group(1) if prefix else "") + scan_latex(edit.text).fixed
+    return '\n'.join(line for index, line in enumerate(lines) if index not in removed)
+
+
+def get_data_entries(section: str, data: Dict) -> List[Dict]:
+    template = SECTION_TEMPLATES[section]
+    if template.separator is None:
+        return [data]
+    return [entry for entry in data.get('entries') or [] if isinstance(entry, dict)]
+
+
+def data_outline(section: str, data: Dict) -> Outline:
+    template = SECTION_TEMPLATES[section]
+    outline = []
+    for entry in get_data_entries(section, data):
+        header = " | ".join(str(entry.get(key)) for key in template.fields.values()
+                            if entry.get(key) and key != template.items) if template.separator is not None else ""
+        items = (entry.get(template.items) or []) if template.items else []
+        outline.append((header, [str(item) for item in ([items] if isinstance(items, str) else items)]))
+    return outline
+
+
+def apply_data_edits(section: str, data: Dict, edits: List[Edit]) -> Dict:
+    template = SECTION_TEMPLATES[section]
+    data = copy.deepcopy(data)
+    entries = get_data_entries(section, data)
+    removed_entries, removed_items = set(), {}
+    for edit in edits:
+        if edit.bullet is None:
+            removed_entries.add(edit.entry)
+            continue
+        items = entries[edit.entry][template.items]
+        if isinstance(items, str):
+            items = entries[edit.entry][template.items] = [items]
+        if edit.op == 'drop_item':
+            removed_items.setdefault(edit.entry, set()).add(edit.bullet)
+        else:
+            items[edit.bullet] = edit.text
+    for index, entry in enumerate(entries):
+        if index in removed_items:
+            entry[template.items] = [item for position, item in enumerate(entry[template.items])
+                                     if position not in removed_items[index]]
+    if template.separator is not None:
+        data['entries'] = [entry for index, entry in enumerate(entries) if index not in removed_entries]
+    return data
+
+
+class SectionOptimizer:
+    """
+    Improve each section with a few targeted edits instead of having the model rewrite the whole CV.
+
+    Every section is sent on its own, as a numbered outline of its entries and bullets, and the model
+    answers with edits (replace bullet N of entry M, drop a bullet or an entry) that are applied locally,
+    so a response that drifts from the expected shape can lose no content. Sections are optimized
+    concurrently, and a section is skipped when it is unchanged since it was last optimized for the
+    same job description. Sections generated as data (see section_renderer.py) are edited as data and
+    rendered again; the others are edited line by line in their LaTeX.
+    """
+
+    def __init__(self, output_dir: str, job_description: str, sections: List[str], use_data: bool = False,
+                 max_workers: int = 4):
+        self.output_dir = output_dir
+        self.job_description = job_description
+        self.sections = sections
+        self.use_data = use_data
+        self.max_workers = max_workers
+
+    def optimize(self) -> Dict[str, int]:
+        """Optimize every changed section; returns the number of edits applied per section."""
+        state = self.load_state()
+        pending = [section for section in self.sections
+                   if os.path.exists(self.section_path(section)) and state.get(section) != self.content_hash(section)]
+        skipped = [section for section in self.sections if section not in pending]
+        if skipped:
+            logger.info(f"Sections unchanged since their last optimization: {', '.join(skipped)}")
+        if not pending:
+            return {}
+
+        with ThreadPoolExecutor(max_workers=max(1, min(self.max_workers, len(pending)))) as executor:
+            applied = dict(zip(pending, executor.map(bind_context(self.optimize_section), pending)))
+        for section in pending:
+            state[section] = self.content_hash(section)
+        self.save_state(state)
+        logger.info(f"CV content optimized: {applied}")
+        return applied
+
+    def optimize_section(self, section: str) -> int:
+        data = load_section_data(self.output_dir, section) if self.use_data else None
+        with open(self.section_path(section), 'r') as file:
+            content = file.read()
+        outline = data_outline(section, data) if data is not None else \
+            [(entry.header, [item.text for item in entry.items]) for entry in parse_section(section, content)]
+        if not any(bullets for _, bullets in outline):
+            return 0
+
+        prompt = f"""
+        Suggest targeted edits that make this CV section more relevant, concise and impactful for the job description.
+        Only suggest edits that clearly improve the section, using only facts it already contains; return no edits if it is already strong.
+        "replace_bullet" rewrites one bullet; "drop_item" removes one bullet, or a whole entry when no bullet is given.
+        Entries and bullets are numbered as in the section below.
+
+        Job Description:
+        {self.job_description}
+
+        Section ({section}):
+        {format_outline(outline)}
+
+        Return only JSON of the form:
+        {EDIT_SCHEMA}
+        """
+        try:
+            response = parse_json_response(chat_completion("You are an expert in CV optimization.", prompt, stage="optimize"))
+        except json.JSONDecodeError as e:
+            logger.error(f"Failed to parse edits for {section}, leaving it unchanged: {e}")
+            return 0
+
+        edits = parse_edits(response, outline)
+        if not edits:
+            return 0
+        if data is not None:
+            data = apply_data_edits(section, data, edits)
+            save_section_data(self.output_dir, section, data)
+            content = render_section(section, data)
+        else:
+            content = apply_latex_edits(section, content, edits)
+        with open(self.section_path(section), 'w') as file:
+            file.write(content)
+        logger.info(f"Applied {len(edits)} edits to {section}")
+        return len(edits)
+
+    def section_path(self, section: str) -> str:
+        return os.path.join(self.output_dir, f"{section}.tex")
+
+    def content_hash(self, section: str) -> Optional[str]:
+        try:
+            with open(self.section_path(section), 'r') as file:
+                return hash_text(f"{self.job_description}\0{file.read()}")
+        except FileNotFoundError:
+            return None
+
+    def load_state(self) -> Dict[str, str]:
+        try:
+            with open(os.path.join(self.output_dir, STATE_FILE), 'r') as file:
+                return json.load(file)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def save_state(self, state: Dict[str, str]) -> None:
+        with open(os.path.join(self.output_dir, STATE_FILE), 'w') as file:
+            json.dump(state, file, indent=2)
@@ -0,0 +1,166 @@
+import os
+import re
+import json
+import argparse
+import functools
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+from loguru import logger
+from latex_lexer import escape_latex
+
+# Placeholders such as [Company Name] or [Skill 3]; the number only tells repeated item lines apart
+PLACEHOLDER_PATTERN = re.compile(r"\[([A-Z][A-Za-z ]*?)(?: \d+)?\]")
+
+
+@dataclass
+class SectionTemplate:
+    path: str
+    # Placeholder name -> data key of an entry
+    fields: Dict[str, str]
+    # Key of the list rendered once per \item line of the template
+    items: Optional[str] = None
+    # Text between entries in the template; None when the section body is a single block
+    separator: Optional[str] = None
+    # Placeholders whose value goes into the LaTeX unescaped
+    raw_fields: Tuple[str, ...] = ()
+
+
+SECTION_TEMPLATES = {
+    'work_experience': SectionTemplate(
+        'cv_template/sections/work_experience.tex',
+        {'Company Name': 'company', 'Job Title': 'title', 'Start Date': 'start', 'End Date': 'end'},
+        items='bullets', separator='\n\n'),
+    'education': SectionTemplate(
+        'cv_template/sections/education.tex',
+        {'Institution Name': 'institution', 'Degree Title': 'degree', 'Start Date': 'start', 'End Date': 'end',
+         'Grade': 'grade'},
+        separator='\n\\vspace{0.25cm}\\\\\n'),
+    'projects': SectionTemplate(
+        'cv_template/sections/projects/template.tex',
+        {'Project Name': 'name', 'Technologies': 'technologies', 'URL': 'url', 'URL Text': 'url_text'},
+        items='bullets', separator='\n\n', raw_fields=('URL',)),
+    'technical_skills': SectionTemplate(
+        'cv_template/sections/technical_skills.tex', {'Skill': 'skill'}, items='skills'),
+}
+
+# The JSON each section generator asks the model for
+SECTION_SCHEMAS = {
+    'work_experience': '{"entries": [{"company": "...", "title": "...", "start": "MMM YYYY", "end": "MMM YYYY or Present", "bullets": ["..."]}]}',
+    'education': '{"entries": [{"institution": "...", "degree": "...", "start": "MMM YYYY", "end": "MMM YYYY", "grade": "..."}]}',
+    'projects': '{"entries": [{"name": "...", "technologies": ["..."], "url": "https://...", "bullets": ["..."]}]}',
+    'technical_skills': '{"skills": ["..."]}',
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_section_template(section: str) -> Tuple[str, str, str]:
+    """Split a section template into its header line, the LaTeX of one entry and its footer line."""
+    template = SECTION_TEMPLATES[section]
+    with open(template.path, 'r') as file:
+        lines = file.read().strip().split('\n')
+    body = '\n'.join(lines[1:-1]).strip('\n')
+    entry = body.split(template.separator)[0].strip('\n') if template.separator else body
+    return lines[0], entry, lines[-1]
+
+
+def to_latex(value) -> str:
+    """Plain text from the model as LaTeX: lists are comma separated and every special character is escaped."""
+    if isinstance(value, (list, tuple)):
+        value = ", ".join(str(item) for item in value if item)
+    text = " ".join(str(value or "").split())
+    return escape_latex(text)
+
+
+def get_values(template: SectionTemplate, entry: Dict) -> Dict[str, str]:
+    values = {}
+    for placeholder, key in template.fields.items():
+        value = entry.get(key)
+        if key == 'url_text' and not value:
+            value = re.sub(r"^https?://(www\.)?", "", str(entry.get('url') or "")).rstrip('/')
+        if placeholder in template.raw_fields:
+            values[placeholder] = str(value or "").strip().translate({ord('{'): None, ord('}'): None})
+        else:
+            values[placeholder] = to_latex(value)
+    return values
+
+
+def render_entry(template: SectionTemplate, entry_template: str, entry: Dict) -> str:
+    """
+    Fill one entry of a template. The template's run of \\item lines becomes one line per item, and a
+    line whose placeholders all came out empty (a project without a URL, say) is left out.
+    """
+    values = get_values(template, entry)
+    items = (entry.get(template.items) or []) if template.items else []
+    if isinstance(items, str):
+        items = [items]
+    lines, items_rendered = [], False
+    for line in entry_template.split('\n'):
+        if template.items and line.strip().startswith('\\item'):
+            if not items_rendered:
+                items_rendered = True
+                for item in items:
+                    text = to_latex(item)
+                    if not text:
+                        continue
+                    if PLACEHOLDER_PATTERN.search(line):
+                        lines.append(PLACEHOLDER_PATTERN.sub(lambda match: text, line, count=1))
+                    else:
+                        lines.append(f"{line.rstrip()} {text}")
+            continue
+        placeholders = PLACEHOLDER_PATTERN.findall(line)
+        if placeholders and not any(values.get(name) for name in placeholders):
+            continue
+        lines.append(PLACEHOLDER_PATTERN.sub(lambda match: values.get(match.group(1), match.group(0)), line))
+    return '\n'.join(lines)
+
+
+def render_section(section: str, data: Dict) -> str:
+    """Render section data (the shape in SECTION_SCHEMAS) into the section's LaTeX template."""
+    template = SECTION_TEMPLATES[section]
+    header, entry_template, footer = load_section_template(section)
+    if template.separator is None:
+        body = render_entry(template, entry_template, data)
+    else:
+        entries = [entry for entry in data.get('entries') or [] if isinstance(entry, dict)]
+        body = template.separator.join(render_entry(template, entry_template, entry) for entry in entries)
+    return f"{header}\n{body}\n{footer}"
+
+
+def save_section_data(output_dir: str, section: str, data: Dict) -> None:
+    with open(os.path.join(output_dir, f"{section}.json"), 'w') as file:
+        json.dump(data, file, indent=2)
+
+
+def load_section_data(output_dir: str, section: str) -> Optional[Dict]:
+    """
+    The data a section was rendered from, or None if there is none or the .tex has since been edited
+    (by a reducer, say), so the data no longer describes it.
+    """
+    data_path = os.path.join(output_dir, f"{section}.json")
+    tex_path = os.path.join(output_dir, f"{section}.tex")
+    if not os.path.exists(data_path) or not os.path.exists(tex_path):
+        return None
+    with open(data_path, 'r') as file:
+        data = json.load(file)
+    with open(tex_path, 'r') as file:
+        content = file.read()
+
+    def lines(text):
+        return [line for line in text.splitlines() if line.strip()]
+    return data if lines(render_section(section, data)) == lines(content) else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render section data into its LaTeX template")
+    parser.add_argument("section", choices=list(SECTION_TEMPLATES), help="Section to render")
+    parser.add_argument("data", help="Path to the section's JSON data")
+    args = parser.parse_args()
+
+    with open(args.data, 'r') as file:
+        data = json.load(file)
+    logger.info(f"Rendering {args.section} from {args.data}")
+    print(render_section(args.section, data))
+
+
+if __name__ == "__main__":
+    main()
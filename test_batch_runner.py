@@ -0,0 +1,29 @@
+import json
+from batch_runner import load_batch_jobs
+
+
+def test_load_batch_jobs_from_directory(tmp_path):
+    (tmp_path / "acme backend.txt").write_text("Backend role")
+    (tmp_path / "notes.pdf").write_text("ignored")
+    (tmp_path / "globex.md").write_text("Data role")
+
+    jobs = load_batch_jobs(str(tmp_path))
+    assert [(job.name, job.job_description) for job in jobs] == [
+        ("acme_backend", "Backend role"), ("globex", "Data role")
+    ]
+
+
+def test_load_batch_jobs_from_jsonl(tmp_path):
+    path = tmp_path / "jobs.jsonl"
+    path.write_text("\n".join([
+        json.dumps({"name": "Acme", "job_description": "Backend role"}),
+        "",
+        json.dumps({"id": "Acme", "text": "Another role"}),
+        json.dumps({"name": "empty"}),
+        json.dumps({"description": "Unnamed role"}),
+    ]))
+
+    jobs = load_batch_jobs(str(path))
+    assert [job.name for job in jobs] == ["Acme", "Acme_2", "job_5"]
+    assert jobs[1].job_description == "Another role"
+    assert jobs[2].source.endswith(":5")
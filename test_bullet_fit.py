@@ -0,0 +1,76 @@
+import os
+import json
+import subprocess
+import bullet_fit
+from bullet_fit import BulletMeasurement, fit_bullet_widths, measure_bullets
+
+SECTION = r'''\begin{rSection}{Experience}
+{\bf Acme} \hfill {2020 - 2023}
+\begin{itemize}
+    \item[$\bullet$] Cut build times by 40\% across 12 services
+    \item[$\bullet$] Wrote tests
+\end{itemize}
+\end{rSection}'''
+
+def test_measurement_lines_and_spill():
+    near_miss = BulletMeasurement("work_experience", 3, "x" * 120, 630.0, 300.0)
+    assert (near_miss.lines, near_miss.spill_pt) == (3, 30.0)
+    assert near_miss.wraps_by_small_margin()
+    # 30pt spill at 5.25pt a character, plus the margin of two
+    assert near_miss.characters_to_cut() == 8
+
+    half_line = BulletMeasurement("work_experience", 4, "x" * 100, 450.0, 300.0)
+    assert (half_line.lines, half_line.spill_pt) == (2, 150.0)
+    assert not half_line.wraps_by_small_margin() and half_line.wraps_by_small_margin(tolerance=0.5)
+    assert not BulletMeasurement("work_experience", 5, "x", 0.0, 300.0).wraps_by_small_margin(tolerance=1.0)
+
+def test_measure_bullets_reads_widths_from_the_log(tmp_path, monkeypatch):
+    monkeypatch.setenv("LATEX_PRECOMPILED_FORMAT", "0")
+    (tmp_path / "main.tex").write_text("\\documentclass{resume}\n\\begin{document}\n\\input{work_experience}\n\\end{document}")
+    (tmp_path / "work_experience.tex").write_text(SECTION)
+    instrumented, commands = [], []
+
+    def run(command, cwd, **kwargs):
+        commands.append(command)
+        with open(os.path.join(cwd, "work_experience.tex")) as file:
+            instrumented.append(file.read())
+        with open(os.path.join(cwd, "main.log"), "w") as file:
+            file.write("CVMEASURE:work_experience.3:630.0pt:300.0pt\n"
+                       "CVMEASURE:work_experience.4:45.5pt:300.0pt\n"
+                       # Not a bullet of the section, and a box measured without a line width
+                       "CVMEASURE:work_experience.1:10.0pt:300.0pt\n"
+                       "CVMEASURE:projects.3:10.0pt:0.0pt\n")
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    measurements = measure_bullets(str(tmp_path))
+
+    assert "-draftmode" in commands[0]
+    assert "\\item[$\\bullet$] \\cvmeasure{work_experience.3}{Cut build times by 40\\% across 12 services}" in instrumented[0]
+    assert [(m.line_index, m.text, m.lines) for m in measurements] == [
+        (3, "Cut build times by 40\\% across 12 services", 3), (4, "Wrote tests", 1)]
+    # The scratch copy is measured; the section itself is left as it was
+    assert (tmp_path / "work_experience.tex").read_text() == SECTION
+
+def test_shortened_bullets_are_spliced_back(tmp_path, monkeypatch):
+    (tmp_path / "work_experience.tex").write_text(SECTION)
+    text = "Cut build times by 40\\% across 12 services"
+    measurements = [BulletMeasurement("work_experience", 3, text, 315.0, 300.0),
+                    BulletMeasurement("work_experience", 4, "Wrote tests", 310.0, 300.0)]
+    monkeypatch.setattr(bullet_fit, "measure_bullets", lambda output_dir: measurements)
+    prompts = []
+
+    def fake_chat_completion(system_message, prompt, **kwargs):
+        prompts.append(prompt)
+        # The second bullet comes back longer than its limit, so it is kept
+        return json.dumps([{"index": 0, "text": "- Cut builds 40% & tests on 12 apps"},
+                           {"index": 1, "text": "Wrote many unit and integration tests"}])
+
+    monkeypatch.setattr(bullet_fit, "chat_completion", fake_chat_completion)
+    assert fit_bullet_widths(str(tmp_path)) == 1
+    assert len(prompts) == 1
+
+    lines = (tmp_path / "work_experience.tex").read_text().split("\n")
+    # Specials the model left unescaped are escaped before the bullet goes back into the LaTeX
+    assert lines[3] == "    \\item[$\\bullet$] Cut builds 40\\% \\& tests on 12 apps"
+    assert lines[:3] + lines[4:] == SECTION.split("\n")[:3] + SECTION.split("\n")[4:]
@@ -0,0 +1,45 @@
+from compile_report import parse_compile_log
+from layout import measure_layout
+
+LOG = r'''This is pdfTeX, Version 3.141592653-2.6-1.40.25 (TeX Live 2023) (preloaded format=pdflatex)
+Overfull \hbox (12.5pt too wide) in paragraph at lines 12--13
+Underfull \vbox (badness 10000) has occurred while \output is active []
+LaTeX Warning: Label(s) may have changed. Rerun to get cross-references right.
+Package hyperref Warning: Token not allowed in a PDF string
+CVLAYOUT:end:2:162.5pt:650.0pt
+Output written on main.pdf (2 pages, 34567 bytes).
+'''
+
+def test_parse_compile_log():
+    report = parse_compile_log(LOG.splitlines(keepends=True))
+
+    assert report.success
+    assert report.pages == 2
+    assert [(box.kind, box.amount, box.line) for box in report.overfull_boxes] == [("hbox", 12.5, 12)]
+    assert [(box.kind, box.amount) for box in report.underfull_boxes] == [("vbox", 10000.0)]
+    assert len(report.warnings) == 2
+    assert report.last_page_fill == 0.25
+
+def test_page_count_falls_back_to_end_mark():
+    report = parse_compile_log(["CVLAYOUT:end:3:10.0pt:650.0pt\n", "No pages of output.\n"])
+    assert report.pages == 3
+
+def test_errors_mark_compile_as_failed():
+    report = parse_compile_log(["! Undefined control sequence.\n", "l.12 \\foo\n"])
+    assert not report.success
+    assert report.errors == ["Undefined control sequence."]
+
+def test_measure_layout_reports_overflow_and_section_heights():
+    report = parse_compile_log([
+        "CVLAYOUT:section:education:1:100.0pt:600.0pt\n",
+        "CVLAYOUT:section:projects:1:250.0pt:600.0pt\n",
+        "CVLAYOUT:end:2:80.0pt:600.0pt\n",
+        "Output written on main.pdf (2 pages, 34567 bytes).\n",
+    ])
+    layout = measure_layout(report, max_pages=1)
+
+    assert layout.overflow_pt == 80.0
+    assert layout.remaining_pt == 0.0
+    assert layout.section_heights == {"education": 150.0, "projects": 430.0}
+
+    assert measure_layout(report, max_pages=2).remaining_pt == 520.0
@@ -0,0 +1,52 @@
+import time
+import asyncio
+import threading
+import pytest
+from cv_generator import CVGenerator
+
+SECTIONS = ["education", "work_experience", "projects", "technical_skills"]
+
+def make_generator(tmp_path, generate_single_section, max_concurrency):
+    generator = CVGenerator({}, {}, str(tmp_path), max_concurrency=max_concurrency)
+    generator.generate_single_section = generate_single_section
+    return generator
+
+def collect(generator, on_token=None):
+    async def run():
+        return [section async for section in generator.generate_sections_async(SECTIONS, on_token=on_token)]
+    return asyncio.run(run())
+
+def test_sections_run_concurrently_up_to_the_limit_and_stream(tmp_path):
+    lock = threading.Lock()
+    running, peak = [0], [0]
+
+    def generate_single_section(section, on_token=None):
+        with lock:
+            running[0] += 1
+            peak[0] = max(peak[0], running[0])
+        on_token(f"{section}:a")
+        time.sleep(0.05)
+        on_token(f"{section}:b")
+        with lock:
+            running[0] -= 1
+
+    tokens = []
+    completed = collect(make_generator(tmp_path, generate_single_section, 2), on_token=lambda *token: tokens.append(token))
+    assert sorted(completed) == sorted(SECTIONS)
+    assert peak[0] == 2
+    for section in SECTIONS:
+        assert [text for name, text in tokens if name == section] == [f"{section}:a", f"{section}:b"]
+
+def test_a_failed_section_cancels_the_sections_still_waiting(tmp_path):
+    started = []
+
+    def generate_single_section(section, on_token=None):
+        started.append(section)
+        if section == "education":
+            raise RuntimeError("model unavailable")
+        time.sleep(0.05)
+
+    with pytest.raises(RuntimeError):
+        collect(make_generator(tmp_path, generate_single_section, 1))
+    # Only the failed section and at most the one it handed its slot to ever start
+    assert started[0] == "education" and len(started) <= 2
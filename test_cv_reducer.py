@@ -3,6 +3,7 @@ import os
 import tempfile
 import shutil
 from dotenv import load_dotenv
+import cv_reducer as cv_reducer_module
 from cv_reducer import CVReducer
 
 # Load environment variables
@@ -168,4 +169,26 @@ def test_reduce_content(cv_reducer, monkeypatch):
         if len(content) < len(cv_reducer.get_section_content(section)):
             reduced_sections += 1
 
-    assert reduced_sections > 0
\ No newline at end of file
+    assert reduced_sections > 0
+
+
+def test_relevance_scores_are_memoized(tmp_path, monkeypatch):
+    reducer = CVReducer(str(tmp_path), job_description="Python developer", scorer="llm")
+    for section in reducer.sections_to_reduce:
+        create_test_section(reducer, section, f"\\begin{{rSection}}{{{section}}}\\end{{rSection}}")
+    prompts = []
+    monkeypatch.setattr(cv_reducer_module, "chat_completion", lambda system, prompt, **kwargs: prompts.append(prompt) or "7")
+
+    reducer.rank_sections()
+    reducer.rank_sections()
+    assert len(prompts) == 3
+
+    # Only the edited section is scored again
+    create_test_section(reducer, 'projects', r"\begin{rSection}{Projects}Flask\end{rSection}")
+    reducer.rank_sections()
+    assert len(prompts) == 4 and "Flask" in prompts[-1]
+
+    # A different job description invalidates every score
+    reducer.job_description = "Go developer"
+    reducer.rank_sections()
+    assert len(prompts) == 7
@@ -0,0 +1,29 @@
+import job_description_processor
+from job_description_processor import get_job_fingerprint, process_job_description
+
+
+def test_fingerprint_ignores_formatting():
+    posted = "Senior ML Engineer!\n• Python, PyTorch\n- Kafka"
+    reposted = "senior ml engineer\n* python; pytorch\n   kafka "
+    assert get_job_fingerprint(posted) == get_job_fingerprint(reposted)
+    assert get_job_fingerprint(posted) != get_job_fingerprint("Senior ML Engineer\nPython, Go")
+    assert get_job_fingerprint("Senior C++ developer") != get_job_fingerprint("Senior C# developer")
+    assert get_job_fingerprint("Senior C++ developer.") == get_job_fingerprint("senior  c++ Developer")
+
+
+def test_process_job_description_uses_single_request(monkeypatch, tmp_path):
+    monkeypatch.chdir(tmp_path)
+    prompts = []
+
+    def fake_chat_completion(system_message, prompt, **kwargs):
+        prompts.append(prompt)
+        return '```json\n{"job_title": "ML Engineer", "essential_requirements": ["Python"]}\n```'
+
+    monkeypatch.setattr(job_description_processor, "chat_completion", fake_chat_completion)
+
+    processed = process_job_description("We need someone to train models.")
+    assert processed["job_title"] == "ML Engineer"
+    assert len(prompts) == 1
+
+    assert process_job_description("we need someone to train models") == processed
+    assert len(prompts) == 1
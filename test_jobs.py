@@ -0,0 +1,68 @@
+import os
+import threading
+from jobs import Job, JobManager
+
+
+def test_jobs_run_in_separate_workspaces(tmp_path, monkeypatch):
+    def fake_generate(self, job):
+        job.progress("Analyzing job description")
+        with open(job.pdf_path, 'w') as file:
+            file.write(job.job_description)
+        job.progress("section:education")
+
+    monkeypatch.setattr(JobManager, "generate", fake_generate)
+    manager = JobManager(root=str(tmp_path), max_workers=2)
+    first, second = manager.submit("first"), manager.submit("second")
+
+    assert list(first.stream()) == ["Analyzing job description", "section:education", "complete"]
+    assert list(second.stream(start=2)) == ["complete"]
+    assert first.workspace != second.workspace
+    with open(second.pdf_path) as file:
+        assert file.read() == "second"
+    manager.shutdown()
+
+
+def test_cancelled_job_stops_at_next_step(tmp_path, monkeypatch):
+    started, release = threading.Event(), threading.Event()
+
+    def fake_generate(self, job):
+        job.progress("Analyzing job description")
+        started.set()
+        release.wait(5)
+        job.progress("section:education")
+
+    monkeypatch.setattr(JobManager, "generate", fake_generate)
+    manager = JobManager(root=str(tmp_path), max_workers=1)
+    job = manager.submit("description")
+    started.wait(5)
+    assert manager.cancel(job.id)
+    release.set()
+
+    assert list(job.stream()) == ["Analyzing job description"]
+    assert job.status == "cancelled"
+    manager.prune(max_age=-1)
+    assert manager.get(job.id) is None
+    assert not os.path.exists(job.workspace)
+    manager.shutdown()
+
+
+def test_streamed_text_is_not_replayed_piece_by_piece():
+    job = Job("id", "description", "workspace")
+    job.emit("Analyzing job description")
+    for piece in ["\\begin{rSection}", "{Education}", "\n"]:
+        job.emit_token("education", piece)
+    job.emit_token("projects", "\\begin")
+
+    live = job.stream(heartbeat=0.01)
+    # A client connecting mid-generation gets each section's text so far in one piece
+    assert [next(live) for _ in range(3)] == [
+        'token:education:"\\\\begin{rSection}{Education}\\n"', 'token:projects:"\\\\begin"', "Analyzing job description"]
+    job.emit_token("education", "x")
+    assert next(live) == 'token:education:"x"'
+
+    job.clear_tokens("education")
+    job.emit("section:education")
+    job.finish("complete")
+    assert list(live) == ["section:education"]
+    assert job.events == ["Analyzing job description", "section:education"]
+    assert job.partial_text == {"projects": "\\begin"}
@@ -0,0 +1,59 @@
+from knapsack_reducer import KnapsackReducer, parse_section
+
+PROJECTS = r'''\begin{rSection}{Projects}
+\vspace{0.12cm}
+{\bf The Forge}
+\hspace{2 cm}{Python, AI}
+\begin{itemize}[label=\myfancylabel, leftmargin=0.5cm]
+    \item[$\bullet$] Built an AI CV generator
+    \item[$\bullet$] Added LaTeX rendering
+    \item[$\bullet$] Wrote a Flask frontend
+\end{itemize}
+\vspace{0.4cm}
+{\bf Evolario}
+\hspace{2 cm}{Python, Games}
+\begin{itemize}[label=\myfancylabel, leftmargin=0.5cm]
+    \item[$\bullet$] Cloned AGAR.IO for AI agents
+    \item[$\bullet$] Tuned agent behaviours
+\end{itemize}
+\end{rSection}'''
+
+SKILLS = r'''\begin{rSection}{Technical Skills}
+\begin{multicols}{2}
+\begin{itemize}[leftmargin=*,nosep]
+\item Python
+\item Flask
+\end{itemize}
+\end{multicols}
+\end{rSection}'''
+
+def test_parse_section_splits_entries_and_items():
+    entries = parse_section('projects', PROJECTS)
+
+    assert [len(entry.items) for entry in entries] == [3, 2]
+    assert entries[0].items[0].text == "Built an AI CV generator"
+    # The separator before the second project belongs to it, so dropping the project drops the gap too
+    assert 9 in entries[1].line_indices
+    assert all(index not in entries[0].line_indices for index in (0, 17))
+
+def test_parse_section_treats_skills_as_one_entry():
+    entries = parse_section('technical_skills', SKILLS)
+
+    assert len(entries) == 1
+    assert not entries[0].droppable
+    assert entries[0].columns == 2
+    assert [item.text for item in entries[0].items] == ["Python", "Flask"]
+
+def test_solve_keeps_most_relevant_items_that_fit(tmp_path):
+    reducer = KnapsackReducer(str(tmp_path), "job")
+    entries = parse_section('projects', PROJECTS)
+    entries[0].score, entries[1].score = 9, 1
+    for item, score in zip(entries[0].items, [9, 8, 1]):
+        item.score = score
+    for item in entries[1].items:
+        item.score = 2
+
+    full_height = sum(reducer.entry_height(entry, len(entry.items), 10.0) for entry in entries)
+    kept = reducer.solve(entries, full_height - 45, 10.0)
+
+    assert kept == [2, 0]
@@ -0,0 +1,52 @@
+from latex_lexer import scan_latex, tokenize
+
+def kinds(content):
+    return [issue.kind for issue in scan_latex(content).issues]
+
+def test_templates_are_valid():
+    for path in ["cv_template/sections/technical_skills.tex", "cv_template/sections/projects/example_project.tex",
+                 "cv_template/sections/work_experience.tex", "cv_template/sections/education.tex"]:
+        with open(path) as file:
+            assert scan_latex(file.read()).valid, path
+
+def test_tokens_cover_the_content():
+    content = r"\begin{itemize}\item[$\bullet$] C\# and {\bf Go} at 20% \end{itemize}"
+    assert "".join(token.text for token in tokenize(content)) == content
+
+def test_escaped_and_math_characters_are_not_flagged():
+    assert kinds(r"Saved \$5k \{and\} 20\% on \href{https://x.io/a_b#top}{x.io} with $O(n^2)$ and $a_1$") == []
+
+def test_specials_in_text_are_escaped():
+    result = scan_latex("C# and R&D cut costs by 20% in snake_case code")
+    assert result.fixed == r"C\# and R\&D cut costs by 20\% in snake\_case code"
+    assert kinds("a & b") == ["unescaped_special"]
+    assert kinds(r"\begin{tabular}{ll}a & b\end{tabular}") == []
+
+def test_nesting_is_repaired():
+    result = scan_latex(r"\begin{rSection}{X}\begin{itemize}\item {\bf a\end{rSection}}")
+    assert result.fixed == r"\begin{rSection}{X}\begin{itemize}\item {\bf a}\end{itemize}\end{rSection}"
+    assert kinds(r"a}\end{itemize}") == ["unmatched_brace", "unmatched_environment"]
+    assert scan_latex(r"\begin{itemize}\item {a").fixed == r"\begin{itemize}\item {a}\end{itemize}"
+
+def test_bare_arguments_get_braces():
+    assert scan_latex(r"\textbf Python \begin itemize \item x \end itemize").fixed == \
+        r"\textbf{Python} \begin{itemize} \item x \end{itemize}"
+    assert scan_latex(r"\begin{itemize}\item {a \end itemize").fixed == r"\begin{itemize}\item {a }\end{itemize}"
+
+def test_forbidden_environments_and_unclosed_math():
+    result = scan_latex(r"\begin{document}Costs $5\end{document}")
+    assert result.fixed == r"Costs \$5"
+    assert kinds(r"\begin{document}Costs $5\end{document}") == ["forbidden_environment", "forbidden_environment", "unclosed_math"]
+    assert scan_latex(r"\begin{multicols}{2}x\end{multicols}").valid
+
+def test_math_delimiters_and_environments_are_math():
+    for content in [r"\(a_1\) and \[x^2\]", r"\begin{equation}a_1\end{equation}",
+                    r"\begin{align}a_1 &= x^2 \\ b_2 &= y\end{align}", r"\begin{gather*}e^{i\pi}\end{gather*}"]:
+        assert kinds(content) == [], content
+    assert scan_latex(r"\(a_1\) then snake_case").fixed == r"\(a_1\) then snake\_case"
+    assert scan_latex(r"x \(a_1").fixed == r"x \(a_1\)"
+    assert kinds(r"Line\\[2pt] next_line") == ["unescaped_special"]
+
+def test_verb_is_left_alone():
+    assert kinds(r"Use \verb|a_b{| and \verb*+x^2+ here") == []
+    assert scan_latex(r"\verb|a_b| then a_b").fixed == r"\verb|a_b| then a\_b"
@@ -0,0 +1,41 @@
+import time
+import pytest
+from llm_cache import LLMCache
+
+@pytest.fixture
+def cache(tmp_path):
+    return LLMCache(path=str(tmp_path / "llm_cache.sqlite3"), max_bytes=1024, ttl_seconds=60)
+
+def test_round_trip_and_counters(cache):
+    assert cache.get("gpt-4o", "system", "prompt") is None
+    cache.set("gpt-4o", "system", "prompt", "response")
+
+    assert cache.get("gpt-4o", "system", "prompt") == "response"
+    assert cache.get("gpt-4o-mini", "system", "prompt") is None
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 2
+
+def test_bypass_skips_lookup_but_stores(cache):
+    cache.bypass = True
+    cache.set("gpt-4o", "system", "prompt", "response")
+    assert cache.get("gpt-4o", "system", "prompt") is None
+
+    cache.bypass = False
+    assert cache.get("gpt-4o", "system", "prompt") == "response"
+
+def test_expired_entries_are_dropped(cache):
+    cache.ttl_seconds = 0.01
+    cache.set("gpt-4o", "system", "prompt", "response")
+    time.sleep(0.02)
+    assert cache.get("gpt-4o", "system", "prompt") is None
+    assert cache.stats()["entries"] == 0
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.set("gpt-4o", "system", "first", "x" * 400)
+    cache.set("gpt-4o", "system", "second", "x" * 400)
+    cache.get("gpt-4o", "system", "first")
+    cache.set("gpt-4o", "system", "third", "x" * 400)
+
+    assert cache.get("gpt-4o", "system", "first") is not None
+    assert cache.get("gpt-4o", "system", "second") is None
+    assert cache.get("gpt-4o", "system", "third") is not None
@@ -0,0 +1,92 @@
+import sys
+import subprocess
+import openai
+import pytest
+import llm_client
+from llm_cache import LLMCache
+from llm_client import LLMClient
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(llm_client.time, "sleep", lambda seconds: None)
+    monkeypatch.setattr(openai, "api_key", "sk-test")
+    return LLMClient(max_retries=2, cache=LLMCache(path=str(tmp_path / "llm_cache.sqlite3")))
+
+def reply(content):
+    return type('Response', (), {'choices': [type('Choice', (), {'message': {'content': content}})()]})()
+
+def test_rate_limits_are_retried(client, monkeypatch):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        if len(calls) < 3:
+            raise openai.error.RateLimitError("slow down")
+        return reply("done")
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", create)
+    assert client.complete("system", "prompt") == "done"
+    assert len(calls) == 3
+    assert calls[0]["request_timeout"] == llm_client.DEFAULT_TIMEOUT_SECONDS
+
+def test_client_errors_are_not_retried(client, monkeypatch):
+    calls = []
+
+    def create(**kwargs):
+        calls.append(kwargs)
+        raise openai.error.InvalidRequestError("bad prompt", None)
+
+    monkeypatch.setattr(openai.ChatCompletion, "create", create)
+    with pytest.raises(openai.error.InvalidRequestError):
+        client.complete("system", "prompt")
+    assert len(calls) == 1
+
+def test_stage_config_overrides_model_and_parameters(client, monkeypatch):
+    monkeypatch.setenv("OPENAI_MODEL", "gpt-4o")
+    monkeypatch.setenv("OPENAI_MODEL_RELEVANCE", "gpt-4o-mini")
+    monkeypatch.setenv("OPENAI_TEMPERATURE_RELEVANCE", "0")
+    calls = []
+    monkeypatch.setattr(openai.ChatCompletion, "create", lambda **kwargs: calls.append(kwargs) or reply("7"))
+
+    client.complete("system", "prompt", stage="relevance")
+    client.complete("system", "prompt", stage="section")
+    assert (calls[0]["model"], calls[0]["temperature"]) == ("gpt-4o-mini", 0.0)
+    assert calls[1]["model"] == "gpt-4o" and "temperature" not in calls[1]
+
+def test_streamed_responses_are_cached(client, monkeypatch):
+    chunks = [{"choices": [{"delta": {"role": "assistant"}}]},
+              {"choices": [{"delta": {"content": "Hello"}}]},
+              {"choices": [{"delta": {"content": " world"}}]},
+              {"choices": [{"delta": {}}]}]
+    monkeypatch.setattr(openai.ChatCompletion, "create", lambda **kwargs: iter(chunks))
+
+    streamed = []
+    assert client.complete("system", "prompt", on_token=streamed.append) == "Hello world"
+    assert streamed == ["Hello", " world"]
+
+    replayed = []
+    assert client.complete("system", "prompt", on_token=replayed.append) == "Hello world"
+    assert replayed == ["Hello world"]
+
+def test_api_key_is_checked_on_first_request(tmp_path, monkeypatch):
+    monkeypatch.delenv("OPENAI_API_KEY", raising=False)
+    monkeypatch.delenv("OPENAI_MODEL", raising=False)
+    monkeypatch.setattr(openai, "api_key", None)
+    monkeypatch.setattr(openai, "api_base", llm_client.DEFAULT_API_BASE)
+    # Importing the pipeline needs no key and leaves openai unloaded until a request is made
+    result = subprocess.run([sys.executable, "-c", "import sys, cv_generator; assert 'openai' not in sys.modules"],
+                            capture_output=True, text=True)
+    assert result.returncode == 0, result.stderr
+    cache = LLMCache(path=str(tmp_path / "llm_cache.sqlite3"))
+    cache.set(None, "system", "cached prompt", "cached")
+    client = LLMClient(cache=cache)
+    calls = []
+    monkeypatch.setattr(openai.ChatCompletion, "create", lambda **kwargs: calls.append(kwargs) or reply("done"))
+
+    assert client.complete("system", "cached prompt") == "cached"
+    with pytest.raises(ValueError):
+        client.complete("system", "prompt")
+    assert calls == []
+    # A server of its own behind OPENAI_API_BASE needs no key
+    monkeypatch.setattr(openai, "api_base", "http://127.0.0.1:8000/v1")
+    assert client.complete("system", "prompt") == "done"
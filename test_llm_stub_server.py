@@ -0,0 +1,36 @@
+import json
+import openai
+import pytest
+from llm_cache import LLMCache
+from llm_client import LLMClient
+from llm_stub_server import StubResponder, start_server, synthesize_response
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, api_base = start_server()
+    monkeypatch.setattr(openai, "api_base", api_base)
+    monkeypatch.setenv("OPENAI_MODEL", "gpt-4o-mini")
+    yield server
+    server.shutdown()
+    server.server_close()
+
+def test_client_talks_to_stub(stub, tmp_path):
+    client = LLMClient(cache=LLMCache(path=str(tmp_path / "llm_cache.sqlite3"), bypass=True))
+    prompt = 'Rate how relevant each CV item is.\nReturn only a JSON object mapping each id to its score.\n[{"id": 0}, {"id": 1}]'
+    assert set(json.loads(client.complete("system", prompt))) == {"0", "1"}
+
+    tokens = []
+    template = "\\begin{rSection}{Education}\n\\item[$\\bullet$] First class honours\n\\end{rSection}"
+    content = client.complete("system", f"Generate a section.\nTemplate:\n{template}", on_token=tokens.append)
+    assert content == template
+    assert len(tokens) > 1
+
+def test_recorded_responses_are_replayed(tmp_path):
+    recordings = LLMCache(path=str(tmp_path / "recordings.sqlite3"))
+    recordings.set('gpt-4o-mini {"temperature": 0.0}', "system", "Rate (1-10):", "9")
+    responder = StubResponder(recordings=recordings.path)
+    body = {"model": "gpt-4o-mini", "temperature": 0.0,
+            "messages": [{"role": "system", "content": "system"}, {"role": "user", "content": "Rate (1-10):"}]}
+    assert responder.respond(body) == "9"
+    assert responder.respond({**body, "temperature": 1.0}) == synthesize_response("system", "Rate (1-10):")
+    assert responder.replayed == 1
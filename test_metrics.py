@@ -0,0 +1,38 @@
+from concurrent.futures import ThreadPoolExecutor
+from metrics import MetricsRegistry, bind_context, estimate_cost, job_context
+import metrics
+
+
+def test_samples_are_aggregated_per_job_and_process(monkeypatch):
+    registry = MetricsRegistry()
+    monkeypatch.setattr(metrics, "_registry", registry)
+
+    with job_context("job-1"):
+        metrics.record_llm_call("section", "gpt-4o", 2.0, prompt_tokens=1000, completion_tokens=500)
+        metrics.record_llm_call("section", "gpt-4o", 0.01, cache_hit=True)
+        # Pool threads only see the job when the callable is bound to the caller's context
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            list(executor.map(bind_context(lambda _: metrics.record_compile("compile", 1.5)), range(2)))
+    metrics.record_compile("compile", 0.5, success=False)
+
+    job = registry.summary("job-1")
+    assert job["llm"]["section"]["calls"] == 2
+    assert job["llm"]["section"]["cache_hits"] == 1
+    assert job["llm"]["section"]["cost"] == round(estimate_cost("gpt-4o", 1000, 500), 6)
+    assert job["compile"]["compile"]["calls"] == 2
+
+    process = registry.summary()
+    assert (process["compile"]["compile"]["calls"], process["compile"]["compile"]["errors"]) == (3, 1)
+    assert process["total"]["wall_time"] == 2.0 + 0.01 + 1.5 * 2 + 0.5
+
+
+def test_prometheus_export():
+    registry = MetricsRegistry()
+    registry.record("llm", "relevance", 0.3, prompt_tokens=10, completion_tokens=2, cost=0.01)
+    text = registry.to_prometheus()
+
+    assert '# TYPE cv_llm_seconds histogram' in text
+    assert 'cv_llm_seconds_bucket{stage="relevance",le="0.5"} 1' in text
+    assert 'cv_llm_seconds_bucket{stage="relevance",le="0.25"} 0' in text
+    assert 'cv_llm_tokens_total{stage="relevance",type="prompt"} 10' in text
+    assert 'cv_llm_cost_usd_total{stage="relevance"} 0.010000' in text
@@ -0,0 +1,73 @@
+from relevance import break_ties, get_job_terms, rank_entries, score_documents, select_profile, slice_job_info, slice_profile, tokenize
+
+JOB = {
+    'job_title': 'Backend Engineer',
+    'essential_requirements': ['Python and Flask', 'Redis caching on AWS'],
+    'preferred_skills': ['GraphQL'],
+}
+
+
+def test_tokenize_keeps_technology_names():
+    assert tokenize("Built C++ and Node.js services with CI/CD, in C#.") == [
+        "built", "c++", "node.js", "services", "ci/cd", "c#"
+    ]
+
+
+def test_rank_entries_prefers_matching_terms():
+    entries = ["Knitting blog", "Flask API with Redis on AWS", "GraphQL gateway"]
+    assert rank_entries(entries, get_job_terms(JOB)) == [1, 2, 0]
+
+
+def test_select_profile_keeps_top_roles_in_order(monkeypatch):
+    monkeypatch.setenv("CV_TOP_K_ROLES", "2")
+    info = {
+        'personal_information': {'name': 'Ada'},
+        'experience_details': [
+            {'position': 'Barista', 'skills_acquired': ['Coffee']},
+            {'position': 'Python developer', 'skills_acquired': ['Flask']},
+            {'position': 'Designer', 'skills_acquired': ['Figma']},
+            {'position': 'Cloud engineer', 'skills_acquired': ['AWS', 'Redis']},
+        ],
+    }
+    profile = select_profile(info, 'work_experience', JOB)
+    assert list(profile) == ['experience_details']
+    assert [role['position'] for role in profile['experience_details']] == ['Python developer', 'Cloud engineer']
+
+
+def test_slice_profile_can_be_disabled(monkeypatch):
+    monkeypatch.setenv("CV_PROFILE_SLICING", "0")
+    info = {'projects': [{'name': 'X'}], 'interests': ['Chess']}
+    assert slice_profile(info, 'projects', JOB) is info
+
+
+def test_slice_job_info_keeps_the_fields_a_section_needs(monkeypatch):
+    job = {**JOB, 'company_mission': ['Make payments simple'], 'additional_info': ['Hybrid, London office']}
+    assert slice_job_info(job, 'work_experience') == JOB
+    assert slice_job_info(job, 'education') == {'job_title': 'Backend Engineer', 'essential_requirements': JOB['essential_requirements']}
+    monkeypatch.setenv("CV_PROFILE_SLICING", "0")
+    assert slice_job_info(job, 'work_experience') is job
+
+
+def test_bm25_scores_sections_on_the_llm_scale():
+    sections = [
+        r"\item[$\bullet$] Built a Flask API with Redis caching on AWS",
+        r"\item[$\bullet$] Painted watercolours",
+        r"\item[$\bullet$] Wrote GraphQL resolvers",
+    ]
+    scores = score_documents(sections, str(JOB))
+    assert scores[0] == 10.0
+    assert scores[1] == 1.0
+    assert 1.0 < scores[2] < 10.0
+
+
+def test_break_ties_only_asks_about_tied_documents():
+    asked = []
+
+    def tiebreak(indices):
+        asked.extend(indices)
+        return {index: 10.0 if index == 2 else 1.0 for index in indices}
+
+    scores = break_ties([3.0, 8.0, 3.2], tiebreak)
+    assert asked == [0, 2]
+    assert scores[2] > scores[0]
+    assert scores[1] == 8.0
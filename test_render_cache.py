@@ -0,0 +1,75 @@
+import os
+import subprocess
+import latex_format
+import render_cache
+import metrics
+from metrics import MetricsRegistry
+from render_cache import RenderCache
+from utils import compile_latex_report
+
+def write(path, content):
+    with open(path, "w") as file:
+        file.write(content)
+
+def fake_pdflatex(tmp_path, monkeypatch):
+    """Replace pdflatex with a stub that writes a one-page log (and a PDF unless -draftmode); returns its runs."""
+    monkeypatch.setenv("LATEX_PRECOMPILED_FORMAT", "0")
+    monkeypatch.setattr(latex_format, "_pdflatex_version", "pdfTeX 3.141592653")
+    monkeypatch.setattr(render_cache, "_cache", RenderCache(str(tmp_path / "cache")))
+    monkeypatch.setattr(metrics, "_registry", MetricsRegistry())
+    runs = []
+
+    def run(command, cwd, **kwargs):
+        runs.append(command)
+        write(os.path.join(cwd, "main.log"), "CVLAYOUT:end:1:100.0pt:600.0pt\n")
+        if "-draftmode" not in command:
+            write(os.path.join(cwd, "main.pdf"), f"%PDF run {len(runs)}")
+        return subprocess.CompletedProcess(command, 0, "", "")
+
+    monkeypatch.setattr(subprocess, "run", run)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    write(output_dir / "main.tex", "\\documentclass{resume}\n\\begin{document}\n\\input{education}\n\\end{document}")
+    write(output_dir / "education.tex", "\\begin{rSection}{Education}\\end{rSection}")
+    write(output_dir / "resume.cls", "% class")
+    return output_dir, runs
+
+def test_unchanged_inputs_skip_pdflatex(tmp_path, monkeypatch):
+    output_dir, runs = fake_pdflatex(tmp_path, monkeypatch)
+
+    assert compile_latex_report(str(output_dir)).pages == 1
+    (output_dir / "main.pdf").unlink()
+    assert compile_latex_report(str(output_dir)).pages == 1
+    assert len(runs) == 1
+    assert (output_dir / "main.pdf").read_text() == "%PDF run 1"
+
+    # Editing an \input section is a different document
+    write(output_dir / "education.tex", "\\begin{rSection}{Education}x\\end{rSection}")
+    compile_latex_report(str(output_dir))
+    assert len(runs) == 2
+    compile_stats = metrics.get_registry().summary()["compile"]["compile"]
+    assert (compile_stats["calls"], compile_stats["cache_hits"]) == (3, 1)
+
+def test_least_recently_used_renders_are_evicted(tmp_path):
+    cache = RenderCache(str(tmp_path / "cache"), max_bytes=250)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    write(output_dir / "main.log", "")
+    for index, key in enumerate(["a", "b", "c"]):
+        write(output_dir / "main.pdf", "x" * 100)
+        cache.store(key, str(output_dir))
+        os.utime(os.path.join(cache.path, key), (index, index))
+        if key == "b":
+            # Using "a" makes "b" the oldest entry
+            assert cache.restore("a", str(output_dir))
+    assert sorted(os.listdir(cache.path)) == ["a", "c"]
+    assert cache.stats()["bytes"] <= 250
+
+def test_draft_compiles_reuse_only_the_log(tmp_path, monkeypatch):
+    output_dir, runs = fake_pdflatex(tmp_path, monkeypatch)
+    assert compile_latex_report(str(output_dir), draft=True).pages == 1
+    assert "-draftmode" in runs[0] and not (output_dir / "main.pdf").exists()
+    # A full compile of the same inputs still has to write the PDF; after that, probes of it are free
+    compile_latex_report(str(output_dir))
+    compile_latex_report(str(output_dir), draft=True)
+    assert len(runs) == 2
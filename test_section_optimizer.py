@@ -0,0 +1,52 @@
+import json
+import section_optimizer
+from section_optimizer import SectionOptimizer, parse_edits
+from section_renderer import render_section, save_section_data
+
+WORK = {"entries": [
+    {"company": "Acme", "title": "Engineer", "start": "Jan 2020", "end": "Present",
+     "bullets": ["Cut build times by 40% with C# tooling", "Built APIs", "Ran standups"]},
+    {"company": "Initech", "title": "Intern", "start": "Jun 2019", "end": "Sep 2019", "bullets": ["Wrote tests"]},
+]}
+
+def test_invalid_edits_are_ignored():
+    outline = [("Acme", ["a", "b"]), ("Initech", ["c"])]
+    edits = parse_edits({"edits": [
+        {"op": "replace_bullet", "entry": 1, "bullet": 1, "text": "  new   a "},
+        {"op": "drop_item", "entry": 1, "bullet": 9},
+        {"op": "drop_item", "entry": 2, "bullet": 1},  # would leave the entry empty
+        {"op": "drop_item", "entry": 2},
+        {"op": "drop_item", "entry": 1},  # would leave the section empty
+        {"op": "rewrite_everything"},
+    ]}, outline)
+    assert [(edit.op, edit.entry, edit.bullet, edit.text) for edit in edits] == \
+        [("replace_bullet", 0, 0, "new a"), ("drop_item", 1, None, "")]
+
+def test_only_changed_sections_are_sent_and_edits_apply_locally(tmp_path, monkeypatch):
+    prompts = []
+
+    def fake_chat_completion(system_message, prompt, stage=None):
+        prompts.append(prompt)
+        return json.dumps({"edits": [{"op": "replace_bullet", "entry": 1, "bullet": 2, "text": "Built REST APIs in Go"},
+                                     {"op": "drop_item", "entry": 1, "bullet": 3}]})
+
+    monkeypatch.setattr(section_optimizer, "chat_completion", fake_chat_completion)
+    latex = render_section("work_experience", WORK)
+    (tmp_path / "work_experience.tex").write_text(latex)
+    save_section_data(str(tmp_path), "work_experience", WORK)
+    (tmp_path / "projects.tex").write_text(latex.replace("Acme", "Forge"))
+    save_section_data(str(tmp_path), "projects", {"entries": []})  # stale data is not used
+
+    optimizer = SectionOptimizer(str(tmp_path), "Go developer", ["work_experience", "projects"], use_data=True)
+    assert optimizer.optimize() == {"work_experience": 2, "projects": 2}
+    assert "[1.2] Built APIs" in prompts[0] and "Job Description" in prompts[0]
+    optimized = (tmp_path / "work_experience.tex").read_text()
+    assert "\\item[$\\bullet$] Built REST APIs in Go" in optimized and "Ran standups" not in optimized
+    assert "Cut build times by 40\\% with C\\# tooling" in optimized
+    # Sections generated as data are edited as data; the others line by line
+    data = json.loads((tmp_path / "work_experience.json").read_text())
+    assert data["entries"][0]["bullets"] == ["Cut build times by 40% with C# tooling", "Built REST APIs in Go"]
+    assert "\\item[$\\bullet$] Built REST APIs in Go" in (tmp_path / "projects.tex").read_text()
+
+    assert optimizer.optimize() == {}
+    assert len(prompts) == 2
@@ -0,0 +1,52 @@
+from knapsack_reducer import parse_section
+from latex_lexer import scan_latex
+from section_renderer import load_section_data, render_section, save_section_data
+
+WORK = {"entries": [
+    {"company": "Acme & Co", "title": "Engineer", "start": "Jan 2020", "end": "Present",
+     "bullets": ["Cut build times by 40% with C# tooling", "Built snake_case APIs"]},
+    {"company": "Initech", "title": "Intern", "start": "Jun 2019", "end": "Sep 2019", "bullets": ["Wrote tests"]},
+]}
+
+def test_work_experience_renders_the_template():
+    latex = render_section("work_experience", WORK)
+    assert latex.startswith("\\begin{rSection}{Experience}") and latex.endswith("\\end{rSection}")
+    assert "{\\bf Acme \\& Co} \\\\" in latex
+    assert "{Engineer}\\hfill {Jan 2020 - Present}" in latex
+    assert "    \\item[$\\bullet$] Cut build times by 40\\% with C\\# tooling" in latex
+    assert scan_latex(latex).valid
+    # Reducers see the same entries and bullets they would in model-written LaTeX
+    entries = parse_section("work_experience", latex)
+    assert [len(entry.items) for entry in entries] == [2, 1]
+
+def test_empty_fields_and_item_placeholders():
+    projects = render_section("projects", {"entries": [{"name": "Forge", "technologies": ["Python", "LaTeX"], "bullets": ["x"]}]})
+    assert "{Python, LaTeX}" in projects
+    assert "\\href" not in projects
+    skills = render_section("technical_skills", {"skills": ["Python", "CI/CD"]})
+    assert "\\item Python\n\\item CI/CD\n\\end{itemize}" in skills
+    assert "[Skill" not in skills
+
+def test_section_data_is_dropped_once_the_tex_changes(tmp_path):
+    save_section_data(str(tmp_path), "work_experience", WORK)
+    (tmp_path / "work_experience.tex").write_text(render_section("work_experience", WORK))
+    assert load_section_data(str(tmp_path), "work_experience") == WORK
+
+    (tmp_path / "work_experience.tex").write_text(render_section("work_experience", {"entries": WORK["entries"][:1]}))
+    assert load_section_data(str(tmp_path), "work_experience") is None
+
+def test_plain_text_is_escaped_not_parsed():
+    latex = render_section("work_experience", {"entries": [{
+        "company": "A~B <Labs>", "title": "Engineer", "start": "2020", "end": "2021",
+        "bullets": ["Saved $5M and $3M", "Moved C:\\temp to {cloud}", "Hit 100% uptime & 50%+ savings"]}]})
+    assert "Saved \\$5M and \\$3M" in latex
+    assert "Moved C:\\textbackslash{}temp to \\{cloud\\}" in latex
+    assert "Hit 100\\% uptime \\& 50\\%+ savings" in latex
+    assert "{\\bf A\\textasciitilde{}B \\textless{}Labs\\textgreater{}}" in latex
+    assert scan_latex(latex).valid
+
+def test_percent_in_a_url_keeps_the_link_intact():
+    latex = render_section("projects", {"entries": [{"name": "Z", "technologies": ["Go"], "url": "https://github.com/x/y_z%20",
+                                                     "bullets": ["x"]}]})
+    assert "\\hfill{\\href{https://github.com/x/y_z%20}{github.com/x/y\\_z\\%20}}" in latex
+    assert scan_latex(latex).valid
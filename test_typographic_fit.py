@@ -0,0 +1,27 @@
+from compile_report import CompileReport, LayoutMark
+from typographic_fit import DEFAULT_TYPOGRAPHY, build_ladder, fit_typography
+
+def report(pages):
+    return CompileReport(success=True, pages=pages, marks=[LayoutMark("end", pages, 300.0, 600.0)])
+
+def test_ladder_tightens_one_step_at_a_time():
+    ladder = build_ladder()
+    assert ladder[0] == DEFAULT_TYPOGRAPHY and DEFAULT_TYPOGRAPHY.preamble() == ""
+    assert DEFAULT_TYPOGRAPHY.geometry() == "left=0.75in,top=0.35in,right=0.75in,bottom=0.35in"
+    assert [rung.font_size for rung in ladder].index(10.5) == len(ladder) - 2
+    assert "\\RequirePackage{fix-cm}" in ladder[-1].class_prelude()
+
+def test_least_intrusive_fitting_setting_is_found_by_bisection():
+    ladder = build_ladder()
+    written, compiles = [], []
+
+    def compile_draft():
+        compiles.append(written[-1])
+        # The CV fits from the fifth rung on
+        return report(1 if ladder.index(written[-1]) >= 5 else 2)
+
+    result = fit_typography(written.append, compile_draft, max_pages=1, overflow_lines=3)
+    assert result == ladder[5]
+    assert len(compiles) <= 5
+    assert fit_typography(written.append, compile_draft, max_pages=1, overflow_lines=40) is None
+    assert len(compiles) <= 5
@@ -0,0 +1,45 @@
+import json
+import pytest
+import utils
+from utils import adjust_bullet_points_batch
+
+VALID = "x" * 80
+
+def requested_indices(prompt):
+    return [item["index"] for item in json.loads(prompt.split("\n\n", 1)[1])]
+
+def test_batch_maps_indices_and_rerequests_only_stragglers(monkeypatch):
+    requests = []
+    responses = [
+        # Out of order, one still too short, and indices that were never asked for
+        [{"index": 3, "text": "- " + "d" * 85}, {"index": 0, "text": "y" * 80}, {"index": 2, "text": "short"},
+         {"index": 1, "text": "b" * 90}, {"index": 9, "text": "z" * 80}],
+        [{"index": 2, "text": "c" * 78}],
+    ]
+
+    def fake_chat_completion(system_message, prompt, use_cache=True, **kwargs):
+        requests.append((requested_indices(prompt), use_cache))
+        return json.dumps(responses[len(requests) - 1])
+
+    monkeypatch.setattr(utils, "chat_completion", fake_chat_completion)
+    monkeypatch.setattr(utils, "adjust_bullet_point", lambda bullet_point: pytest.fail(f"{bullet_point!r} fell back"))
+    adjusted = adjust_bullet_points_batch([VALID, "a", "b", "d" * 120])
+
+    assert adjusted == [VALID, "b" * 90, "c" * 78, "d" * 85]
+    # Retries must reach the model rather than replay the cached first answer
+    assert requests == [([1, 2, 3], True), ([2], False)]
+
+def test_stragglers_fall_back_to_one_request_each(monkeypatch):
+    requests = []
+
+    def fake_chat_completion(system_message, prompt, **kwargs):
+        requests.append(prompt)
+        return "not json" if len(requests) == 1 else json.dumps([{"index": 0, "text": "still short"}])
+
+    monkeypatch.setattr(utils, "chat_completion", fake_chat_completion)
+    monkeypatch.setattr(utils, "adjust_bullet_point", lambda bullet_point: f"fixed {bullet_point}")
+    adjusted = adjust_bullet_points_batch(["a", VALID, "b"])
+
+    assert len(requests) == utils.BULLET_BATCH_ROUNDS
+    # The fallback rewrites the original text, not a rejected attempt
+    assert adjusted == ["fixed a", VALID, "fixed b"]
@@ -0,0 +1,135 @@
+import os
+import argparse
+from dataclasses import dataclass, replace
+from typing import Callable, List, Optional
+from loguru import logger
+from compile_report import CompileReport
+from layout import measure_layout
+
+# Values each parameter steps through, from the template's own setting to the tightest allowed
+MARGIN_X_STEPS = (0.75, 0.65, 0.55, 0.5)  # left and right margins, in inches
+MARGIN_Y_STEPS = (0.35, 0.3, 0.25)  # top and bottom margins, in inches
+ITEM_SEP_STEPS = (None, 2.0, 0.0)  # paragraph space between list items in pt; None keeps the class default
+SECTION_SKIP_STEPS = (None, r'\smallskip', r'\vspace{2pt}')  # space above each section; None keeps \medskip
+FONT_SIZE_STEPS = (11.0, 10.5, 10.0)  # body font size in pt
+# Layout parameters are tightened in turn, least visible first; the font only shrinks once they are exhausted
+LAYOUT_PARAMETERS = {
+    'section_skip': SECTION_SKIP_STEPS,
+    'item_sep': ITEM_SEP_STEPS,
+    'margin_y': MARGIN_Y_STEPS,
+    'margin_x': MARGIN_X_STEPS,
+}
+# \baselineskip of the 11pt class as a multiple of the font size
+LEADING = 13.6 / 11
+DEFAULT_MAX_OVERFLOW_LINES = 10
+
+
+@dataclass(frozen=True)
+class Typography:
+    """Page layout settings that generate_main_tex writes into main.tex; the defaults are the template's own."""
+    margin_x: float = MARGIN_X_STEPS[0]
+    margin_y: float = MARGIN_Y_STEPS[0]
+    item_sep: Optional[float] = ITEM_SEP_STEPS[0]
+    section_skip: Optional[str] = SECTION_SKIP_STEPS[0]
+    font_size: float = FONT_SIZE_STEPS[0]
+
+    def geometry(self) -> str:
+        return f"left={self.margin_x:g}in,top={self.margin_y:g}in,right={self.margin_x:g}in,bottom={self.margin_y:g}in"
+
+    def class_prelude(self) -> str:
+        """Lines main.tex needs before \\documentclass: Computer Modern only scales to any size with fix-cm."""
+        return "\\RequirePackage{fix-cm}\n" if self.font_size != FONT_SIZE_STEPS[0] else ""
+
+    def preamble(self) -> str:
+        """Lines main.tex needs after loading geometry to apply the settings that differ from the class."""
+        lines = []
+        if self.item_sep is not None:
+            lines.append(f"\\setlist[itemize]{{parsep={self.item_sep:g}pt}}")
+        if self.section_skip is not None:
+            lines.append(f"\\def\\sectionskip{{{self.section_skip}}}")
+        if self.font_size != FONT_SIZE_STEPS[0]:
+            leading = self.font_size * LEADING
+            lines.append(f"\\renewcommand\\normalsize{{\\fontsize{{{self.font_size:g}}}{{{leading:.1f}}}\\selectfont}}")
+            lines.append("\\normalsize")
+        return "".join(f"{line}\n" for line in lines)
+
+    def describe(self) -> str:
+        changes = [f"{name}={getattr(self, name)}" for name in self.__dataclass_fields__
+                   if getattr(self, name) != getattr(DEFAULT_TYPOGRAPHY, name)]
+        return ", ".join(changes) or "template defaults"
+
+
+DEFAULT_TYPOGRAPHY = Typography()
+
+
+def build_ladder() -> List[Typography]:
+    """
+    Settings from the template defaults to the tightest allowed, each one step tighter than the one before.
+
+    Every rung keeps all the tightening of the rungs below it, so whether a CV fits is (nearly) monotonic
+    along the ladder and the least intrusive rung that fits can be found by bisection.
+    """
+    ladder = [DEFAULT_TYPOGRAPHY]
+    for step in range(1, max(len(steps) for steps in LAYOUT_PARAMETERS.values())):
+        for name, steps in LAYOUT_PARAMETERS.items():
+            if step < len(steps):
+                ladder.append(replace(ladder[-1], **{name: steps[step]}))
+    for font_size in FONT_SIZE_STEPS[1:]:
+        ladder.append(replace(ladder[-1], font_size=font_size))
+    return ladder
+
+
+def is_enabled() -> bool:
+    return os.getenv("CV_TYPOGRAPHIC_FIT", "1").lower() not in ("0", "false", "no")
+
+
+def fit_typography(write_main_tex: Callable[[Typography], None], compile_draft: Callable[[], Optional[CompileReport]],
+                   max_pages: int, overflow_lines: int, ladder: Optional[List[Typography]] = None) -> Optional[Typography]:
+    """
+    Find the least intrusive rung of the ladder on which the CV fits within max_pages, without changing content.
+
+    ladder[0] is the current setting, known not to fit (by default the template defaults of build_ladder()).
+    write_main_tex writes main.tex for a setting and compile_draft lays it out. The tightest rung is tried
+    first, so a CV that cannot fit costs one compile; otherwise the ladder is bisected. main.tex is left at
+    whichever rung was compiled last. Returns None when no rung fits, or without compiling when the overflow
+    is more than CV_TYPOGRAPHIC_FIT_MAX_LINES lines, which spacing alone is not expected to recover.
+    """
+    ladder = ladder or build_ladder()
+    max_overflow_lines = int(os.getenv("CV_TYPOGRAPHIC_FIT_MAX_LINES", DEFAULT_MAX_OVERFLOW_LINES))
+    if len(ladder) < 2:
+        return None
+    if overflow_lines > max_overflow_lines:
+        logger.info(f"CV overflows by {overflow_lines} lines, more than typography can absorb")
+        return None
+
+    def fits(index: int) -> bool:
+        write_main_tex(ladder[index])
+        report = compile_draft()
+        layout = measure_layout(report, max_pages) if report and report.success else None
+        logger.debug(f"Typography {ladder[index].describe()}: {'fits' if layout and layout.fits else 'does not fit'}")
+        return layout is not None and layout.fits
+
+    low, high = 1, len(ladder) - 1
+    if not fits(high):
+        logger.info(f"CV does not fit in {max_pages} page(s) even with the tightest typography")
+        return None
+    # ladder[low - 1] is known not to fit and ladder[high] to fit
+    while low < high:
+        middle = (low + high) // 2
+        if fits(middle):
+            high = middle
+        else:
+            low = middle + 1
+    logger.info(f"CV fits in {max_pages} page(s) with {ladder[high].describe()}")
+    return ladder[high]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="List the typography settings the fit stage searches")
+    parser.parse_args()
+    for index, typography in enumerate(build_ladder()):
+        print(f"{index:>3}  {typography.describe()}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,30 +1,33 @@
-import yaml
 import os
 import re
-import openai
+import json
+import hashlib
+import time
 import subprocess
-import pypdf
 import shutil
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 from loguru import logger
 from dotenv import load_dotenv
-from typing import Dict, List, Optional
+from metrics import record_compile, bind_context
+from latex_format import get_format_args
+from render_cache import get_render_cache, RENDER_FILES, DRAFT_FILES
+from compile_report import CompileReport, load_compile_report
+from latex_lexer import LatexIssue, scan_latex
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, TypeVar
 
 # Load environment variables
 load_dotenv()
 
-# Ensure OpenAI API key is set
-if not os.getenv("OPENAI_API_KEY"):
-    logger.critical("OPENAI_API_KEY environment variable is not set")
-    raise ValueError("OPENAI_API_KEY environment variable is not set")
-
-openai.api_key = os.getenv("OPENAI_API_KEY")
+# openai, pypdf, yaml and asyncio are imported where they are used, so commands that only compile
+# LaTeX start quickly; the API key is checked when the first LLM request is made (see llm_client.py)
 
 # Silence OpenAI loggers
 logger.disable("openai")
 logger.disable("openai.http_client")
 
 def load_yaml(file_path: str) -> Dict:
+    import yaml
     try:
         with open(file_path, 'r') as file:
             logger.debug(f"Loading YAML file from {file_path}")
@@ -33,6 +36,9 @@ def load_yaml(file_path: str) -> Dict:
         logger.error(f"Error loading YAML from {file_path}: {e}")
         return {}
 
+def hash_text(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
 def load_template(file_path: str) -> str:
     try:
         logger.debug(f"Loading template from {file_path}")
@@ -42,118 +48,192 @@ def load_template(file_path: str) -> str:
         logger.error(f"Template file not found: {file_path}")
         return ""
 
-def generate_section_content(section_name: str, prompt: str) -> str:
+def chat_completion(system_message: str, prompt: str, use_cache: bool = True,
+                    on_token: Optional[Callable[[str], None]] = None, stage: str = "default") -> str:
+    """Send a system + user message exchange through the shared LLM client (see llm_client.py)."""
+    from llm_client import get_llm_client
+    return get_llm_client().complete(system_message, prompt, stage=stage, use_cache=use_cache, on_token=on_token)
+
+def generate_section_content(section_name: str, prompt: str, on_token: Optional[Callable[[str], None]] = None) -> str:
+    """Generate a section, streaming the raw text to on_token if given; post-processing runs on the complete text."""
     # logger.info(f"Generating section for {section_name}")
     try:
-        response = openai.ChatCompletion.create(
-            model=os.getenv("OPENAI_MODEL"),
-            messages=[
-                {"role": "system", "content": "You are a LaTeX expert tasked with generating CV sections that exactly match given templates. Ensure all LaTeX syntax is correct and complete."},
-                {"role": "user", "content": prompt}
-            ]
-        )
-
-        generated_content = response.choices[0].message['content'].strip('`').strip('latex')
-        
-        if not validate_latex_syntax(generated_content):
-            logger.warning(f"Invalid LaTeX syntax detected in {section_name} section. Attempting to fix...")
-            generated_content = fix_latex_syntax(generated_content)
+        generated_content = chat_completion(
+            "You are a LaTeX expert tasked with generating CV sections that exactly match given templates. Ensure all LaTeX syntax is correct and complete.",
+            prompt,
+            on_token=on_token,
+            stage="section"
+        ).strip('`').strip('latex')
         
-        if section_name in ["Work Experience", "Projects"]:
+        # In "width" mode bullets are fitted against their typeset width after compilation instead (see bullet_fit.py)
+        if section_name in ["Work Experience", "Projects"] and get_bullet_fit_mode() == "length":
             generated_content = adjust_bullet_point_lengths(generated_content)
         
+        # One pass finds and repairs problems, including unescaped # and & in generated or rewritten text
+        result = scan_latex(generated_content)
+        if not result.valid:
+            logger.warning(f"Invalid LaTeX syntax detected in {section_name} section. Fixing {len(result.issues)} issues...")
+            log_latex_issues(result.issues)
+            generated_content = result.fixed
+        
         logger.success(f"Section for {section_name} generated successfully")
-        return generated_content.replace('#', r'\#').replace(r'\\#', r'\#')
+        return generated_content
     except Exception as e:
         logger.error(f"Error generating section content: {str(e)}")
         return ""
 
-def validate_latex_syntax(content: str) -> bool:
+def generate_section_data(section_name: str, prompt: str, on_token: Optional[Callable[[str], None]] = None) -> Dict:
+    """Generate a section as JSON data (see section_renderer.py); an unparseable response gives empty data."""
+    output = chat_completion(
+        "You are an expert CV writer. Reply with compact JSON only, no LaTeX and no commentary.",
+        prompt,
+        on_token=on_token,
+        stage="section"
+    )
     try:
-        brace_count = sum(1 if char == '{' else -1 if char == '}' else 0 for char in content)
-        if brace_count != 0:
-            logger.warning("Mismatched braces detected")
-            return False
-
-        common_commands = [r'\\begin', r'\\end', r'\\section', r'\\subsection', r'\\textbf', r'\\textit', r'\\item']
-        for command in common_commands:
-            if content.count(command + '{') != content.count(command + '}'):
-                logger.warning(f"Mismatched {command} commands detected")
-                return False
-
-        environments = re.findall(r'\\begin\{(\w+)\}', content)
-        for env in environments:
-            if content.count(r'\\begin{' + env + '}') != content.count(r'\\end{' + env + '}'):
-                logger.warning(f"Mismatched {env} environment detected")
-                return False
-
-        undefined_environments = ['multicols']
-        for env in undefined_environments:
-            if r'\\begin{' + env + '}' in content or r'\\end{' + env + '}' in content:
-                logger.warning(f"Undefined environment {env} detected")
-                return False
+        data = parse_json_response(output)
+    except json.JSONDecodeError as e:
+        logger.error(f"Failed to parse {section_name} section data: {e}")
+        return {}
+    if not isinstance(data, dict):
+        logger.error(f"{section_name} section data is not a JSON object")
+        return {}
+    logger.success(f"Section data for {section_name} generated successfully")
+    return data
+
+def log_latex_issues(issues: List[LatexIssue]) -> None:
+    for issue in issues:
+        logger.warning(f"{issue.message} at offset {issue.position}")
 
+def validate_latex_syntax(content: str) -> bool:
+    """Check brace and environment nesting, escapes and forbidden environments (see latex_lexer.py)."""
+    result = scan_latex(content)
+    if result.valid:
         logger.success("LaTeX syntax validation passed")
-        return True
-    except Exception as e:
-        logger.error(f"Error in validate_latex_syntax: {str(e)}")
-        return False
+    else:
+        log_latex_issues(result.issues)
+    return result.valid
 
 def fix_latex_syntax(content: str) -> str:
     logger.info("Attempting to fix LaTeX syntax")
-    fixed_content = content
-
-    brace_count = sum(1 if char == '{' else -1 if char == '}' else 0 for char in fixed_content)
-    fixed_content = '{' * max(0, -brace_count) + fixed_content + '}' * max(0, brace_count)
+    fixed_content = scan_latex(content).fixed
+    logger.success("LaTeX syntax fixed")
+    return fixed_content
 
-    common_commands = ['\\\\begin', '\\\\end', '\\\\section', '\\\\subsection', '\\\\textbf', '\\\\textit', '\\\\item']
-    for command in common_commands:
-        fixed_content = re.sub(rf'{command}\s*([^{{}}]+)', rf'{command}{{\1}}', fixed_content)
+BULLET_PREFIX = r'\item[$\bullet$] '
+BULLET_MIN_LENGTH = 75
+BULLET_MAX_LENGTH = 95
+BULLET_BATCH_ROUNDS = 2
 
-    environments = re.findall(r'\\begin\{(\w+)\}', fixed_content)
-    for env in environments:
-        if fixed_content.count(r'\\begin{' + env + '}') > fixed_content.count(r'\\end{' + env + '}'):
-            fixed_content += r'\\end{' + env + '}'
+def get_bullet_fit_mode() -> str:
+    """Either "width" (shorten bullets that wrap by a small margin) or "length" (the 75-95 character rule)."""
+    return os.getenv("CV_BULLET_FIT", "width").lower()
 
-    undefined_environments = ['multicols']
-    for env in undefined_environments:
-        fixed_content = re.sub(r'\\begin\{' + env + r'\}.*?\\end\{' + env + r'\}', '', fixed_content, flags=re.DOTALL)
-        fixed_content = fixed_content.replace(r'\\begin{' + env + '}', '').replace(r'\\end{' + env + '}', '')
+def get_section_format() -> str:
+    """Either "latex" (the model writes each section's LaTeX) or "json" (it returns data that section_renderer.py renders)."""
+    return os.getenv("CV_SECTION_FORMAT", "latex").lower()
 
-    logger.success("LaTeX syntax fixed")
-    return fixed_content
+def is_bullet_length_valid(bullet_point: str) -> bool:
+    return BULLET_MIN_LENGTH <= len(bullet_point) <= BULLET_MAX_LENGTH
 
-def adjust_bullet_point_lengths(content: str) -> str:
+def adjust_bullet_point_lengths(content: str, batched: bool = True) -> str:
     logger.info("Adjusting bullet point lengths")
     lines = content.split('\n')
+    bullet_points = {
+        index: line.strip()[len(BULLET_PREFIX):].strip().lstrip('-').strip()
+        for index, line in enumerate(lines)
+        if line.strip().startswith(BULLET_PREFIX)
+    }
+    out_of_range = [index for index, bullet_point in bullet_points.items() if not is_bullet_length_valid(bullet_point)]
+
+    if batched:
+        adjusted_bullets = adjust_bullet_points_batch([bullet_points[index] for index in out_of_range])
+    else:
+        adjusted_bullets = [adjust_bullet_point(bullet_points[index]) for index in out_of_range]
+    bullet_points.update(zip(out_of_range, adjusted_bullets))
+
     adjusted_lines = []
-    for line in lines:
-        if line.strip().startswith(r'\item[$\bullet$] '):
-            bullet_point = line.strip()[17:].strip().lstrip('-').strip()
-            if len(bullet_point) < 75 or len(bullet_point) > 95:
-                adjusted_bullet = adjust_bullet_point(bullet_point).strip('[$\\bullet$]')
-                if adjusted_bullet:
-                    adjusted_lines.append(f"    \\item[$\\bullet$] {adjusted_bullet}")
-            else:
-                adjusted_lines.append(f"    \\item[$\\bullet$] {bullet_point}")
-        else:
+    for index, line in enumerate(lines):
+        if index not in bullet_points:
             adjusted_lines.append(line)
+            continue
+        bullet_point = bullet_points[index]
+        if bullet_point.startswith(BULLET_PREFIX.strip()):
+            bullet_point = bullet_point[len(BULLET_PREFIX.strip()):].strip()
+        if bullet_point:
+            adjusted_lines.append(f"    {BULLET_PREFIX}{bullet_point}")
     logger.success("Bullet point lengths adjusted")
     return '\n'.join(adjusted_lines)
 
+def parse_json_response(output: str):
+    """Parse a JSON payload from a model response, tolerating Markdown code fences and surrounding prose."""
+    json_str = re.sub(r'^```(?:json)?\s*|\s*```$', '', output.strip(), flags=re.MULTILINE)
+    try:
+        return json.loads(json_str)
+    except json.JSONDecodeError:
+        match = re.search(r'(\{.*\}|\[.*\])', output, re.DOTALL)
+        if not match:
+            raise
+        return json.loads(match.group(0))
+
+def adjust_bullet_points_batch(bullet_points: List[str], max_workers: int = 4) -> List[str]:
+    """
+    Adjust many bullet points to the target length with as few LLM round trips as possible.
+
+    All out-of-range bullets are sent in a single indexed request; only the ones that come back still
+    out of range are re-requested, and after BULLET_BATCH_ROUNDS rounds the remaining stragglers fall
+    back to adjust_bullet_point, at most `max_workers` at a time.
+    """
+    adjusted = list(bullet_points)
+    pending = [index for index, bullet_point in enumerate(bullet_points) if not is_bullet_length_valid(bullet_point)]
+
+    for round_number in range(BULLET_BATCH_ROUNDS):
+        if not pending:
+            break
+        logger.debug(f"Adjusting {len(pending)} bullet points in one request, round {round_number + 1}")
+        prompt = (
+            f"Rewrite each bullet point to be between {BULLET_MIN_LENGTH} and {BULLET_MAX_LENGTH} characters "
+            "while maintaining its key information.\n"
+            'Return only a JSON array of objects of the form {"index": <index>, "text": "<bullet point>"}, '
+            "one per input, keeping the same indices.\n\n"
+            + json.dumps([{"index": index, "text": adjusted[index]} for index in pending], indent=2)
+        )
+        try:
+            response = parse_json_response(chat_completion(
+                "You are an expert in CV writing. Adjust bullet points to the requested length while ensuring high quality.",
+                prompt,
+                use_cache=round_number == 0,
+                stage="bullets"
+            ))
+            for item in response:
+                index = int(item["index"])
+                text = str(item["text"]).strip().lstrip('-').strip()
+                if index in pending and is_bullet_length_valid(text):
+                    adjusted[index] = text
+        except Exception as e:
+            logger.error(f"Error adjusting bullet points in batch: {str(e)}")
+        pending = [index for index in pending if not is_bullet_length_valid(adjusted[index])]
+
+    if pending:
+        logger.warning(f"{len(pending)} bullet points still out of range, adjusting individually")
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for index, adjusted_bullet in zip(pending, executor.map(bind_context(adjust_bullet_point), [bullet_points[index] for index in pending])):
+                adjusted[index] = adjusted_bullet
+
+    return adjusted
+
 def adjust_bullet_point(bullet_point: str) -> str:
     max_attempts = 3
     for attempt in range(max_attempts):
         try:
             logger.debug(f"Adjusting bullet point, attempt {attempt + 1}")
-            response = openai.ChatCompletion.create(
-                model=os.getenv("OPENAI_MODEL"),
-                messages=[
-                    {"role": "system", "content": "You are an expert in CV writing. Adjust the given bullet point to be between 75 and 95 characters while maintaining its key information and ensuring high quality."},
-                    {"role": "user", "content": f"Adjust this bullet point to be between 75 and 95 characters: {bullet_point}"}
-                ]
-            )
-            adjusted_bullet = response.choices[0].message['content'].strip().lstrip('-').strip()
+            # Retries must reach the model, otherwise they would replay the rejected cached answer
+            adjusted_bullet = chat_completion(
+                "You are an expert in CV writing. Adjust the given bullet point to be between 75 and 95 characters while maintaining its key information and ensuring high quality.",
+                f"Adjust this bullet point to be between 75 and 95 characters: {bullet_point}",
+                use_cache=attempt == 0,
+                stage="bullets"
+            ).strip().lstrip('-').strip()
             if 75 <= len(adjusted_bullet) <= 95:
                 logger.success("Bullet point adjusted successfully")
                 return adjusted_bullet
@@ -162,14 +242,11 @@ def adjust_bullet_point(bullet_point: str) -> str:
     
     try:
         logger.warning("Failed to adjust bullet point, generating new one")
-        response = openai.ChatCompletion.create(
-            model=os.getenv("OPENAI_MODEL"),
-            messages=[
-                {"role": "system", "content": "You are an expert in CV writing. Generate a new, high-quality bullet point based on the theme of the given one, ensuring it's between 75 and 95 characters."},
-                {"role": "user", "content": f"Generate a new bullet point based on this theme, but make it between 75 and 95 characters: {bullet_point}"}
-            ]
-        )
-        new_bullet = response.choices[0].message['content'].strip().lstrip('-').strip()
+        new_bullet = chat_completion(
+            "You are an expert in CV writing. Generate a new, high-quality bullet point based on the theme of the given one, ensuring it's between 75 and 95 characters.",
+            f"Generate a new bullet point based on this theme, but make it between 75 and 95 characters: {bullet_point}",
+            stage="bullets"
+        ).strip().lstrip('-').strip()
         if 75 <= len(new_bullet) <= 95:
             logger.success("New bullet point generated successfully")
             return new_bullet
@@ -190,6 +267,7 @@ def load_job_description(file_path: str) -> str:
         return ""
 
 def get_pdf_pages(pdf_path: str) -> Optional[int]:
+    import pypdf
     try:
         with open(pdf_path, 'rb') as pdf_file:
             pdf_reader = pypdf.PdfReader(pdf_file)
@@ -200,29 +278,81 @@ def get_pdf_pages(pdf_path: str) -> Optional[int]:
         logger.error(f"Error reading PDF file {pdf_path}: {str(e)}")
         return None
 
-def compile_latex(output_dir: str) -> Optional[int]:
+def compile_latex_report(output_dir: str, stage: str = "compile", draft: bool = False) -> Optional[CompileReport]:
+    """
+    Compile output_dir/main.tex and return a report parsed from main.log, or None if pdflatex could not run.
+
+    If the inputs are identical to an earlier successful compile, its PDF and log are reused from the
+    render cache (see render_cache.py) instead. A draft compile (pdflatex -draftmode) lays the document
+    out and writes the log, which is all page counts and layout measurements need, but no PDF.
+    """
+    start = time.perf_counter()
+    files = DRAFT_FILES if draft else RENDER_FILES
     try:
-        logger.info(f"Compiling LaTeX in {output_dir}")
-        result = subprocess.run(['pdflatex', 'main.tex'], check=True, cwd=output_dir, capture_output=True, text=True)
-        
-        pdf_path = os.path.join(output_dir, 'main.pdf')
-        if os.path.exists(pdf_path):
-            page_count = get_pdf_pages(pdf_path)
-            if page_count:
-                return page_count
-            else:
-                logger.error("Failed to get page count")
-                return None
-        else:
-            logger.error("PDF file not found after compilation")
+        cache = get_render_cache()
+        key = cache.make_key(output_dir) if cache else None
+        if key and cache.restore(key, output_dir, files):
+            elapsed = time.perf_counter() - start
+            report = load_compile_report(output_dir, elapsed=elapsed)
+            if report is not None and report.success:
+                record_compile(stage, elapsed, success=True, cache_hit=True)
+                logger.info(f"Inputs in {output_dir} unchanged, reused the cached {report.pages} page(s)")
+                return report
+
+        logger.info(f"Compiling LaTeX in {output_dir}" + (" (draft)" if draft else ""))
+        format_args = get_format_args(output_dir)
+        draft_args = ['-draftmode'] if draft else []
+        start = time.perf_counter()
+        result = subprocess.run(['pdflatex', '-interaction=nonstopmode', *draft_args, *format_args, 'main.tex'],
+                                cwd=output_dir, capture_output=True, text=True)
+        elapsed = time.perf_counter() - start
+
+        report = load_compile_report(output_dir, success=result.returncode == 0, elapsed=elapsed)
+        record_compile(stage, elapsed, success=report is not None and report.success)
+        if report is None:
+            logger.error("LaTeX log not found after compilation")
             return None
-    except subprocess.CalledProcessError as e:
-        logger.error(f"LaTeX compilation failed: {e.stderr}")
-        return None
+        if report.success and key:
+            cache.store(key, output_dir, files)
+        if not report.success:
+            logger.error(f"LaTeX compilation failed: {'; '.join(report.errors) or result.stdout[-500:]}")
+        elif report.overfull_boxes:
+            logger.warning(f"{len(report.overfull_boxes)} overfull boxes in {output_dir}/main.tex")
+        logger.info(f"Compiled {report.pages} page(s) in {elapsed:.2f}s")
+        return report
     except Exception as e:
+        record_compile(stage, time.perf_counter() - start, success=False)
         logger.error(f"Error during LaTeX compilation: {str(e)}")
         return None
 
+def compile_latex(output_dir: str, draft: bool = False) -> Optional[int]:
+    """Page count of output_dir/main.tex; a draft compile is recorded as a "probe" and writes no PDF."""
+    report = compile_latex_report(output_dir, stage="probe" if draft else "compile", draft=draft)
+    if report is None or not report.success:
+        return None
+    if not report.pages:
+        logger.error("Failed to get page count")
+        return None
+    return report.pages
+
+T = TypeVar("T")
+
+def iterate_async(async_iterator: AsyncIterator[T]) -> Iterator[T]:
+    """Drive an async iterator from synchronous code (e.g. a Flask SSE generator), yielding items as they arrive."""
+    import asyncio
+    loop = asyncio.new_event_loop()
+    try:
+        while True:
+            try:
+                yield loop.run_until_complete(async_iterator.__anext__())
+            except StopAsyncIteration:
+                break
+    finally:
+        loop.run_until_complete(async_iterator.aclose())
+        loop.run_until_complete(loop.shutdown_asyncgens())
+        loop.run_until_complete(loop.shutdown_default_executor())
+        loop.close()
+
 def move_cv_to_output(output_dir: str, cv_name: str) -> None:
     cv_dir = 'CVs'
     os.makedirs(cv_dir, exist_ok=True)